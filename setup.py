@@ -11,7 +11,13 @@ setup(
         'coco-backends',
         'coco-contract',
         'Flask==0.10.1',
+        'futures==3.0.3',
+        'gunicorn==19.9.0',
         'psutil==3.1.1'
     ],
+    extras_require={
+        'gevent': ['gevent==1.0.2'],
+        'speedups': ['ujson==1.33']
+    },
     entry_points={'console_scripts': ['coco_hostapi = coco.hostapi.cli.server:main']}
 )
@@ -0,0 +1,206 @@
+from threading import Lock
+import fcntl
+import os
+import time
+
+
+class AdmissionRejectedError(Exception):
+    """
+    Error raised when an operation is not admitted because its wait queue is full or timed out.
+    """
+    pass
+
+
+class Gate(object):
+    """
+    Limits the number of concurrently running instances of an operation.
+
+    Callers exceeding the limit wait in a bounded queue for a free slot. Slots and places in the queue
+    are files in a directory shared by the worker processes, occupied by holding an exclusive `flock`
+    on them, so the limit applies to the whole node rather than to each worker. The kernel releases
+    the locks of a process that dies (e.g. a worker killed on timeout), so its slots are not lost.
+
+    For `get_status`, every process also writes its number of running and waiting operations to a
+    file of its own, locked for as long as it lives, so counting never touches the slots' locks.
+    """
+
+    def __init__(self, directory, limit, max_queued=0, timeout=30.0):
+        """
+        Initialize a new gate.
+
+        :param directory: The directory to keep the gate's lock files in (shared by the worker processes).
+        :param limit: The maximum number of concurrently running operations.
+        :param max_queued: The maximum number of callers waiting for a free slot.
+        :param timeout: The maximum number of seconds to wait for a free slot.
+        """
+        self.directory = directory
+        self.limit = limit
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self._counts = None
+        self._counts_file = None
+        self._counts_lock = Lock()
+        self._pid = None
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def enter(self):
+        """
+        Occupy a slot, waiting for one to become free if necessary, and return it (to pass to `leave`).
+
+        :raises AdmissionRejectedError: If the wait queue is full or no slot became free in time.
+        """
+        slot = self._lock_any('slot', self.limit)
+        if slot is None:
+            place = self._lock_any('queued', self.max_queued)
+            if place is None:
+                raise AdmissionRejectedError("Wait queue full")
+            self._count(0, 1)
+            try:
+                slot = self._wait()
+            finally:
+                place.close()
+                self._count(0, -1)
+        self._count(1, 0)
+        return slot
+
+    def leave(self, slot):
+        """
+        Free the slot occupied by `enter`.
+        """
+        # closing the file releases its lock
+        slot.close()
+        self._count(-1, 0)
+
+    def get_status(self):
+        """
+        Return the gate's limits and the current number of running and waiting operations.
+
+        The counts files of processes that have died are removed.
+        """
+        active = queued = 0
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.count'):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                with open(path) as counts_file:
+                    try:
+                        fcntl.flock(counts_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+                    except IOError:
+                        # locked by its living process
+                        counts = counts_file.read().split()
+                        active += int(counts[0])
+                        queued += int(counts[1])
+                    else:
+                        os.remove(path)
+            except (IOError, OSError, IndexError, ValueError):
+                pass
+        return {
+            'limit': self.limit,
+            'active': active,
+            'max_queued': self.max_queued,
+            'queued': queued
+        }
+
+    def _count(self, active, queued):
+        """
+        Add to the current process's numbers of running and waiting operations and publish them.
+        """
+        with self._counts_lock:
+            if self._pid != os.getpid():
+                # counts and their file are not inherited by forked processes
+                self._pid = os.getpid()
+                self._counts = [0, 0]
+                self._counts_file = self._open_counts_file()
+            self._counts[0] += active
+            self._counts[1] += queued
+            # fixed-width records overwrite each other, so readers never see a partial one
+            self._counts_file.seek(0)
+            self._counts_file.write('%10d %10d\n' % tuple(self._counts))
+            self._counts_file.flush()
+
+    def _get_path(self, kind, number):
+        """
+        Return the path of the lock file of the slot or place in the queue.
+        """
+        return os.path.join(self.directory, '%s-%d.lock' % (kind, number))
+
+    def _lock_any(self, kind, count):
+        """
+        Occupy the first free of the `count` lock files of the kind and return it (`None` if all are occupied).
+        """
+        for number in xrange(count):
+            lock_file = open(self._get_path(kind, number), 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return lock_file
+            except IOError:
+                lock_file.close()
+        return None
+
+    def _open_counts_file(self):
+        """
+        Open and lock the current process's counts file, which stays locked until the process exits.
+        """
+        path = os.path.join(self.directory, 'process-%d.count' % os.getpid())
+        while True:
+            counts_file = open(path, 'r+' if os.path.exists(path) else 'w+')
+            # only held briefly by `get_status` checking if the file belongs to a living process
+            fcntl.flock(counts_file, fcntl.LOCK_EX)
+            # the file of a dead process with the same PID might have been removed meanwhile
+            if os.fstat(counts_file.fileno()).st_nlink > 0:
+                return counts_file
+            counts_file.close()
+
+    def _wait(self):
+        """
+        Wait up to `timeout` seconds for a free slot, occupy it and return it.
+
+        The slots are polled with increasing delays: the gevent engine's (patched) `time.sleep`
+        yields to the other coroutines, unlike a blocking lock.
+
+        :raises AdmissionRejectedError: If no slot became free in time.
+        """
+        deadline = time.time() + self.timeout
+        delay = 0.001
+        while True:
+            slot = self._lock_any('slot', self.limit)
+            if slot is not None:
+                return slot
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise AdmissionRejectedError("Timed out waiting for a free slot")
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.05)
+
+
+class AdmissionController(object):
+    """
+    Collection of the gates limiting the expensive operations.
+    """
+
+    def __init__(self, limits, directory):
+        """
+        Initialize a gate for every configured operation.
+
+        :param limits: Dictionary mapping operation names to dictionaries with the
+                       `limit`, `max_queued` and `timeout` arguments of their gate.
+        :param directory: The directory to keep the gates' lock files in (shared by the worker processes).
+        """
+        self.gates = dict(
+            (operation, Gate(os.path.join(directory, operation), **options))
+            for operation, options in limits.items()
+        )
+
+    def get_gate(self, operation):
+        """
+        Return the gate of the operation or `None` if it is not limited.
+        """
+        return self.gates.get(operation)
+
+    def get_status(self):
+        """
+        Return the status of all gates, by operation name.
+        """
+        return dict((operation, gate.get_status()) for operation, gate in self.gates.items())
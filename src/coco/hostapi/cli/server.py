@@ -1,12 +1,29 @@
 import argparse
-from coco.common.utils import ClassLoader
 from coco.hostapi import config
-from coco.hostapi.http.routes.containers import blueprint as containers_blueprint
-from coco.hostapi.http.routes.core import blueprint as core_blueprint
-from flask import Flask
+from coco.hostapi.admission import AdmissionController
+from coco.hostapi.health import HealthProbe
+from coco.hostapi.http.app import create_app
+from coco.hostapi.http.cache import ResponseCache
+from coco.hostapi.http.cache import cached
+from coco.hostapi.http.encoding import set_encoder
+from coco.hostapi.loader import load_backends
+from coco.hostapi.metrics import MetricsRegistry, MetricsWriter
+from coco.hostapi.proxy import CoalescingBackend, InstrumentedBackend, OffloadingBackend
+from coco.hostapi.sampler import ResourceSampler
+from coco.hostapi.slowlog import SlowCallLog, logger as slow_call_logger
+from coco.hostapi.warmup import WarmUp
+import json
+import logging
+import os
 import sys
 
 
+"""
+Exit code telling gunicorn's master process that a worker failed to boot and it should halt.
+"""
+WORKER_BOOT_ERROR = 3
+
+
 def main():
     """
     coco host API command-line interface entry point.
@@ -19,39 +36,331 @@ def main():
                         action='store', type=str, default='0.0.0.0', dest='address')
     parser.add_argument('-p', '--port', help='the port to bind to (default: 8080)',
                         action='store', type=int, default=8080, dest='port')
-    parser.add_argument('--container-backend', help='absolute name of the container backend class to load (default: coco.backends.container_backends.Docker)',
+    parser.add_argument('--container-backend', help='absolute name of the container backend class to load, or comma separated NAME=CLASS pairs to shard across several backends (default: coco.backends.container_backends.Docker)',
                         action='store', type=str, default='coco.backends.container_backends.Docker', dest='container_backend')
-    parser.add_argument('--container-backend-args', help='arguments to pass to the container backend upon initialization (default: { "version": "auto" })',
+    parser.add_argument('--container-backend-args', help='arguments to pass to the container backend upon initialization, or JSON object mapping the names of several backends to their arguments (default: { "version": "auto" })',
                         action='store', type=str, default='{ "version": "auto" }', dest='container_backend_args')
+    parser.add_argument('--backend-cache-directory', help='directory to cache the negotiated container backend arguments in, empty to disable (default: %s)' % config.backend_cache_directory,
+                        action='store', type=str, default=config.backend_cache_directory, dest='backend_cache_directory')
+    parser.add_argument('--container-locks-directory', help='directory in which the workers share the locks of mutating container calls (default: %s)' % config.container_locks_directory,
+                        action='store', type=str, default=config.container_locks_directory, dest='container_locks_directory')
+    parser.add_argument('--cache-size', help='maximum number of entries in the response cache, 0 disables it (default: 256)',
+                        action='store', type=int, default=config.cache_size, dest='cache_size')
+    parser.add_argument('--cache-ttls', help='JSON object mapping cached routes to their TTL in seconds (default: { "images": 30, "snapshots": 10, "containers_snapshots": 10, "public_key": 3600 })',
+                        action='store', type=str, default=None, dest='cache_ttls')
+    parser.add_argument('-w', '--workers', help='number of pre-forked worker processes in production mode (default: 4)',
+                        action='store', type=int, default=4, dest='workers')
+    parser.add_argument('-t', '--threads', help='number of request handling threads per worker (default: 8)',
+                        action='store', type=int, default=8, dest='threads')
+    parser.add_argument('--engine', help='engine serving the requests in production mode: threads or gevent (default: threads)',
+                        action='store', type=str, choices=('threads', 'gevent'), default=config.engine, dest='engine')
+    parser.add_argument('--connections', help='maximum number of simultaneous connections per worker of the gevent engine (default: 1000)',
+                        action='store', type=int, default=config.engine_connections, dest='connections')
+    parser.add_argument('--backend-threads', help='number of threads per worker of the gevent engine running backend calls (default: 32)',
+                        action='store', type=int, default=config.backend_threads, dest='backend_threads')
+    parser.add_argument('--backlog', help='maximum number of pending connections (default: 2048)',
+                        action='store', type=int, default=2048, dest='backlog')
+    parser.add_argument('--keep-alive', help='seconds to wait for requests on a keep-alive connection (default: 5)',
+                        action='store', type=int, default=5, dest='keep_alive')
+    parser.add_argument('--timeout', help='seconds after which silent workers are killed and restarted (default: 120)',
+                        action='store', type=int, default=120, dest='timeout')
+    parser.add_argument('--json-encoder', help='JSON encoder to use: auto, json, simplejson or ujson (default: json)',
+                        action='store', type=str, default=config.json_encoder, dest='json_encoder')
+    parser.add_argument('--compression-level', help='zlib level to compress responses with, 0 disables compression (default: 6)',
+                        action='store', type=int, default=config.compression_level, dest='compression_level')
+    parser.add_argument('--compression-min-size', help='minimum size in bytes of responses to compress (default: 1024)',
+                        action='store', type=int, default=config.compression_min_size, dest='compression_min_size')
+    parser.add_argument('--admission-limits', help='JSON object mapping operations to their concurrency limits (default: see README)',
+                        action='store', type=str, default=None, dest='admission_limits')
+    parser.add_argument('--admission-directory', help='directory in which the workers share the admission slots (default: %s)' % config.admission_directory,
+                        action='store', type=str, default=config.admission_directory, dest='admission_directory')
+    parser.add_argument('--warm-pools', help='JSON object mapping warm pool names to their specification, size, start and ignore options (default: {})',
+                        action='store', type=str, default=None, dest='warm_pools')
+    parser.add_argument('--warm-pools-directory', help='directory in which the workers share the warm pools (default: %s)' % config.warm_pools_directory,
+                        action='store', type=str, default=config.warm_pools_directory, dest='warm_pools_directory')
+    parser.add_argument('--batch-concurrency', help='maximum number of batch request actions run concurrently (default: 8)',
+                        action='store', type=int, default=config.batch_concurrency, dest='batch_concurrency')
+    parser.add_argument('--exec-timeout', help='maximum seconds to wait for a command executed inside a container (default: 300.0)',
+                        action='store', type=float, default=config.exec_timeout, dest='exec_timeout')
+    parser.add_argument('--exec-max-output', help='maximum number of characters of a command\'s output, 0 means unlimited (default: 1048576)',
+                        action='store', type=int, default=config.exec_max_output, dest='exec_max_output')
+    parser.add_argument('--log-follow-interval', help='seconds between two polls of a followed container\'s logs (default: 1.0)',
+                        action='store', type=float, default=config.log_follow_interval, dest='log_follow_interval')
+    parser.add_argument('--job-workers', help='number of threads per worker running asynchronous jobs, 0 disables them (default: 4)',
+                        action='store', type=int, default=config.job_workers, dest='job_workers')
+    parser.add_argument('--job-queue-size', help='maximum number of pending asynchronous jobs per worker (default: 64)',
+                        action='store', type=int, default=config.job_queue_size, dest='job_queue_size')
+    parser.add_argument('--jobs-directory', help='directory to store the states of asynchronous jobs in (default: %s)' % config.jobs_directory,
+                        action='store', type=str, default=config.jobs_directory, dest='jobs_directory')
+    parser.add_argument('--metrics-directory', help='directory in which the workers share their metrics (default: %s)' % config.metrics_directory,
+                        action='store', type=str, default=config.metrics_directory, dest='metrics_directory')
+    parser.add_argument('--metrics-interval', help='seconds between two writes of a worker\'s metrics (default: 5.0)',
+                        action='store', type=float, default=config.metrics_interval, dest='metrics_interval')
+    parser.add_argument('--slow-call-threshold', help='seconds after which container backend calls are logged as slow (default: 1.0)',
+                        action='store', type=float, default=config.slow_call_threshold, dest='slow_call_threshold')
+    parser.add_argument('--slow-call-file', help='file to write the slow-call log to (default: standard error)',
+                        action='store', type=str, default=config.slow_call_file, dest='slow_call_file')
+    parser.add_argument('--uploads-directory', help='directory in which resumable image and snapshot uploads are collected (default: %s)' % config.uploads_directory,
+                        action='store', type=str, default=config.uploads_directory, dest='uploads_directory')
+    parser.add_argument('--events-buffer-size', help='number of container events kept for resuming streams, 0 disables events (default: 1000)',
+                        action='store', type=int, default=config.events_buffer_size, dest='events_buffer_size')
+    parser.add_argument('--events-directory', help='directory in which the workers share container events (default: %s)' % config.events_directory,
+                        action='store', type=str, default=config.events_directory, dest='events_directory')
+    parser.add_argument('--events-diff-interval', help='seconds between two comparisons of the backend\'s containers (default: 10.0)',
+                        action='store', type=float, default=config.events_diff_interval, dest='events_diff_interval')
+    parser.add_argument('--cache-directory', help='directory in which the workers share cache invalidations (default: %s)' % config.cache_directory,
+                        action='store', type=str, default=config.cache_directory, dest='cache_directory')
+    parser.add_argument('--health-max-staleness', help='seconds after which the last health probe of the backend is not trusted anymore (default: 10.0)',
+                        action='store', type=float, default=config.health_max_staleness, dest='health_max_staleness')
+    parser.add_argument('--health-probe-timeout', help='seconds after which a health probe of the backend fails (default: 2.0)',
+                        action='store', type=float, default=config.health_probe_timeout, dest='health_probe_timeout')
+    parser.add_argument('--stats-interval', help='seconds between two samples of the containers\' resource usage, 0 disables them (default: 5.0)',
+                        action='store', type=float, default=config.stats_interval, dest='stats_interval')
+    parser.add_argument('--stats-directory', help='directory in which the workers share the containers\' resource usage (default: %s)' % config.stats_directory,
+                        action='store', type=str, default=config.stats_directory, dest='stats_directory')
+    parser.add_argument('--inventory-interval', help='seconds between two reconciliations of the container inventory, 0 disables it (default: 30.0)',
+                        action='store', type=float, default=config.inventory_interval, dest='inventory_interval')
+    parser.add_argument('--inventory-max-staleness', help='seconds after the last reconciliation the container inventory answers reads (default: 60.0)',
+                        action='store', type=float, default=config.inventory_max_staleness, dest='inventory_max_staleness')
+    parser.add_argument('--sampling-interval', help='seconds between two samples of the node\'s status (default: 5.0)',
+                        action='store', type=float, default=config.sampling_interval, dest='sampling_interval')
     args = parser.parse_args()
 
     # set configuration values
     config.debug = args.debug
+    config.engine = args.engine
+    config.engine_connections = args.connections
+    config.backend_threads = args.backend_threads
+    config.sampling_interval = args.sampling_interval
+    config.stats_interval = args.stats_interval
+    config.stats_directory = args.stats_directory
+    config.health_max_staleness = args.health_max_staleness
+    config.health_probe_timeout = args.health_probe_timeout
+    config.inventory_interval = args.inventory_interval
+    config.inventory_max_staleness = args.inventory_max_staleness
+    config.backend_cache_directory = args.backend_cache_directory
+    config.container_locks_directory = args.container_locks_directory
+    config.json_encoder = args.json_encoder
+    config.compression_level = args.compression_level
+    config.compression_min_size = args.compression_min_size
+    config.batch_concurrency = args.batch_concurrency
+    config.exec_timeout = args.exec_timeout
+    config.exec_max_output = args.exec_max_output
+    config.log_follow_interval = args.log_follow_interval
+    config.job_workers = args.job_workers
+    config.job_queue_size = args.job_queue_size
+    config.jobs_directory = args.jobs_directory
+    config.metrics_directory = args.metrics_directory
+    config.metrics_interval = args.metrics_interval
+    config.slow_call_threshold = args.slow_call_threshold
+    config.slow_call_file = args.slow_call_file
+    config.uploads_directory = args.uploads_directory
+    config.events_buffer_size = args.events_buffer_size
+    config.events_directory = args.events_directory
+    config.events_diff_interval = args.events_diff_interval
+    config.cache_size = args.cache_size
+    config.cache_directory = args.cache_directory
+    if args.cache_ttls:
+        config.cache_ttls.update(json.loads(args.cache_ttls))
+    if args.admission_limits:
+        config.admission_limits.update(json.loads(args.admission_limits))
+    config.admission_directory = args.admission_directory
+    if args.warm_pools:
+        config.warm_pools = json.loads(args.warm_pools)
+    config.warm_pools_directory = args.warm_pools_directory
+    set_encoder(config.json_encoder)
+    if config.slow_call_file:
+        handler = logging.FileHandler(config.slow_call_file)
+    else:
+        handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    slow_call_logger.addHandler(handler)
+    slow_call_logger.propagate = False
+    if config.cache_size > 0:
+        if config.debug:
+            config.response_cache = ResponseCache(max_entries=config.cache_size)
+        else:
+            if not os.path.isdir(config.cache_directory):
+                os.makedirs(config.cache_directory)
+            config.response_cache = ResponseCache(max_entries=config.cache_size, directory=config.cache_directory)
+
+    # the workers share the slots through the lock files of the admission directory
+    config.admission = AdmissionController(config.admission_limits, config.admission_directory)
+    if config.warm_pools:
+        from coco.hostapi.pool import WarmPoolManager
+        config.warm_pool_manager = WarmPoolManager(config.warm_pools, config.warm_pools_directory)
+
+    # bootstrap the application and add our routes
+    app = create_app()
+
+    # run the application / HTTP REST API
+    if config.debug:
+        initialize_worker(args)
+        app.run(
+            debug=config.debug,
+            host=args.address,
+            port=args.port
+        )
+    else:
+        # remove the metrics of previous runs, they would be aggregated otherwise
+        if not os.path.isdir(config.metrics_directory):
+            os.makedirs(config.metrics_directory)
+        for filename in os.listdir(config.metrics_directory):
+            if filename.endswith('.json') or filename.endswith('.lock'):
+                os.remove(os.path.join(config.metrics_directory, filename))
+
+        # imported here, the development server does not need gunicorn
+        from coco.hostapi.http.wsgi import ProductionServer
+
+        # the backend (and its connections) must not be shared across forked workers
+        options = {
+            'bind': '%s:%d' % (args.address, args.port),
+            'workers': args.workers,
+            'threads': args.threads,
+            'worker_class': 'gthread' if args.threads > 1 else 'sync',
+            'backlog': args.backlog,
+            'keepalive': args.keep_alive,
+            'timeout': args.timeout,
+            'post_worker_init': lambda worker: initialize_worker(args, WORKER_BOOT_ERROR)
+        }
+        if config.engine == 'gevent':
+            # a coroutine per connection, the worker patches the standard library to yield on blocking calls
+            options.update({
+                'threads': None,
+                'worker_class': 'gevent',
+                'worker_connections': config.engine_connections
+            })
+        ProductionServer(app, options).run()
+
+
+def initialize_worker(args, exit_code=1):
+    """
+    Initialize the container backend and the background threads of the current process.
+
+    In production mode, this is called in every worker process after it has been forked.
+    The optional subsystems are only imported if they are turned on.
+
+    :param args: The parsed command-line arguments.
+    :param exit_code: The code to exit with if the container backend cannot be initialized.
+    """
+    # a single process does not need to share its metrics
+    if config.debug:
+        config.metrics = MetricsRegistry()
+    else:
+        config.metrics = MetricsRegistry(config.metrics_directory)
+        MetricsWriter(config.metrics, config.metrics_interval).start()
+
+    config.slow_call_log = SlowCallLog(config.slow_call_threshold)
+    config.slow_call_log.start()
+
+    # the gevent engine runs the blocking backend calls on a bounded pool of threads
+    if config.engine == 'gevent' and not config.debug:
+        from gevent.threadpool import ThreadPool
+        config.executor = ThreadPool(config.backend_threads)
 
     try:
-        module, klass = ClassLoader.split(args.container_backend)
-        backend = ClassLoader(module=module, klass=klass, args=args.container_backend_args)
-        config.container_backend = backend.get_instance()
+        backends = load_backends(
+            args.container_backend,
+            args.container_backend_args,
+            config.backend_cache_directory,
+            config.backend_cache_ttl
+        )
+        if config.executor is not None:
+            backends = [(name, OffloadingBackend(backend)) for name, backend in backends]
+        # several backends are sharded behind a single one, routing by the IDs' prefixes
+        if len(backends) > 1:
+            from coco.hostapi.sharding import ShardedBackend
+            backend = ShardedBackend(backends)
+        else:
+            backend = backends[0][1]
+        # a single process in debug mode, so mutating calls are serialized by in-process locks only
+        config.container_backend = CoalescingBackend(
+            InstrumentedBackend(backend),
+            None if config.debug else config.container_locks_directory
+        )
     except Exception as ex:
         if config.debug:
             raise ex
         else:
             print """Initializing the container backend failed.
 Turn on debug mode (-d. --debug) to get more information about the error."""
-            sys.exit(1)
+            sys.exit(exit_code)
 
-    # bootstrap the application and add our routes
-    app = Flask(__name__)
-    app.register_blueprint(containers_blueprint)
-    app.register_blueprint(core_blueprint)
+    # start sampling the node's status in the background
+    config.resource_sampler = ResourceSampler(config.container_backend, config.sampling_interval)
+    config.resource_sampler.start()
 
-    # run the application / HTTP REST API
-    app.run(
-        debug=config.debug,
-        host=args.address,
-        port=args.port
-        # processes=4
+    # probe the backend's health in the background, so /health never waits for it
+    config.health_probe = HealthProbe(
+        config.container_backend,
+        max_staleness=config.health_max_staleness,
+        timeout=config.health_probe_timeout
     )
+    config.health_probe.start()
+
+    # collect the running containers' resource usage in the background
+    if config.stats_interval > 0:
+        from coco.hostapi.stats import StatsCollector
+        config.stats_collector = StatsCollector(
+            config.container_backend,
+            config.stats_directory,
+            interval=config.stats_interval,
+            max_workers=config.batch_concurrency,
+            cgroup_root=config.stats_cgroup_root,
+            cgroup_parent=config.stats_cgroup_parent
+        )
+        config.stats_collector.start()
+
+    # start the thread pool running asynchronous jobs
+    if config.job_workers > 0:
+        from coco.hostapi.jobs import JobManager
+        config.job_manager = JobManager(
+            config.jobs_directory,
+            max_workers=config.job_workers,
+            max_pending=config.job_queue_size
+        )
+
+    # start following the node's container events and detecting changes made outside the API
+    if config.events_buffer_size > 0:
+        from coco.hostapi.events import EventLog, StateDiffer
+        config.event_log = EventLog(config.events_directory, capacity=config.events_buffer_size)
+        config.event_log.start()
+        if config.events_diff_interval > 0:
+            StateDiffer(config.container_backend, config.event_log, config.events_diff_interval).start()
+
+    # answer container reads from an index kept in sync with the backend and the node's events
+    if config.inventory_interval > 0:
+        from coco.hostapi.inventory import Inventory
+        config.inventory = Inventory(
+            config.container_backend,
+            interval=config.inventory_interval,
+            max_staleness=config.inventory_max_staleness
+        )
+        if config.event_log is not None:
+            config.event_log.add_listener(config.inventory.apply)
+        config.inventory.start()
+
+    # keep the warm pools filled in the background
+    if config.warm_pool_manager is not None:
+        from coco.hostapi.pool import WarmPoolRefiller
+        WarmPoolRefiller(config.warm_pool_manager, config.container_backend, config.warm_pools_interval).start()
+
+    # serve requests right away, but only report ready (see /ready) once warmed up
+    config.warm_up = WarmUp()
+    config.warm_up.add_task('status', config.resource_sampler.get_snapshot)
+    if config.response_cache is not None:
+        config.warm_up.add_task('images', prime_images_cache)
+    config.warm_up.start()
+
+
+def prime_images_cache():
+    """
+    Load the container images into the response cache, so the first listing is served from it.
+    """
+    try:
+        cached('images', config.container_backend.get_container_images)
+    except NotImplementedError:
+        pass
 
 
 if __name__ == "__main__":
@@ -1,3 +1,7 @@
+import os
+import tempfile
+
+
 """
 Stores a Boolean indicating if the app should run in debug mode or not.
 
@@ -12,3 +16,470 @@ Variable storing a reference to the container backend implementation the API sho
 This option can be set with --container-backend CONTAINER_BACKEND on start.
 """
 container_backend = None
+
+
+"""
+Maximum number of entries the response cache holds before the least recently used ones are evicted.
+
+This option can be set with --cache-size CACHE_SIZE on start.
+"""
+cache_size = 256
+
+
+"""
+Dictionary mapping the cached routes to the number of seconds their results stay valid.
+
+A TTL of 0 disables caching for that route.
+This option can be set with --cache-ttls CACHE_TTLS on start.
+"""
+cache_ttls = {
+    'images': 30,
+    'snapshots': 10,
+    'containers_snapshots': 10,
+    'public_key': 3600
+}
+
+
+"""
+Directory in which the worker processes share cache invalidations.
+
+This option can be set with --cache-directory CACHE_DIRECTORY on start.
+"""
+cache_directory = os.path.join(tempfile.gettempdir(), 'coco-hostapi-cache')
+
+
+"""
+Variable storing a reference to the response cache used by the read routes.
+
+The cache is created on start if --cache-size is greater than 0.
+"""
+response_cache = None
+
+
+"""
+Number of seconds between two samples of the node's status taken in the background.
+
+This option can be set with --sampling-interval SECONDS on start.
+"""
+sampling_interval = 5.0
+
+
+"""
+Variable storing a reference to the background resource sampler serving the /status route.
+"""
+resource_sampler = None
+
+
+"""
+Number of threads per process running jobs submitted with the `Prefer: respond-async` header.
+
+A value of 0 disables asynchronous jobs.
+This option can be set with --job-workers JOB_WORKERS on start.
+"""
+job_workers = 4
+
+
+"""
+Maximum number of jobs per process that can be pending or running at once.
+
+This option can be set with --job-queue-size JOB_QUEUE_SIZE on start.
+"""
+job_queue_size = 64
+
+
+"""
+Directory in which the job states are stored, so they are visible to all worker processes.
+
+This option can be set with --jobs-directory JOBS_DIRECTORY on start.
+"""
+jobs_directory = os.path.join(tempfile.gettempdir(), 'coco-hostapi-jobs')
+
+
+"""
+Variable storing a reference to the job manager running asynchronous requests.
+"""
+job_manager = None
+
+
+"""
+Maximum number of actions of a single batch request that are run concurrently.
+
+This option can be set with --batch-concurrency BATCH_CONCURRENCY on start.
+"""
+batch_concurrency = 8
+
+
+"""
+Number of seconds between two polls of a container's logs while following them.
+
+This option can be set with --log-follow-interval SECONDS on start.
+"""
+log_follow_interval = 1.0
+
+
+"""
+Maximum number of seconds to wait for a command executed inside a container.
+
+This option can be set with --exec-timeout SECONDS on start.
+"""
+exec_timeout = 300.0
+
+
+"""
+Maximum number of characters of a command's output returned to the client (0 means unlimited).
+
+This option can be set with --exec-max-output SIZE on start.
+"""
+exec_max_output = 1048576
+
+
+"""
+Number of characters of a command's output sent per frame in streaming mode.
+"""
+exec_chunk_size = 16384
+
+
+"""
+Number of seconds between two keep-alive frames while a streamed command is running.
+"""
+exec_heartbeat_interval = 5.0
+
+
+"""
+Name of the JSON encoder module to serialize responses with (json, simplejson or ujson).
+
+"auto" selects the fastest one installed. ujson (1.33) escapes slashes and rounds floats to 9 digits
+when encoding, so its output differs from the other encoders'.
+This option can be set with --json-encoder JSON_ENCODER on start.
+"""
+json_encoder = 'json'
+
+
+"""
+Number of items of a large list serialized at once, so its JSON representation is built in chunks.
+"""
+json_chunk_items = 1000
+
+
+"""
+The zlib compression level (1-9) for gzip/deflate encoded responses; 0 disables compression.
+
+This option can be set with --compression-level LEVEL on start.
+"""
+compression_level = 6
+
+
+"""
+Minimum size in bytes a response body must have to be compressed.
+
+This option can be set with --compression-min-size SIZE on start.
+"""
+compression_min_size = 1024
+
+
+"""
+Directory in which the worker processes share their metrics.
+
+This option can be set with --metrics-directory METRICS_DIRECTORY on start.
+"""
+metrics_directory = os.path.join(tempfile.gettempdir(), 'coco-hostapi-metrics')
+
+
+"""
+Number of seconds between two writes of a worker's metrics into the metrics directory.
+
+This option can be set with --metrics-interval SECONDS on start.
+"""
+metrics_interval = 5.0
+
+
+"""
+Variable storing a reference to the metrics registry of the current process.
+"""
+metrics = None
+
+
+"""
+Number of seconds after which a container backend call is written to the slow-call log.
+
+This option can be set with --slow-call-threshold SECONDS on start.
+"""
+slow_call_threshold = 1.0
+
+
+"""
+Path of the file the slow-call log is written to (standard error if not set).
+
+This option can be set with --slow-call-file PATH on start.
+"""
+slow_call_file = None
+
+
+"""
+Variable storing a reference to the slow-call log of the current process.
+"""
+slow_call_log = None
+
+
+"""
+Dictionary mapping the expensive operations to the limits of their admission gates.
+
+`limit` is the number of operations running at once on the node, `max_queued` the number of
+requests waiting for a free slot and `timeout` the number of seconds they wait at most.
+This option can be set with --admission-limits ADMISSION_LIMITS on start.
+"""
+admission_limits = {
+    'create_container': {'limit': 4, 'max_queued': 16, 'timeout': 30.0},
+    'create_container_image': {'limit': 1, 'max_queued': 4, 'timeout': 60.0},
+    'exec_in_container': {'limit': 16, 'max_queued': 32, 'timeout': 10.0}
+}
+
+
+"""
+Directory in which the worker processes share the slots of the admission gates.
+
+This option can be set with --admission-directory ADMISSION_DIRECTORY on start.
+"""
+admission_directory = os.path.join(tempfile.gettempdir(), 'coco-hostapi-admission')
+
+
+"""
+Number of seconds clients are asked to wait (`Retry-After`) before retrying rejected requests.
+"""
+admission_retry_after = 5
+
+
+"""
+Variable storing a reference to the admission controller limiting expensive operations.
+"""
+admission = None
+
+
+"""
+Number of container lifecycle events kept in memory, so clients can resume their stream. 0 disables events.
+
+This option can be set with --events-buffer-size EVENTS_BUFFER_SIZE on start.
+"""
+events_buffer_size = 1000
+
+
+"""
+Directory in which the worker processes share the container lifecycle events.
+
+This option can be set with --events-directory EVENTS_DIRECTORY on start.
+"""
+events_directory = os.path.join(tempfile.gettempdir(), 'coco-hostapi-events')
+
+
+"""
+Number of seconds between two comparisons of the backend's containers to detect state changes.
+
+This option can be set with --events-diff-interval EVENTS_DIFF_INTERVAL on start.
+"""
+events_diff_interval = 10.0
+
+
+"""
+Number of seconds after which a keep-alive comment is sent on an idle event stream.
+"""
+events_heartbeat = 15.0
+
+
+"""
+Variable storing a reference to the event log of the current process.
+"""
+event_log = None
+
+
+"""
+Directory in which the backend arguments negotiated on start (e.g. `"version": "auto"`) are cached,
+so the next start does not have to probe the backend. An empty value disables the cache.
+
+This option can be set with --backend-cache-directory BACKEND_CACHE_DIRECTORY on start.
+"""
+backend_cache_directory = os.path.join(tempfile.gettempdir(), 'coco-hostapi-backends')
+
+
+"""
+Number of seconds after which cached backend arguments are negotiated again.
+"""
+backend_cache_ttl = 86400.0
+
+
+"""
+Directory in which the worker processes share the locks serializing mutating calls per container.
+
+This option can be set with --container-locks-directory CONTAINER_LOCKS_DIRECTORY on start.
+"""
+container_locks_directory = os.path.join(tempfile.gettempdir(), 'coco-hostapi-locks')
+
+
+"""
+Variable storing a reference to the warm-up of the current process (see /ready).
+"""
+warm_up = None
+
+
+"""
+Number of seconds after which the result of the background health probe is not trusted anymore
+(/health then fails).
+
+This option can be set with --health-max-staleness HEALTH_MAX_STALENESS on start.
+"""
+health_max_staleness = 10.0
+
+
+"""
+Number of seconds after which a health probe of the container backend counts as failed.
+
+This option can be set with --health-probe-timeout HEALTH_PROBE_TIMEOUT on start.
+"""
+health_probe_timeout = 2.0
+
+
+"""
+Variable storing a reference to the health probe of the current process.
+"""
+health_probe = None
+
+
+"""
+Number of seconds between two samples of the running containers' resource usage. 0 disables the stats.
+
+This option can be set with --stats-interval STATS_INTERVAL on start.
+"""
+stats_interval = 5.0
+
+
+"""
+Directory in which the worker processes share the containers' resource usage stats.
+
+This option can be set with --stats-directory STATS_DIRECTORY on start.
+"""
+stats_directory = os.path.join(tempfile.gettempdir(), 'coco-hostapi-stats')
+
+
+"""
+Mount point of the cgroup hierarchies the containers' resource usage is read from
+(if the container backend does not provide it).
+"""
+stats_cgroup_root = '/sys/fs/cgroup'
+
+
+"""
+Parent cgroup of the containers' cgroups.
+"""
+stats_cgroup_parent = 'docker'
+
+
+"""
+Variable storing a reference to the containers' resource usage stats collector of the current process.
+"""
+stats_collector = None
+
+
+"""
+Directory in which the parts of resumable image and snapshot uploads are collected.
+
+This option can be set with --uploads-directory UPLOADS_DIRECTORY on start.
+"""
+uploads_directory = os.path.join(tempfile.gettempdir(), 'coco-hostapi-uploads')
+
+
+"""
+Number of seconds after which resumable uploads that have not been continued are removed.
+"""
+upload_retention = 86400
+
+
+"""
+Number of bytes read and written at once when streaming image and snapshot archives.
+"""
+transfer_chunk_size = 65536
+
+
+"""
+Dictionary mapping the names of warm pools (e.g. images) to their options: the `specification`
+(arguments of `create_container`) of the pooled containers, the number of containers to keep
+available (`size`), if they are started (`start`) and the specification arguments requests
+may set to other values (`ignore`). `POST /containers` requests matching a pool's specification
+are served from it.
+
+This option can be set with --warm-pools WARM_POOLS on start.
+"""
+warm_pools = {}
+
+
+"""
+Directory in which the worker processes share the warm pools' available containers.
+
+This option can be set with --warm-pools-directory WARM_POOLS_DIRECTORY on start.
+"""
+warm_pools_directory = os.path.join(tempfile.gettempdir(), 'coco-hostapi-pools')
+
+
+"""
+Number of seconds between two checks of the warm pools for missing containers.
+"""
+warm_pools_interval = 5.0
+
+
+"""
+Variable storing a reference to the manager of the warm pools.
+"""
+warm_pool_manager = None
+
+
+"""
+Number of seconds between two reconciliations of the in-memory container inventory of each
+worker process with the backend, 0 disables the inventory.
+
+This option can be set with --inventory-interval INVENTORY_INTERVAL on start.
+"""
+inventory_interval = 30.0
+
+
+"""
+Number of seconds after its last reconciliation the inventory answers container reads.
+Older inventories are bypassed until they have been reconciled again.
+
+This option can be set with --inventory-max-staleness INVENTORY_MAX_STALENESS on start.
+"""
+inventory_max_staleness = 60.0
+
+
+"""
+Variable storing a reference to the process's container inventory.
+"""
+inventory = None
+
+
+"""
+Engine serving the requests in production mode: `threads` (a thread per request, see --threads)
+or `gevent` (a coroutine per connection, suited for many long-lived streams).
+
+This option can be set with --engine ENGINE on start.
+"""
+engine = 'threads'
+
+
+"""
+Maximum number of simultaneous connections per worker process of the gevent engine.
+
+This option can be set with --connections CONNECTIONS on start.
+"""
+engine_connections = 1000
+
+
+"""
+Number of threads per worker process of the gevent engine running the blocking backend calls.
+
+This option can be set with --backend-threads BACKEND_THREADS on start.
+"""
+backend_threads = 32
+
+
+"""
+Variable storing a reference to the pool of threads blocking calls are offloaded to (gevent engine only).
+"""
+executor = None
@@ -0,0 +1,345 @@
+from collections import deque
+from coco.contract.backends import ContainerBackend
+from datetime import datetime
+from itertools import islice
+from threading import Condition, Event, Thread
+import fcntl
+import json
+import os
+import time
+
+
+"""
+Types of the container lifecycle events.
+"""
+EVENT_CREATED = 'created'
+EVENT_STARTED = 'started'
+EVENT_STOPPED = 'stopped'
+EVENT_SUSPENDED = 'suspended'
+EVENT_RESUMED = 'resumed'
+EVENT_DELETED = 'deleted'
+EVENT_SNAPSHOT_CREATED = 'snapshot_created'
+EVENT_SNAPSHOT_RESTORED = 'snapshot_restored'
+
+
+class EventLog(Thread):
+    """
+    Node-wide log of container lifecycle events with an in-memory ring buffer of the latest ones.
+
+    Events are appended to a file shared by all worker processes (under an exclusive lock,
+    which also hands out the consecutive event IDs). Every process runs this thread to tail
+    the file into its ring buffer, from which the event streams are served.
+    """
+
+    def __init__(self, directory, capacity=1000, poll_interval=0.25, max_bytes=1048576):
+        """
+        Initialize the log.
+
+        :param directory: The directory shared with the other worker processes.
+        :param capacity: The number of events kept in memory (and thus resumable).
+        :param poll_interval: The number of seconds between two checks for new events.
+        :param max_bytes: The size after which the log file is rotated.
+        """
+        super(EventLog, self).__init__(name='event-log')
+        self.daemon = True
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.max_bytes = max_bytes
+        self._buffer = deque(maxlen=capacity)
+        self._condition = Condition()
+        self._listeners = []
+        self._stopped = Event()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def add_listener(self, listener):
+        """
+        Register a callable invoked (on this thread) with every event read from the log.
+        """
+        self._listeners.append(listener)
+
+    def get_events(self, last_id, timeout=None):
+        """
+        Return the buffered events with an ID greater than `last_id`, waiting for some if there are none.
+
+        Returns a tuple of the list of events (which is empty if the timeout expired) and a Boolean
+        telling if events after `last_id` have already been dropped from the buffer.
+
+        :param last_id: The ID of the last event the client has seen (or `None` for only new ones).
+        :param timeout: The maximum number of seconds to wait for new events.
+        """
+        with self._condition:
+            if last_id is None:
+                last_id = self._buffer[-1]['id'] if self._buffer else 0
+            if not self._buffer or self._buffer[-1]['id'] <= last_id:
+                self._condition.wait(timeout)
+            if not self._buffer:
+                return [], False
+            first_id = self._buffer[0]['id']
+            start = max(0, last_id + 1 - first_id)
+            return list(islice(self._buffer, start, None)), last_id + 1 < first_id
+
+    def get_last_id(self):
+        """
+        Return the ID of the latest buffered event (or 0 if there is none yet).
+        """
+        with self._condition:
+            return self._buffer[-1]['id'] if self._buffer else 0
+
+    def get_published_id(self):
+        """
+        Return the ID of the latest event published by any process (or 0 if there is none yet).
+
+        Unlike `get_last_id`, this includes events not yet read into the buffer.
+        """
+        with open(self._get_path('events.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH)
+            try:
+                with open(self._get_path('events.seq')) as seq_file:
+                    return int(seq_file.read() or 0)
+            except (IOError, ValueError):
+                return 0
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def publish(self, event_type, container, data=None, source='api'):
+        """
+        Append a new event to the log, visible to all processes.
+
+        :param event_type: One of the `EVENT_*` constants.
+        :param container: The (decoded) ID of the container the event belongs to.
+        :param data: Optional additional data (e.g. the created snapshot).
+        :param source: `api` if caused by a request, `backend` if detected by diffing the backend's state.
+        """
+        with open(self._get_path('events.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self._get_path('events.seq')) as seq_file:
+                        event_id = int(seq_file.read() or 0) + 1
+                except (IOError, ValueError):
+                    event_id = 1
+                with open(self._get_path('events.seq'), 'w') as seq_file:
+                    seq_file.write(str(event_id))
+
+                path = self._get_path('events.log')
+                if os.path.exists(path) and os.path.getsize(path) > self.max_bytes:
+                    os.rename(path, path + '.1')
+                with open(path, 'a') as log_file:
+                    log_file.write(json.dumps({
+                        'id': event_id,
+                        'type': event_type,
+                        'container': container,
+                        'data': data,
+                        'source': source,
+                        'timestamp': datetime.utcnow().isoformat() + 'Z'
+                    }) + '\n')
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def run(self):
+        """
+        Tail the log file into the ring buffer until `stop` is called.
+
+        The events already in the file are read first, so the buffer is warm on start.
+        """
+        path = self._get_path('events.log')
+        log_file = None
+        pending = ''
+        while not self._stopped.is_set():
+            try:
+                if log_file is None:
+                    log_file = open(path, 'a+')
+                    log_file.seek(0)
+                rotated = os.stat(path).st_ino != os.fstat(log_file.fileno()).st_ino
+                # seeking clears the end-of-file indicator, otherwise appended data is never read
+                log_file.seek(0, os.SEEK_CUR)
+                data = log_file.read()
+                if data:
+                    lines = (pending + data).split('\n')
+                    pending = lines.pop()
+                    self._append([json.loads(line) for line in lines if line])
+                if rotated:
+                    # the old file has been read completely, continue with the new one
+                    log_file.close()
+                    log_file = open(path, 'a+')
+                    log_file.seek(0)
+                    pending = ''
+                    continue
+            except (IOError, OSError, ValueError):
+                log_file = None
+                pending = ''
+            self._stopped.wait(self.poll_interval)
+
+    def stop(self):
+        """
+        Signal the thread to stop after the current iteration.
+        """
+        self._stopped.set()
+
+    def _append(self, events):
+        """
+        Add the events read from the file to the buffer and wake up waiting streams.
+        """
+        with self._condition:
+            events = [event for event in events if not self._buffer or event['id'] > self._buffer[-1]['id']]
+            self._buffer.extend(events)
+            self._condition.notify_all()
+        for event in events:
+            for listener in self._listeners:
+                try:
+                    listener(event)
+                except Exception:
+                    pass
+
+    def _get_path(self, filename):
+        """
+        Return the path of a file in the shared directory.
+        """
+        return os.path.join(self.directory, filename)
+
+
+class StateDiffer(Thread):
+    """
+    Daemon thread detecting container state changes not caused by the API (e.g. crashed containers).
+
+    The backend's containers are periodically compared to their last known state and
+    the differences are published as events. Only one process on the node diffs at a time
+    (the one holding the lock on the `differ.lock` file); the others stand by.
+
+    The known state follows the event log, so changes made through the API are not reported again:
+    before comparing, the differ waits until it has applied all events published until the backend
+    answered, and skips containers with events published while the backend was being queried.
+    """
+
+    """
+    Dictionary mapping event types to the container status they imply.
+    """
+    EVENT_STATUS = {
+        EVENT_STARTED: ContainerBackend.CONTAINER_STATUS_RUNNING,
+        EVENT_RESUMED: ContainerBackend.CONTAINER_STATUS_RUNNING,
+        EVENT_STOPPED: ContainerBackend.CONTAINER_STATUS_STOPPED,
+        EVENT_SUSPENDED: ContainerBackend.CONTAINER_STATUS_SUSPENDED
+    }
+
+    def __init__(self, backend, event_log, interval=10.0):
+        """
+        Initialize the differ.
+
+        :param backend: The container backend to poll.
+        :param event_log: The event log to publish the detected changes to.
+        :param interval: The number of seconds between two comparisons.
+        """
+        super(StateDiffer, self).__init__(name='state-differ')
+        self.daemon = True
+        self.backend = backend
+        self.event_log = event_log
+        self.interval = interval
+        self._applied = Condition()
+        self._applied_id = 0
+        self._event_ids = {}
+        self._states = None
+        self._stopped = Event()
+        event_log.add_listener(self.apply)
+
+    def apply(self, event):
+        """
+        Update the known state with an event, so changes made through the API are not reported twice.
+        """
+        with self._applied:
+            self._applied_id = max(self._applied_id, event['id'])
+            self._event_ids[event['container']] = event['id']
+            states = self._states
+            if states is not None:
+                if event['type'] == EVENT_DELETED:
+                    states.pop(event['container'], None)
+                elif event['type'] == EVENT_CREATED:
+                    states.setdefault(event['container'], None)
+                elif event['type'] in StateDiffer.EVENT_STATUS and event['container'] in states:
+                    states[event['container']] = StateDiffer.EVENT_STATUS[event['type']]
+            self._applied.notify_all()
+
+    def diff(self):
+        """
+        Compare the backend's containers to their known state and publish the differences.
+
+        The comparison is skipped if the events published meanwhile are not applied in time.
+        """
+        published_before = self.event_log.get_published_id()
+        states = dict(
+            (container.get(ContainerBackend.KEY_PK), container.get(ContainerBackend.CONTAINER_KEY_STATUS))
+            for container in self.backend.get_containers()
+        )
+        published_after = self.event_log.get_published_id()
+
+        with self._applied:
+            # the events are applied by the event log's thread once it has read them
+            deadline = time.time() + max(1.0, 4 * self.event_log.poll_interval)
+            while self._applied_id < published_after:
+                remaining = deadline - time.time()
+                if remaining <= 0 or self._stopped.is_set():
+                    return
+                self._applied.wait(remaining)
+
+            known = self._states
+            if known is not None:
+                # the backend's answer might predate or follow the changes published while it was queried
+                for container, event_id in self._event_ids.items():
+                    if event_id > published_before:
+                        if container in known:
+                            states[container] = known[container]
+                        else:
+                            states.pop(container, None)
+            self._states = states
+            self._event_ids = {}
+        if known is None:
+            return
+
+        for container, status in states.items():
+            if container not in known:
+                self.event_log.publish(EVENT_CREATED, container, source='backend')
+            elif known[container] is not None and status != known[container]:
+                event_type = self._get_event_type(known[container], status)
+                if event_type is not None:
+                    self.event_log.publish(event_type, container, source='backend')
+        for container in known:
+            if container not in states:
+                self.event_log.publish(EVENT_DELETED, container, source='backend')
+
+    def run(self):
+        """
+        Wait to become the node's differ and compare the states every `interval` seconds.
+        """
+        with open(os.path.join(self.event_log.directory, 'differ.lock'), 'a') as lock_file:
+            while not self._stopped.is_set():
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except IOError:
+                    self._stopped.wait(self.interval)
+            # the lock is held until the process exits, then another one takes over
+            while not self._stopped.wait(self.interval):
+                try:
+                    self.diff()
+                except Exception:
+                    pass
+
+    def stop(self):
+        """
+        Signal the thread to stop after the current iteration.
+        """
+        self._stopped.set()
+
+    def _get_event_type(self, old_status, new_status):
+        """
+        Return the type of the event for a container changing from `old_status` to `new_status`.
+        """
+        if new_status == ContainerBackend.CONTAINER_STATUS_RUNNING:
+            if old_status == ContainerBackend.CONTAINER_STATUS_SUSPENDED:
+                return EVENT_RESUMED
+            return EVENT_STARTED
+        if new_status == ContainerBackend.CONTAINER_STATUS_STOPPED:
+            return EVENT_STOPPED
+        if new_status == ContainerBackend.CONTAINER_STATUS_SUSPENDED:
+            return EVENT_SUSPENDED
+        return None
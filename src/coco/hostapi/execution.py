@@ -0,0 +1,65 @@
+from coco.hostapi import config
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Thread
+
+
+def map_concurrently(func, items, max_workers):
+    """
+    Return the list of `func(item)` for all items, calling `func` on up to `max_workers` threads.
+
+    The results are in the order of `items`.
+    """
+    if not items:
+        return []
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))))
+    try:
+        return list(executor.map(func, items))
+    finally:
+        executor.shutdown(wait=False)
+
+
+def offload(func, *args, **kwargs):
+    """
+    Call `func(*args, **kwargs)` on the gevent engine's pool of threads and return its result.
+
+    Only the calling coroutine waits for the call, the other ones keep being served.
+    Without pool (i.e. with the threads engine), `func` is simply called.
+    """
+    if config.executor is None:
+        return func(*args, **kwargs)
+    return config.executor.apply(func, args, kwargs)
+
+
+def run_in_thread(func, *args, **kwargs):
+    """
+    Call `func(*args, **kwargs)` on a new daemon thread and return a future for its result.
+
+    Unlike a pooled executor, a call that never returns (e.g. a hanging backend call)
+    only blocks its own thread and does not starve subsequent calls.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as ex:
+            future.set_exception(ex)
+
+    thread = Thread(target=run)
+    thread.daemon = True
+    thread.start()
+    return future
+
+
+def truncate_output(output, max_size):
+    """
+    Limit the command output to `max_size` characters.
+
+    Returns a tuple of the (possibly truncated) output and a Boolean indicating if it has been truncated.
+    Outputs that are not strings are returned unchanged.
+    """
+    if max_size > 0 and isinstance(output, basestring) and len(output) > max_size:
+        return output[:max_size], True
+    return output, False
@@ -0,0 +1,74 @@
+from coco.contract.backends import ContainerBackend
+from coco.hostapi.execution import run_in_thread
+from threading import Event, Lock, Thread
+import time
+
+
+class HealthProbe(Thread):
+    """
+    Daemon thread periodically probing the container backend's status for the /health route.
+
+    Requests only check the latest probe result, so they never wait for the backend. A result
+    older than `max_staleness` seconds (e.g. because the probes hang) counts as unhealthy.
+    """
+
+    def __init__(self, backend, max_staleness=10.0, timeout=2.0):
+        """
+        Initialize the probe for the given container backend.
+
+        :param backend: The container backend to probe.
+        :param max_staleness: The number of seconds after which a probe result is not trusted anymore.
+        :param timeout: The number of seconds after which a probe counts as failed.
+        """
+        super(HealthProbe, self).__init__(name='health-probe')
+        self.daemon = True
+        self.backend = backend
+        self.max_staleness = max_staleness
+        self.timeout = timeout
+        # probe often enough that a single slow probe does not make the result stale
+        self.interval = max(0.1, min(max_staleness / 2.0, max_staleness - timeout))
+        self._call = None
+        self._lock = Lock()
+        self._result = (None, None)
+        self._stopped = Event()
+
+    def is_healthy(self):
+        """
+        Check if the latest probe found the backend OK and is at most `max_staleness` seconds old.
+        """
+        with self._lock:
+            status, probed_at = self._result
+        if probed_at is None or time.time() - probed_at > self.max_staleness:
+            return False
+        return status == ContainerBackend.BACKEND_STATUS_OK
+
+    def probe(self):
+        """
+        Query the backend's status and store it as the latest result (`None` if the query failed).
+
+        A call that has not returned yet is waited for again instead of starting another one,
+        so a hanging backend does not accumulate threads.
+        """
+        if self._call is None or self._call.done():
+            self._call = run_in_thread(self.backend.get_status)
+        try:
+            status = self._call.result(self.timeout)
+        except Exception:
+            # including timeouts
+            status = None
+        with self._lock:
+            self._result = (status, time.time())
+
+    def run(self):
+        """
+        Probe the backend every `interval` seconds until `stop` is called.
+        """
+        while not self._stopped.is_set():
+            self.probe()
+            self._stopped.wait(self.interval)
+
+    def stop(self):
+        """
+        Signal the thread to stop after the current probe.
+        """
+        self._stopped.set()
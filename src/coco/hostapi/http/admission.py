@@ -0,0 +1,67 @@
+from coco.hostapi import config
+from coco.hostapi.admission import AdmissionRejectedError
+from coco.hostapi.http.responses import error_service_unavailable
+from functools import wraps
+
+
+def admitted(operation):
+    """
+    Decorator running the route only once the operation's gate admits it.
+
+    If the gate's wait queue is full or no slot becomes free in time,
+    a 503 - Service Unavailable response with `Retry-After` header is returned.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            gate = get_gate(operation)
+            if gate is None:
+                return func(*args, **kwargs)
+            try:
+                slot = gate.enter()
+            except AdmissionRejectedError:
+                return error_rejected()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                gate.leave(slot)
+        return wrapper
+    return decorator
+
+
+def enter_gate(operation, func):
+    """
+    Occupy a slot of the operation's gate and return `func` wrapped to free it once it returns.
+
+    Meant for operations running beyond the route (e.g. on another thread).
+
+    :raises AdmissionRejectedError: If the operation is not admitted.
+    """
+    gate = get_gate(operation)
+    if gate is None:
+        return func
+    slot = gate.enter()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            gate.leave(slot)
+    return wrapper
+
+
+def error_rejected():
+    """
+    Return the response for requests that have not been admitted.
+    """
+    return error_service_unavailable("Too many concurrent requests", retry_after=config.admission_retry_after)
+
+
+def get_gate(operation):
+    """
+    Return the gate limiting the operation or `None` if it is not limited.
+    """
+    if config.admission is None:
+        return None
+    return config.admission.get_gate(operation)
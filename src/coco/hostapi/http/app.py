@@ -0,0 +1,21 @@
+from coco.hostapi.http.compression import compress_response
+from coco.hostapi.http.instrumentation import instrument_app
+from coco.hostapi.http.routes.containers import blueprint as containers_blueprint
+from coco.hostapi.http.routes.core import blueprint as core_blueprint
+from coco.hostapi.http.routes.events import blueprint as events_blueprint
+from coco.hostapi.http.routes.jobs import blueprint as jobs_blueprint
+from flask import Flask
+
+
+def create_app():
+    """
+    Bootstrap the Flask application serving the host API routes.
+    """
+    app = Flask(__name__)
+    app.register_blueprint(containers_blueprint)
+    app.register_blueprint(core_blueprint)
+    app.register_blueprint(events_blueprint)
+    app.register_blueprint(jobs_blueprint)
+    app.after_request(compress_response)
+    instrument_app(app)
+    return app
@@ -0,0 +1,70 @@
+from coco.hostapi import config
+from coco.hostapi.http.responses import error_service_unavailable, success_accepted
+from coco.hostapi.jobs import JobQueueFullError
+from flask import copy_current_request_context, request, url_for
+from functools import wraps
+import json
+
+
+"""
+Value of the `Prefer` request header asking for the request to be processed asynchronously (RFC 7240).
+"""
+RESPOND_ASYNC = 'respond-async'
+
+
+def asynchronous(func):
+    """
+    Decorator allowing clients to run the decorated route as background job.
+
+    If the request carries a `Prefer: respond-async` header, the route is submitted to the
+    configured job manager and a 202 - Accepted response pointing to the job is returned.
+    Otherwise (or if no job manager is configured) the route is executed synchronously.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if config.job_manager is None or not prefers_async():
+            return func(*args, **kwargs)
+
+        # the input stream is gone once the response has been sent, so read (and cache) it now
+        request.get_data()
+
+        @copy_current_request_context
+        def run():
+            return get_outcome(func(*args, **kwargs))
+
+        try:
+            job = config.job_manager.submit(run)
+        except JobQueueFullError:
+            return error_service_unavailable("Too many pending jobs", retry_after=1)
+        response = success_accepted(job, url_for('jobs.get_job', job=job['id']))
+        response.headers['Preference-Applied'] = RESPOND_ASYNC
+        return response
+    return wrapper
+
+
+def get_outcome(response):
+    """
+    Translate the response of a route executed as job into the job's outcome.
+
+    :param response: The response object returned by the route.
+    """
+    outcome = {'code': response.status_code}
+    data = response.get_data()
+    body = json.loads(data) if data else None
+    if response.status_code >= 400:
+        outcome['error'] = body.get('error') if body else None
+    else:
+        outcome['result'] = body
+        if 'Location' in response.headers:
+            outcome['location'] = response.headers['Location']
+    return outcome
+
+
+def prefers_async():
+    """
+    Check if the current request's `Prefer` header contains the `respond-async` preference.
+    """
+    for preference in request.headers.get('Prefer', '').split(','):
+        if preference.split(';')[0].strip().lower() == RESPOND_ASYNC:
+            return True
+    return False
@@ -0,0 +1,189 @@
+from base64 import standard_b64decode
+from collections import OrderedDict
+from coco.hostapi import config
+from coco.hostapi.http.responses import JsonBody
+from functools import wraps
+from hashlib import sha1
+from threading import Lock
+import os
+import time
+
+
+class ResponseCache(object):
+    """
+    Thread-safe, size-bounded in-memory cache with per-entry expiry and LRU eviction.
+
+    Keys are tuples whose first element is the namespace the entry belongs to (usually the
+    name of the cached route), so all entries of a namespace can be invalidated at once.
+
+    If a directory is given, invalidations are also recorded there (as modification time of
+    a file per namespace), so they reach the caches of all other worker processes.
+    """
+
+    def __init__(self, max_entries=256, directory=None):
+        """
+        Initialize a new, empty cache holding at most `max_entries` entries.
+
+        :param max_entries: The maximum number of entries.
+        :param directory: The directory shared with the other worker processes (if any).
+        """
+        self.max_entries = max_entries
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = Lock()
+
+    def get_or_load(self, key, loader, ttl):
+        """
+        Return the cached value for `key`, calling `loader` to (re-)populate the entry if needed.
+
+        Exceptions raised by `loader` are propagated and never cached.
+
+        :param key: The tuple to cache the value under.
+        :param loader: A callable returning the value to cache.
+        :param ttl: The number of seconds the loaded value stays valid.
+        """
+        namespace = key[0]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires, loaded_at = entry
+                if expires > time.time() and not self._is_invalidated(namespace, loaded_at):
+                    # move the entry to the end to mark it as most recently used
+                    del self._entries[key]
+                    self._entries[key] = entry
+                    return value
+                del self._entries[key]
+            generation = self._generations.get(namespace, 0)
+
+        loaded_at = time.time()
+        value = loader()
+        if ttl > 0:
+            with self._lock:
+                # do not store values that have been loaded before an invalidation happened
+                if self._generations.get(namespace, 0) == generation:
+                    self._entries[key] = (value, loaded_at + ttl, loaded_at)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, *namespaces):
+        """
+        Remove all entries belonging to one of the given namespaces.
+        """
+        with self._lock:
+            for namespace in namespaces:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            for key in [key for key in self._entries if key[0] in namespaces]:
+                del self._entries[key]
+        if self.directory is not None:
+            for namespace in namespaces:
+                try:
+                    with open(self._get_path(namespace), 'a'):
+                        os.utime(self._get_path(namespace), None)
+                except (IOError, OSError):
+                    pass
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+        """
+        with self._lock:
+            for namespace in set(key[0] for key in self._entries):
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._entries.clear()
+
+    def _get_path(self, namespace):
+        """
+        Return the path of the file recording the namespace's last invalidation.
+        """
+        return os.path.join(self.directory, sha1(namespace).hexdigest())
+
+    def _is_invalidated(self, namespace, loaded_at):
+        """
+        Check if another process has invalidated the namespace since `loaded_at`.
+        """
+        if self.directory is None:
+            return False
+        try:
+            return os.path.getmtime(self._get_path(namespace)) >= loaded_at
+        except OSError:
+            return False
+
+
+def cached(namespace, loader, *args):
+    """
+    Return the result of `loader(*args)` wrapped in a `JsonBody`, served from the configured
+    response cache if possible.
+
+    Because the `JsonBody` instance itself is cached, its serialization and ETag are only
+    computed once per entry. The entry's TTL is looked up in `config.cache_ttls` by namespace.
+    If no cache is configured or the TTL is not positive, `loader` is called directly.
+    """
+    cache = config.response_cache
+    ttl = config.cache_ttls.get(namespace, 0)
+    if cache is None or ttl <= 0:
+        return JsonBody(loader(*args))
+    return cache.get_or_load((namespace,) + args, lambda: JsonBody(loader(*args)), ttl)
+
+
+def cached_entry(namespace, container, loader, *args):
+    """
+    Like `cached`, but for entries belonging to a single container.
+
+    Such entries live in a namespace of their own, so they can be invalidated individually
+    (see `invalidates_container`).
+
+    :param namespace: The name of the namespace (and key in `config.cache_ttls`).
+    :param container: The (decoded) ID of the container the entry belongs to.
+    """
+    cache = config.response_cache
+    ttl = config.cache_ttls.get(namespace, 0)
+    if cache is None or ttl <= 0:
+        return JsonBody(loader(*args))
+    return cache.get_or_load(('%s:%s' % (namespace, container),), lambda: JsonBody(loader(*args)), ttl)
+
+
+def invalidates(*namespaces):
+    """
+    Decorator invalidating the given response cache namespaces after the decorated route ran.
+
+    Invalidation happens regardless of the route's outcome, because a failed backend
+    operation might still have changed the backend's state.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if config.response_cache is not None:
+                    config.response_cache.invalidate(*namespaces)
+        return wrapper
+    return decorator
+
+
+def invalidates_container(*namespaces):
+    """
+    Decorator invalidating the entries cached with `cached_entry` for the route's container.
+
+    The decorated route must take the (base64 encoded) container ID as first or `container` argument.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if config.response_cache is not None:
+                    try:
+                        container = standard_b64decode(kwargs['container'] if 'container' in kwargs else args[0])
+                    except TypeError:
+                        # the route has already rejected the malformed ID
+                        container = None
+                    if container is not None:
+                        config.response_cache.invalidate(*[
+                            '%s:%s' % (namespace, container) for namespace in namespaces
+                        ])
+        return wrapper
+    return decorator
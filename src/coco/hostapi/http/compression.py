@@ -0,0 +1,73 @@
+from coco.hostapi import config
+from flask import request
+import zlib
+
+
+"""
+Dictionary mapping the supported content codings to the `wbits` argument selecting their zlib format.
+"""
+CONTENT_CODINGS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS
+}
+
+
+def compress_response(response):
+    """
+    Compress the response body with the best content coding the client accepts.
+
+    Streamed JSON bodies (large lists, see `JsonBody`) are compressed while being sent, without
+    `Content-Length`. Other streamed responses (e.g. events and logs, which must reach the client
+    right away), responses that are already encoded and bodies smaller than
+    `config.compression_min_size` bytes are returned unchanged. Meant to be registered
+    as `after_request` handler.
+    """
+    response.vary.add('Accept-Encoding')
+    if config.compression_level <= 0 or response.status_code != 200 \
+            or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+    if response.is_streamed:
+        if response.mimetype != 'application/json':
+            return response
+    elif (response.content_length or 0) < config.compression_min_size:
+        return response
+
+    coding = get_content_coding()
+    if coding is None:
+        return response
+
+    compressor = zlib.compressobj(config.compression_level, zlib.DEFLATED, CONTENT_CODINGS[coding])
+    if response.is_streamed:
+        response.response = compress_chunks(response.iter_encoded(), compressor)
+    else:
+        chunks = [compressor.compress(chunk) for chunk in response.iter_encoded()]
+        chunks.append(compressor.flush())
+        response.response = [chunk for chunk in chunks if chunk]
+        response.headers['Content-Length'] = str(sum(len(chunk) for chunk in response.response))
+    response.headers['Content-Encoding'] = coding
+    if response.headers.get('ETag'):
+        # a different representation needs a different strong ETag
+        etag, weak = response.get_etag()
+        response.set_etag('%s-%s' % (etag, coding), weak)
+    return response
+
+
+def compress_chunks(chunks, compressor):
+    """
+    Generator compressing the chunks with the zlib compressor while they are consumed.
+    """
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def get_content_coding():
+    """
+    Return the supported content coding the client prefers or `None` if it accepts none of them.
+    """
+    coding = request.accept_encodings.best_match(['gzip', 'deflate'])
+    if coding and request.accept_encodings[coding] > 0:
+        return coding
+    return None
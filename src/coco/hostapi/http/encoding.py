@@ -0,0 +1,74 @@
+import json
+
+
+"""
+Dictionary mapping the names of the supported JSON encoder modules to their `dumps` functions.
+
+The C-accelerated encoders are optional dependencies and only available if they are installed.
+"""
+ENCODERS = {
+    'json': json.dumps
+}
+
+try:
+    import simplejson
+    ENCODERS['simplejson'] = simplejson.dumps
+except ImportError:
+    pass
+
+try:
+    import ujson
+    ENCODERS['ujson'] = ujson.dumps
+except ImportError:
+    pass
+
+
+"""
+The `dumps` function of the JSON encoder in use.
+"""
+_dumps = json.dumps
+
+
+def dumps(value):
+    """
+    Serialize the value to a JSON string using the configured encoder.
+    """
+    return _dumps(value)
+
+
+def iterencode(value, chunk_items=1000):
+    """
+    Generator serializing the value to JSON in chunks.
+
+    Lists with more than `chunk_items` items are serialized `chunk_items` items at a time,
+    so no single string holding the whole serialization has to be built. Other values
+    are serialized at once.
+    """
+    if not isinstance(value, list) or len(value) <= chunk_items:
+        yield _dumps(value)
+        return
+
+    for offset in xrange(0, len(value), chunk_items):
+        chunk = ','.join(_dumps(item) for item in value[offset:offset + chunk_items])
+        if offset == 0:
+            yield '[' + chunk
+        else:
+            yield ',' + chunk
+    yield ']'
+
+
+def set_encoder(name):
+    """
+    Select the JSON encoder to use.
+
+    :param name: One of the names in `ENCODERS` or `auto` to use the fastest one available.
+    :raises ValueError: If the encoder is not available.
+    """
+    global _dumps
+    if name == 'auto':
+        for name in ('ujson', 'simplejson', 'json'):
+            if name in ENCODERS:
+                break
+    if name not in ENCODERS:
+        raise ValueError("JSON encoder %s is not available" % name)
+    _dumps = ENCODERS[name]
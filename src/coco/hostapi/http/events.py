@@ -0,0 +1,47 @@
+from base64 import standard_b64decode
+from coco.hostapi import config
+from functools import wraps
+import json
+
+
+def emits(event_type, from_body=None):
+    """
+    Decorator publishing a container lifecycle event once the decorated route succeeded.
+
+    The event's container is the route's (base64 encoded) first or `container` argument.
+    Routes creating something can take values from their response body instead.
+    The change is also applied to the process's inventory right away.
+
+    :param event_type: One of the `EVENT_*` constants of `coco.hostapi.events`.
+    :param from_body: `container` if the response body is the event's container (e.g. a created one),
+                      `data` if it is the event's additional data (e.g. a created snapshot).
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            response = func(*args, **kwargs)
+            if response.status_code >= 400 or (config.event_log is None and config.inventory is None):
+                return response
+
+            try:
+                container = None
+                data = None
+                if from_body is not None:
+                    body = response.get_data()
+                    body = json.loads(body) if body else None
+                    if from_body == 'container':
+                        container = body
+                    else:
+                        data = body
+                if container is None:
+                    container = standard_b64decode(kwargs['container'] if 'container' in kwargs else args[0])
+                if config.inventory is not None:
+                    config.inventory.update(event_type, container)
+                if config.event_log is not None:
+                    config.event_log.publish(event_type, container, data)
+            except:
+                # the operation succeeded, a lost event must not fail the request
+                pass
+            return response
+        return wrapper
+    return decorator
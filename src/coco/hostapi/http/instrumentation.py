@@ -0,0 +1,64 @@
+from coco.hostapi import config
+from flask import g, has_request_context, request
+from uuid import uuid4
+import time
+
+
+"""
+Name of the header carrying the ID used to correlate a request with its backend calls.
+"""
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+
+def instrument_app(app):
+    """
+    Register the request handlers recording the per-route request metrics on the app
+    and echoing the request ID (see `get_request_id`) in the response.
+
+    The recorded duration is the time until the response (headers) is ready; for
+    streamed responses, it does not include sending the stream.
+    """
+    @app.before_request
+    def start_timer():
+        g.request_start = time.time()
+        if config.metrics is not None:
+            config.metrics.add('hostapi_http_requests_in_flight', get_endpoint_labels(), 1)
+
+    @app.after_request
+    def record_request(response):
+        start = getattr(g, 'request_start', None)
+        if config.metrics is not None and start is not None:
+            labels = get_endpoint_labels() + (('method', request.method), ('code', response.status_code))
+            config.metrics.inc('hostapi_http_requests_total', labels)
+            config.metrics.observe('hostapi_http_request_duration_seconds', labels, time.time() - start)
+        response.headers[REQUEST_ID_HEADER] = get_request_id()
+        return response
+
+    @app.teardown_request
+    def stop_timer(exception=None):
+        if config.metrics is not None and getattr(g, 'request_start', None) is not None:
+            config.metrics.add('hostapi_http_requests_in_flight', get_endpoint_labels(), -1)
+
+
+def get_request_id():
+    """
+    Return the ID of the current request or `None` outside of requests.
+
+    The ID is taken from the request's `X-Request-ID` header or generated if it has none.
+    It is stored in the WSGI environment, so code running in a copy of the request context
+    (e.g. asynchronous jobs) sees the same ID.
+    """
+    if not has_request_context():
+        return None
+    request_id = request.environ.get('coco.hostapi.request_id')
+    if request_id is None:
+        request_id = request.headers.get(REQUEST_ID_HEADER) or uuid4().hex
+        request.environ['coco.hostapi.request_id'] = request_id
+    return request_id
+
+
+def get_endpoint_labels():
+    """
+    Return the metric labels identifying the route of the current request.
+    """
+    return (('endpoint', request.endpoint or 'unknown'),)
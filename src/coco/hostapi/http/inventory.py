@@ -0,0 +1,24 @@
+from coco.hostapi import config
+from flask import request
+
+
+def get_inventory():
+    """
+    Return the inventory if the current request may be answered from it, otherwise `None`.
+
+    That is not the case if the inventory is disabled, has not been reconciled within
+    --inventory-max-staleness seconds or the request asks for fresh data (`fresh=true`).
+    """
+    if config.inventory is None or request.args.get('fresh') == 'true':
+        return None
+    if not config.inventory.is_fresh():
+        return None
+    return config.inventory
+
+
+def set_inventory_age(response, inventory):
+    """
+    Tell the client how old the inventory the response is based on is (in the `Age` header, in seconds).
+    """
+    response.headers['Age'] = str(int(inventory.get_age()))
+    return response
@@ -0,0 +1,164 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from coco.contract.backends import ContainerBackend
+from coco.hostapi.http.responses import JsonBody, success_ok
+from flask import request, url_for
+import json
+
+
+class ListingQuery(object):
+    """
+    Pagination, filtering and field projection parameters of a listing request.
+
+    Query parameters other than `limit`, `cursor`, `fields` and `fresh` are attribute filters:
+    `status=running` only keeps items whose `status` is `running`, dotted names match
+    nested attributes (e.g. `labels.owner=alice`) and repeated filters match any value.
+    """
+
+    RESERVED_PARAMS = ('limit', 'cursor', 'fields', 'fresh')
+
+    def __init__(self, limit=None, cursor=None, fields=None, filters=None):
+        """
+        Initialize a new query.
+
+        :param limit: The maximum number of items per page.
+        :param cursor: The opaque cursor returned along the previous page.
+        :param fields: The list of attributes to include in the items.
+        :param filters: Dictionary mapping (dotted) attribute names to lists of accepted values.
+        """
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = fields
+        self.filters = filters or {}
+
+    @classmethod
+    def from_request(cls):
+        """
+        Create a query from the current request's query parameters.
+
+        :raises ValueError: If any parameter is invalid.
+        """
+        limit = request.args.get('limit')
+        if limit is not None:
+            limit = int(limit)
+            if limit <= 0:
+                raise ValueError("limit must be positive")
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            cursor = decode_cursor(cursor)
+        fields = request.args.get('fields')
+        if fields is not None:
+            fields = [field for field in fields.split(',') if field]
+        filters = dict(
+            (name, request.args.getlist(name))
+            for name in request.args if name not in ListingQuery.RESERVED_PARAMS
+        )
+        return cls(limit, cursor, fields, filters)
+
+    def apply(self, items):
+        """
+        Apply the query to the list of `items`.
+
+        Items are ordered by their primary key, so cursors stay valid between pages.
+        Returns a tuple of the resulting page, the cursor of the next page (or `None` if
+        it is the last one) and the number of items matching the filters.
+        """
+        if self.filters:
+            items = [item for item in items if self._matches(item)]
+        total = len(items)
+        items = sorted(items, key=get_sort_key)
+        if self.cursor is not None:
+            items = [item for item in items if get_sort_key(item) > self.cursor]
+        next_cursor = None
+        if self.limit is not None and len(items) > self.limit:
+            items = items[:self.limit]
+            next_cursor = encode_cursor(get_sort_key(items[-1]))
+        if self.fields is not None:
+            items = [self._project(item) for item in items]
+        return items, next_cursor, total
+
+    def is_empty(self):
+        """
+        Check if the query neither paginates, filters nor projects.
+        """
+        return self.limit is None and self.cursor is None and self.fields is None and not self.filters
+
+    def _matches(self, item):
+        """
+        Check if the item matches all filters.
+        """
+        for name, accepted in self.filters.items():
+            value = item
+            for part in name.split('.'):
+                value = value.get(part) if isinstance(value, dict) else None
+            if isinstance(value, bool):
+                value = str(value).lower()
+            if isinstance(value, list):
+                if not any(('%s' % element) in accepted for element in value):
+                    return False
+            elif value is None or ('%s' % value) not in accepted:
+                return False
+        return True
+
+    def _project(self, item):
+        """
+        Return a copy of the item only containing the requested fields.
+        """
+        if not isinstance(item, dict):
+            return item
+        return dict((field, item[field]) for field in self.fields if field in item)
+
+
+def decode_cursor(cursor):
+    """
+    Decode an opaque cursor into the sort key it encodes.
+
+    :raises ValueError: If the cursor is malformed.
+    """
+    try:
+        return json.loads(urlsafe_b64decode(str(cursor)))
+    except TypeError:
+        raise ValueError("Malformed cursor")
+
+
+def encode_cursor(sort_key):
+    """
+    Encode the sort key of the last item of a page into an opaque cursor.
+    """
+    return urlsafe_b64encode(json.dumps(sort_key))
+
+
+def get_sort_key(item):
+    """
+    Return the key listings are ordered by (the item's primary key).
+    """
+    if isinstance(item, dict):
+        return item.get(ContainerBackend.KEY_PK)
+    return item
+
+
+def success_listing(query, body):
+    """
+    Return a 200 - OK response object for the listing `body` after applying `query` to it.
+
+    If there is a next page, its cursor is set in the `X-Next-Cursor` header and its URL
+    in the `Link` header. The number of items matching the filters is set in `X-Total-Count`.
+    Unparameterized queries return the (possibly cached) body as is.
+
+    :param query: The `ListingQuery` to apply.
+    :param body: The list of items or a `JsonBody` wrapping it.
+    """
+    if query.is_empty():
+        return success_ok(body)
+
+    if isinstance(body, JsonBody):
+        body = body.value
+    items, next_cursor, total = query.apply(body)
+    response = success_ok(items)
+    response.headers['X-Total-Count'] = str(total)
+    if next_cursor is not None:
+        args = request.args.to_dict(flat=False)
+        args.update(request.view_args or {})
+        args['cursor'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = '<%s>; rel="next"' % url_for(request.endpoint, **args)
+    return response
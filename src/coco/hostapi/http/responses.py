@@ -1,12 +1,85 @@
-from flask import make_response
-import json
+from coco.hostapi import config
+from coco.hostapi.http.compression import CONTENT_CODINGS
+from coco.hostapi.http.encoding import dumps, iterencode
+from flask import Response, make_response, request
+from hashlib import sha1
+from werkzeug.http import quote_etag
+
+
+class JsonBody(object):
+    """
+    Response body whose ETag (and, for small values, JSON serialization) is computed once and then reused.
+
+    Cached values are wrapped in instances of this class, so serving them again (or answering
+    a conditional request for them) does not require serializing them again. Lists of more than
+    `config.json_chunk_items` items are streamed instead: they are serialized chunk by chunk while
+    being sent, so their serialization is never held in memory as a whole.
+    """
+
+    def __init__(self, value):
+        """
+        Initialize the body for the JSON-serializable `value`.
+        """
+        self.value = value
+        self._data = None
+        self._etag = None
+
+    @property
+    def data(self):
+        """
+        The JSON serialization of the value (only kept if the body is not streamed).
+        """
+        if self.streamed:
+            return ''.join(self.iter_chunks())
+        if self._data is None:
+            self._data = dumps(self.value)
+        return self._data
+
+    @property
+    def etag(self):
+        """
+        The (unquoted) strong ETag of the serialized value.
+
+        The serialization of streamed bodies is hashed chunk by chunk and dropped.
+        """
+        if self._etag is None:
+            digest = sha1()
+            for chunk in self.iter_chunks():
+                digest.update(chunk)
+            self._etag = digest.hexdigest()
+        return self._etag
+
+    @property
+    def streamed(self):
+        """
+        Whether the value is a list too large to be serialized at once.
+        """
+        return isinstance(self.value, list) and len(self.value) > config.json_chunk_items
+
+    def iter_chunks(self):
+        """
+        Return an iterator over the chunks of the JSON serialization of the value (see `encoding.iterencode`).
+        """
+        if self.streamed:
+            return iterencode(self.value, config.json_chunk_items)
+        return iter([self.data])
 
 
 def success_ok(body):
     """
     Return a 200 - OK response object.
+
+    The response carries a strong ETag computed from the serialized body. If the ETag matches
+    the If-None-Match header of a GET/HEAD request, a 304 - Not Modified response is returned instead.
     """
-    return json_response(body, 200)
+    if not isinstance(body, JsonBody):
+        body = JsonBody(body)
+    if request.method in ('GET', 'HEAD'):
+        # compressed representations carry the content coding as ETag suffix
+        etags = [body.etag] + ['%s-%s' % (body.etag, coding) for coding in CONTENT_CODINGS]
+        if any(etag in request.if_none_match for etag in etags):
+            return redirect_not_modified(body.etag)
+    return json_response(body, 200, {'ETag': quote_etag(body.etag)})
 
 
 def success_created(body, location=None):
@@ -19,6 +92,16 @@ def success_created(body, location=None):
     return json_response(body, 201, headers)
 
 
+def success_accepted(body, location=None):
+    """
+    Return a 202 - Accepted response object.
+    """
+    headers = {}
+    if location:
+        headers['Location'] = location
+    return json_response(body, 202, headers)
+
+
 def success_no_content():
     """
     Return a 204 - No Content response object.
@@ -26,6 +109,16 @@ def success_no_content():
     return make_response(('', 204, None))
 
 
+def redirect_not_modified(etag=None):
+    """
+    Return a 304 - Not Modified response object.
+    """
+    headers = {}
+    if etag:
+        headers['ETag'] = quote_etag(etag)
+    return make_response(('', 304, headers))
+
+
 def error_bad_request(body=None):
     """
     Return a 400 - Bad request response object.
@@ -50,6 +143,19 @@ def error_precondition_failed(body=None):
     return json_response(body, 412)
 
 
+def error_range_not_satisfiable(body=None, content_range=None):
+    """
+    Return a 416 - Requested Range Not Satisfiable response object.
+
+    :param content_range: The value of the `Content-Range` header (e.g. `bytes */<length>`).
+    """
+    headers = {}
+    if content_range is not None:
+        headers['Content-Range'] = content_range
+    body = {'error': body}
+    return json_response(body, 416, headers)
+
+
 def error_unprocessable_entity(body=None):
     """
     Return a 422 - Unprocessable Entity response object.
@@ -82,9 +188,35 @@ def error_not_implemented(body=None):
     return json_response(body, 501)
 
 
+def error_gateway_timeout(body=None):
+    """
+    Return a 504 - Gateway Timeout response object.
+    """
+    body = {'error': body}
+    return json_response(body, 504)
+
+
+def error_service_unavailable(body=None, retry_after=None):
+    """
+    Return a 503 - Service Unavailable response object.
+    """
+    headers = {}
+    if retry_after is not None:
+        headers['Retry-After'] = str(retry_after)
+    body = {'error': body}
+    return json_response(body, 503, headers)
+
+
 def json_response(body, code, headers=None):
     """
-    TODO: write doc.
+    Return a response object with the JSON-serialized body.
+
+    Streamed `JsonBody` instances are serialized while being written out (without `Content-Length`,
+    so using chunked transfer encoding), so large lists are never concatenated into a single string.
+
+    :param body: The value to serialize or a `JsonBody` instance.
+    :param code: The HTTP status code.
+    :param headers: Additional headers to set.
     """
     response_headers = {
         'Content-Type': 'application/json'
@@ -92,4 +224,10 @@ def json_response(body, code, headers=None):
     if headers:
         response_headers.update(headers)
 
-    return make_response((json.dumps(body), code, response_headers))
+    if isinstance(body, JsonBody):
+        if body.streamed:
+            return Response(body.iter_chunks(), code, response_headers)
+        body = body.data
+    else:
+        body = dumps(body)
+    return make_response((body, code, response_headers))
@@ -1,9 +1,28 @@
-from base64 import standard_b64decode
+from base64 import standard_b64decode, standard_b64encode
 from coco.contract.backends import *
 from coco.contract.errors import *
 from coco.hostapi import config
+from coco.hostapi.admission import AdmissionRejectedError
+from coco.hostapi.events import EVENT_CREATED, EVENT_DELETED, EVENT_RESUMED, EVENT_SNAPSHOT_CREATED, \
+    EVENT_SNAPSHOT_RESTORED, EVENT_STARTED, EVENT_STOPPED, EVENT_SUSPENDED
+from coco.hostapi.execution import map_concurrently, run_in_thread, truncate_output
+from coco.hostapi.http.admission import admitted, enter_gate, error_rejected
+from coco.hostapi.http.asynchronous import asynchronous
+from coco.hostapi.http.cache import cached, cached_entry, invalidates, invalidates_container
+from coco.hostapi.http.events import emits
+from coco.hostapi.http.inventory import get_inventory, set_inventory_age
+from coco.hostapi.http.listings import ListingQuery, success_listing
 from coco.hostapi.http.responses import *
-from flask import Blueprint, request, url_for
+from coco.hostapi.http.streams import MIMETYPE_NDJSON, get_stream_mimetype, success_stream
+from coco.hostapi.http.transfers import receive_archive, success_archive
+from coco.hostapi.logs import filter_logs, follow_logs, parse_timestamp
+from coco.hostapi.stats import get_empty_stats
+from concurrent.futures import TimeoutError
+from flask import Blueprint, copy_current_request_context, request, url_for
+from functools import partial
+from itertools import chain
+import json
+import time
 
 
 """
@@ -13,6 +32,7 @@ blueprint = Blueprint('containers', __name__, url_prefix='/containers')
 
 
 @blueprint.route('/images/<image>', methods=['DELETE'])
+@invalidates('images')
 def delete_container_image(image):
     """
     Delete the referenced image from the backend.
@@ -30,6 +50,32 @@ def delete_container_image(image):
         return error_unexpected_error()
 
 
+@blueprint.route('/images/<image>/export', methods=['GET'])
+def export_container_image(image):
+    """
+    Download the image as tar archive.
+
+    Archives the backend exports as file support `Range` requests, so interrupted downloads can be resumed.
+
+    Note: Requires a backend with an `export_container_image(image)` method returning the archive
+    as path, file-like object or iterable of chunks.
+    """
+    if not hasattr(config.container_backend, 'export_container_image'):
+        return error_not_implemented("Backend does not support image exports")
+
+    try:
+        archive = config.container_backend.export_container_image(standard_b64decode(image))
+        return success_archive(archive, '%s.tar' % image)
+    except ContainerImageNotFoundError:
+        return error_not_found("Container image not found")
+    except ContainerBackendError:
+        return error_unexpected_error("Unexpected backend error")
+    except NotImplementedError:
+        return error_not_implemented()
+    except:
+        return error_unexpected_error()
+
+
 @blueprint.route('/images/<image>', methods=['GET'])
 def get_container_image(image):
     """
@@ -52,10 +98,17 @@ def get_container_image(image):
 def get_container_images():
     """
     Get a list of images the container backend can bootstrap containers from.
+
+    Supports pagination (`limit`, `cursor`), attribute filters and field projection (`fields`).
     """
     try:
-        images = config.container_backend.get_container_images()
-        return success_ok(images)
+        query = ListingQuery.from_request()
+    except:
+        return error_bad_request()
+
+    try:
+        images = cached('images', config.container_backend.get_container_images)
+        return success_listing(query, images)
     except ContainerBackendError:
         return error_unexpected_error("Unexpected backend error")
     except NotImplementedError:
@@ -65,6 +118,9 @@ def get_container_images():
 
 
 @blueprint.route('/images', methods=['POST'])
+@asynchronous
+@admitted('create_container_image')
+@invalidates('images')
 def create_container_image():
     """
     Create a container image as per the specification included in the POST body.
@@ -84,7 +140,47 @@ def create_container_image():
         return error_bad_request()
 
 
+@blueprint.route('/images/import', methods=['POST'])
+@invalidates('images')
+def import_container_image():
+    """
+    Create an image from the tar archive in the request body.
+
+    :request_param upload: The client-chosen ID of a resumable upload (see `receive_archive`).
+
+    The remaining query parameters are passed to the backend. The archive is streamed to the backend;
+    archives sent in parts (with `Content-Range` headers) are collected on disk until complete.
+
+    Note: Requires a backend with an `import_container_image(archive, **params)` method
+    reading the archive from a file-like object and returning the ID of the created image.
+    """
+    if not hasattr(config.container_backend, 'import_container_image'):
+        return error_not_implemented("Backend does not support image imports")
+
+    try:
+        archive, response = receive_archive(config.uploads_directory)
+        if response is not None:
+            return response
+        params = dict((key, value) for key, value in request.args.items() if key != 'upload')
+    except:
+        return error_bad_request()
+
+    try:
+        image = config.container_backend.import_container_image(archive, **params)
+        return success_created(image, url_for('.get_container_image', image=image))
+    except ContainerBackendError:
+        return error_unexpected_error("Unexpected backend error")
+    except NotImplementedError:
+        return error_not_implemented()
+    except:
+        return error_unexpected_error()
+    finally:
+        if archive is not request.stream:
+            archive.close()
+
+
 @blueprint.route('/snapshots/<snapshot>', methods=['DELETE'])
+@invalidates('images', 'snapshots', 'containers_snapshots')
 def delete_container_snapshots(snapshot):
     """
     Delete the referenced container snapshot from the container backend.
@@ -109,6 +205,34 @@ def delete_container_snapshots(snapshot):
         return error_unexpected_error()
 
 
+@blueprint.route('/snapshots/<snapshot>/export', methods=['GET'])
+def export_container_snapshot(snapshot):
+    """
+    Download the snapshot as tar archive.
+
+    Archives the backend exports as file support `Range` requests, so interrupted downloads can be resumed.
+
+    Note: Requires a backend with an `export_container_snapshot(snapshot)` method returning the archive
+    as path, file-like object or iterable of chunks.
+    """
+    if not isinstance(config.container_backend, SnapshotableContainerBackend):
+        return error_precondition_required("Snapshotable backend required")
+    if not hasattr(config.container_backend, 'export_container_snapshot'):
+        return error_not_implemented("Backend does not support snapshot exports")
+
+    try:
+        archive = config.container_backend.export_container_snapshot(standard_b64decode(snapshot))
+        return success_archive(archive, '%s.tar' % snapshot)
+    except ContainerSnapshotNotFoundError:
+        return error_not_found("Container snapshot not found")
+    except ContainerBackendError:
+        return error_unexpected_error("Unexpected backend error")
+    except NotImplementedError:
+        return error_not_implemented()
+    except:
+        return error_unexpected_error()
+
+
 @blueprint.route('/snapshots/<snapshot>', methods=['GET'])
 def get_container_snapshot(snapshot):
     """
@@ -136,13 +260,20 @@ def get_container_snapshot(snapshot):
 def get_container_snapshots():
     """
     Get a list of all containers' snapshots.
+
+    Supports pagination (`limit`, `cursor`), attribute filters and field projection (`fields`).
     """
     if not isinstance(config.container_backend, SnapshotableContainerBackend):
         return error_precondition_required("Snapshotable backend required")
 
     try:
-        snapshots = config.container_backend.get_container_snapshots()
-        return success_ok(snapshots)
+        query = ListingQuery.from_request()
+    except:
+        return error_bad_request()
+
+    try:
+        snapshots = cached('snapshots', config.container_backend.get_container_snapshots)
+        return success_listing(query, snapshots)
     except ContainerNotFoundError:
         return error_not_found("Container not found")
     except ContainerSnapshotNotFoundError:
@@ -155,6 +286,49 @@ def get_container_snapshots():
         return error_unexpected_error()
 
 
+@blueprint.route('/snapshots/import', methods=['POST'])
+@invalidates('images', 'snapshots', 'containers_snapshots')
+def import_container_snapshot():
+    """
+    Create a snapshot from the tar archive in the request body.
+
+    :request_param upload: The client-chosen ID of a resumable upload (see `receive_archive`).
+
+    The remaining query parameters are passed to the backend. The archive is streamed to the backend;
+    archives sent in parts (with `Content-Range` headers) are collected on disk until complete.
+
+    Note: Requires a backend with an `import_container_snapshot(archive, **params)` method
+    reading the archive from a file-like object and returning the ID of the created snapshot.
+    """
+    if not isinstance(config.container_backend, SnapshotableContainerBackend):
+        return error_precondition_required("Snapshotable backend required")
+    if not hasattr(config.container_backend, 'import_container_snapshot'):
+        return error_not_implemented("Backend does not support snapshot imports")
+
+    try:
+        archive, response = receive_archive(config.uploads_directory)
+        if response is not None:
+            return response
+        params = dict((key, value) for key, value in request.args.items() if key != 'upload')
+    except:
+        return error_bad_request()
+
+    try:
+        snapshot = config.container_backend.import_container_snapshot(archive, **params)
+        return success_created(snapshot, url_for('.get_container_snapshot', snapshot=snapshot))
+    except ContainerNotFoundError:
+        return error_not_found("Container not found")
+    except ContainerBackendError:
+        return error_unexpected_error("Unexpected backend error")
+    except NotImplementedError:
+        return error_not_implemented()
+    except:
+        return error_unexpected_error()
+    finally:
+        if archive is not request.stream:
+            archive.close()
+
+
 @blueprint.route('/<container>/exec', methods=['POST'])
 def exec_in_container(container):
     """
@@ -162,16 +336,39 @@ def exec_in_container(container):
 
     :param container: The container in which the command should be executed.
     :request_param command: The command to execute.
+    :request_param timeout: Seconds after which to stop waiting for the command (capped by --exec-timeout).
+    :request_param stream: If `true`, stream the output as NDJSON frames (also if the client accepts
+                           `application/x-ndjson`). A final frame carries the exit code.
+
+    Outputs longer than --exec-max-output characters are truncated, which is indicated
+    by the `X-Output-Truncated` header (respectively the final frame's `truncated` field).
     """
     try:
-        command = request.get_json(force=True).get('command')
+        json = request.get_json(force=True)
+        command = json.get('command')
+        timeout = min(float(json.get('timeout', config.exec_timeout)), config.exec_timeout)
+        stream = str(json.get('stream', request.args.get('stream', 'false'))).lower() == 'true'
+        mimetype = get_stream_mimetype(MIMETYPE_NDJSON if stream else None)
         if command:
             try:
-                output = config.container_backend.exec_in_container(
-                    standard_b64decode(container),
-                    command
+                # keep the request context, so the backend call can be correlated with the request
+                run = enter_gate(
+                    'exec_in_container',
+                    copy_current_request_context(config.container_backend.exec_in_container)
                 )
-                return success_ok(output)
+            except AdmissionRejectedError:
+                return error_rejected()
+            future = run_in_thread(run, standard_b64decode(container), command)
+            if mimetype is not None:
+                return success_stream(stream_exec_output(future, timeout), mimetype)
+            try:
+                output, truncated = truncate_output(future.result(timeout), config.exec_max_output)
+                response = success_ok(output)
+                if truncated:
+                    response.headers['X-Output-Truncated'] = 'true'
+                return response
+            except TimeoutError:
+                return error_gateway_timeout("Command timed out")
             except ContainerNotFoundError:
                 return error_not_found("Container not found")
             except IllegalContainerStateError:
@@ -188,14 +385,89 @@ def exec_in_container(container):
         return error_bad_request()
 
 
+def stream_exec_output(future, timeout):
+    """
+    Generator yielding the NDJSON frames of a streamed exec_in_container request.
+
+    Keep-alive frames are sent while the command is running. Once it has finished, its output
+    is sent in `stdout` frames of --exec-chunk-size characters, followed by a final frame
+    carrying the exit code (or the error that occurred).
+
+    Note: The container backend does neither report exit codes nor separate stdout from stderr,
+    so the exit code is `null` and all output is sent as `stdout`.
+
+    :param future: The future of the backend call executing the command.
+    :param timeout: The number of seconds after which to stop waiting for the command.
+    """
+    deadline = time.time() + timeout
+    result = {'exit_code': None, 'truncated': False, 'timed_out': False}
+    while True:
+        try:
+            output = future.result(max(0, min(config.exec_heartbeat_interval, deadline - time.time())))
+            output, result['truncated'] = truncate_output(output, config.exec_max_output)
+            if isinstance(output, basestring):
+                for offset in xrange(0, len(output), config.exec_chunk_size):
+                    yield {'stream': 'stdout', 'data': output[offset:offset + config.exec_chunk_size]}
+            elif output is not None:
+                yield {'stream': 'stdout', 'data': output}
+            break
+        except TimeoutError:
+            if time.time() >= deadline:
+                result['timed_out'] = True
+                break
+            yield None
+        except ContainerNotFoundError:
+            result.update(code=404, error="Container not found")
+            break
+        except IllegalContainerStateError:
+            result.update(code=412, error="Container in illegal state for requested action")
+            break
+        except ContainerBackendError:
+            result.update(code=500, error="Unexpected backend error")
+            break
+        except NotImplementedError:
+            result.update(code=501, error=None)
+            break
+        except:
+            result.update(code=500, error=None)
+            break
+    yield result
+
+
 @blueprint.route('/<container>/logs', methods=['GET'])
 def get_container_logs(container):
     """
     Get a list of log messages the container has produced.
+
+    :request_param tail: Only return the given number of most recent messages.
+    :request_param since: Only return messages logged after the given UNIX/ISO 8601 timestamp.
+    :request_param follow: If `true`, keep the response open and stream new messages as they arrive.
+
+    If `follow` is set or the client accepts `application/x-ndjson` or `text/event-stream`,
+    the messages are streamed one by one instead of returned as JSON list.
     """
     try:
-        logs = config.container_backend.get_container_logs(standard_b64decode(container))
-        return success_ok(logs)
+        tail = request.args.get('tail')
+        tail = int(tail) if tail is not None else None
+        since = request.args.get('since')
+        since = parse_timestamp(since) if since is not None else None
+        follow = request.args.get('follow', 'false').lower() == 'true'
+    except:
+        return error_bad_request()
+
+    try:
+        container = standard_b64decode(container)
+        logs = config.container_backend.get_container_logs(container)
+        filtered_logs = filter_logs(logs, tail, since)
+        mimetype = get_stream_mimetype(MIMETYPE_NDJSON if follow else None)
+        if mimetype is None:
+            return success_ok(filtered_logs)
+        if follow:
+            return success_stream(
+                chain(filtered_logs, follow_logs(config.container_backend, container, len(logs), config.log_follow_interval)),
+                mimetype
+            )
+        return success_stream(filtered_logs, mimetype)
     except ContainerNotFoundError:
         return error_not_found("Container not found")
     except IllegalContainerStateError:
@@ -213,15 +485,12 @@ def get_public_key(container):
     """
     Get the public RSA key of the container.
 
+    Keys are cached until the container is restarted, restored or deleted.
+
     TODO: hmmmm....
     """
     try:
-        public_key = config.container_backend.exec_in_container(
-            standard_b64decode(container),
-            # TODO: magic string; depends on EncryptionService...
-            "cat /etc/ssh/ssh_host_rsa_key.pub"
-        )
-        return success_ok(public_key)
+        return success_ok(read_public_key(standard_b64decode(container)))
     except ContainerNotFoundError:
         return error_not_found("Container not found")
     except IllegalContainerStateError:
@@ -234,7 +503,25 @@ def get_public_key(container):
         return error_unexpected_error()
 
 
+def read_public_key(container):
+    """
+    Return the (cached) public RSA key of the (decoded) container as `JsonBody`.
+
+    Unlike the route, this does not need a request context, so it can be called from other threads.
+    """
+    return cached_entry(
+        'public_key',
+        container,
+        config.container_backend.exec_in_container,
+        container,
+        # TODO: magic string; depends on EncryptionService...
+        "cat /etc/ssh/ssh_host_rsa_key.pub"
+    )
+
+
 @blueprint.route('/<container>/restart', methods=['POST'])
+@invalidates_container('public_key')
+@emits(EVENT_STARTED)
 def restart_container(container):
     """
     Restart the container.
@@ -255,6 +542,7 @@ def restart_container(container):
 
 
 @blueprint.route('/<container>/resume', methods=['POST'])
+@emits(EVENT_RESUMED)
 def resume_container(container):
     """
     Resume a suspended container.
@@ -280,6 +568,10 @@ def resume_container(container):
 
 
 @blueprint.route('/<container>/snapshots/<snapshot>/restore', methods=['POST'])
+@asynchronous
+@invalidates('images', 'snapshots', 'containers_snapshots')
+@invalidates_container('public_key')
+@emits(EVENT_SNAPSHOT_RESTORED, from_body='data')
 def restore_container_snapshots(container, snapshot):
     """
     Restore the referenced container snapshot.
@@ -318,7 +610,11 @@ def get_containers_snapshots(container):
         return error_precondition_required("Snapshotable backend required")
 
     try:
-        snapshots = config.container_backend.get_containers_snapshots(standard_b64decode(container))
+        snapshots = cached(
+            'containers_snapshots',
+            config.container_backend.get_containers_snapshots,
+            standard_b64decode(container)
+        )
         return success_ok(snapshots)
     except ContainerNotFoundError:
         return error_not_found("Container not found")
@@ -333,6 +629,9 @@ def get_containers_snapshots(container):
 
 
 @blueprint.route('/<container>/snapshots', methods=['POST'])
+@asynchronous
+@invalidates('images', 'snapshots', 'containers_snapshots')
+@emits(EVENT_SNAPSHOT_CREATED, from_body='data')
 def create_container_snapshot(container):
     """
     Create a new container snapshot for the container as per the specification in the request body.
@@ -363,6 +662,7 @@ def create_container_snapshot(container):
 
 
 @blueprint.route('/<container>/start', methods=['POST'])
+@emits(EVENT_STARTED)
 def start_container(container):
     """
     Start the container.
@@ -387,7 +687,40 @@ def start_container(container):
         return error_bad_request()
 
 
+@blueprint.route('/<container>/stats', methods=['GET'])
+def get_container_stats(container):
+    """
+    Get the container's resource usage: the latest sample and the averages over the last 1m, 15m and 1h.
+
+    The stats are collected in the background every --stats-interval seconds for running containers,
+    so the backend is only queried for containers without samples (e.g. stopped or just created ones),
+    whose `latest` sample is `null` and history is empty. CPU usage is in cores, memory in bytes and
+    I/O in bytes per second.
+    """
+    if config.stats_collector is None:
+        return error_not_implemented("Container stats are disabled")
+
+    try:
+        container = standard_b64decode(container)
+        stats = config.stats_collector.get_stats(container)
+        if stats is None:
+            inventory = get_inventory()
+            if inventory is None or inventory.get_container(container) is None:
+                config.container_backend.get_container(container)
+            stats = get_empty_stats(container)
+        return success_ok(stats)
+    except ContainerNotFoundError:
+        return error_not_found("Container not found")
+    except ContainerBackendError:
+        return error_unexpected_error("Unexpected backend error")
+    except NotImplementedError:
+        return error_not_implemented()
+    except:
+        return error_unexpected_error()
+
+
 @blueprint.route('/<container>/stop', methods=['POST'])
+@emits(EVENT_STOPPED)
 def stop_container(container):
     """
     Stop the running container.
@@ -410,6 +743,7 @@ def stop_container(container):
 
 
 @blueprint.route('/<container>/suspend', methods=['POST'])
+@emits(EVENT_SUSPENDED)
 def suspend_container(container):
     """
     Suspend the container.
@@ -438,10 +772,18 @@ def suspend_container(container):
 def get_container(container):
     """
     Get information about the requested container.
+
+    The container is taken from the inventory (see --inventory-interval) if it is fresh enough,
+    the response's `Age` header tells its age then. `fresh=true` always asks the backend.
     """
     try:
-        container = config.container_backend.get_container(standard_b64decode(container))
-        return success_ok(container)
+        container = standard_b64decode(container)
+        inventory = get_inventory()
+        if inventory is not None:
+            indexed = inventory.get_container(container)
+            if indexed is not None:
+                return set_inventory_age(success_ok(indexed), inventory)
+        return success_ok(config.container_backend.get_container(container))
     except ContainerNotFoundError:
         return error_not_found("Container not found")
     except ContainerBackendError:
@@ -453,6 +795,9 @@ def get_container(container):
 
 
 @blueprint.route('/<container>', methods=['DELETE'])
+@invalidates('snapshots', 'containers_snapshots')
+@invalidates_container('public_key')
+@emits(EVENT_DELETED)
 def delete_container(container):
     """
     Delete the referenced container from the backend.
@@ -476,10 +821,25 @@ def delete_container(container):
 def get_containers():
     """
     Get a list of all containers the backend knows.
+
+    Supports pagination (`limit`, `cursor`), attribute filters (e.g. `status=running`)
+    and field projection (`fields`).
+
+    Like `get_container`, the listing is answered from the inventory if it is fresh enough,
+    filters on indexed attributes (status, image and owner label) are looked up in its indexes.
     """
     try:
+        query = ListingQuery.from_request()
+    except:
+        return error_bad_request()
+
+    try:
+        inventory = get_inventory()
+        containers = inventory.get_containers(query.filters) if inventory is not None else None
+        if containers is not None:
+            return set_inventory_age(success_listing(query, containers), inventory)
         containers = config.container_backend.get_containers()
-        return success_ok(containers)
+        return success_listing(query, containers)
     except ContainerBackendError:
         return error_unexpected_error("Unexpected backend error")
     except NotImplementedError:
@@ -489,17 +849,27 @@ def get_containers():
 
 
 @blueprint.route('', methods=['POST'])
+@asynchronous
+@admitted('create_container')
+@emits(EVENT_CREATED, from_body='container')
 def create_container():
     """
     Create a container as per the specification included in the POST body.
 
     Note: There is no guarantee the created container is started/stopped after the
     operation has completed.
+
+    If the specification matches a warm pool (see --warm-pools), a pre-created container is
+    taken from it instead; the backend is only asked to create one if the pool is empty.
     """
     try:
         json = request.get_json(force=True).copy()
         try:
-            container = config.container_backend.create_container(**json)
+            container = None
+            if config.warm_pool_manager is not None:
+                container = config.warm_pool_manager.claim(json)
+            if container is None:
+                container = config.container_backend.create_container(**json)
             return success_created(container, url_for('.get_container', container=container))
         except ContainerBackendError:
             return error_unexpected_error("Unexpected backend error")
@@ -509,3 +879,121 @@ def create_container():
             return error_unexpected_error()
     except:
         return error_bad_request()
+
+
+@blueprint.route('/batch', methods=['POST'])
+def run_batch():
+    """
+    Run lifecycle actions on many containers concurrently.
+
+    The request body is a list of `{"container": <container>, "action": <action>}` objects,
+    where `action` is one of `start`, `stop`, `restart`, `suspend`, `resume` or `delete`.
+    The response lists the status code (and error, if any) for every item, in request order,
+    as the corresponding single-container route would have returned it.
+    """
+    try:
+        items = request.get_json(force=True)
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise ValueError
+    except:
+        return error_bad_request()
+
+    def run(item):
+        result = {
+            'container': item.get('container'),
+            'action': item.get('action')
+        }
+        view = BATCH_ACTIONS.get(result['action'])
+        if view is None:
+            result['code'] = 422
+            result['error'] = "Unknown action"
+        elif not result['container']:
+            result['code'] = 422
+            result['error'] = "Container missing"
+        else:
+            response = view(result['container'])
+            result['code'] = response.status_code
+            if response.status_code >= 400:
+                data = response.get_data()
+                result['error'] = json.loads(data).get('error') if data else None
+        return result
+
+    try:
+        # every item gets a copy of the request context of its own, a copy cannot be pushed by several threads at once
+        tasks = [partial(copy_current_request_context(run), item) for item in items]
+        return success_ok(map_concurrently(lambda task: task(), tasks, config.batch_concurrency))
+    except:
+        return error_unexpected_error()
+
+
+@blueprint.route('/public_keys', methods=['GET'])
+def get_public_keys():
+    """
+    Get the public RSA keys of many containers at once.
+
+    :request_param container: The container to get the key of; can be repeated (default: all containers).
+
+    Keys that are not cached yet are read concurrently. The response lists, for every container,
+    either its `public_key` or the `code` and `error` the single-container route would have returned.
+    """
+    try:
+        containers = request.args.getlist('container')
+        if not containers:
+            containers = [
+                standard_b64encode(container.get(ContainerBackend.KEY_PK))
+                for container in config.container_backend.get_containers()
+            ]
+    except ContainerBackendError:
+        return error_unexpected_error("Unexpected backend error")
+    except NotImplementedError:
+        return error_not_implemented()
+    except:
+        return error_unexpected_error()
+
+    def run(container):
+        result = {'container': container}
+        try:
+            result['public_key'] = read_public_key(standard_b64decode(container)).value
+        except ContainerNotFoundError:
+            result.update({'code': 404, 'error': "Container not found"})
+        except IllegalContainerStateError:
+            result.update({'code': 412, 'error': "Container in illegal state for requested action"})
+        except ContainerBackendError:
+            result.update({'code': 500, 'error': "Unexpected backend error"})
+        except NotImplementedError:
+            result.update({'code': 501, 'error': None})
+        except:
+            result.update({'code': 500, 'error': None})
+        return result
+
+    try:
+        return success_ok(map_concurrently(run, containers, config.batch_concurrency))
+    except:
+        return error_unexpected_error()
+
+
+@blueprint.route('/stats', methods=['GET'])
+def get_containers_stats():
+    """
+    Get the resource usage of all running containers (see `get_container_stats`).
+    """
+    if config.stats_collector is None:
+        return error_not_implemented("Container stats are disabled")
+
+    try:
+        return success_ok(config.stats_collector.get_stats())
+    except:
+        return error_unexpected_error()
+
+
+"""
+Dictionary mapping the actions supported by the batch route to the routes implementing them.
+"""
+BATCH_ACTIONS = {
+    'delete': delete_container,
+    'restart': restart_container,
+    'resume': resume_container,
+    'start': start_container,
+    'stop': stop_container,
+    'suspend': suspend_container
+}
@@ -1,8 +1,10 @@
 from coco.contract.backends import ContainerBackend
 from coco.hostapi import config
 from coco.hostapi.http.responses import *
-from flask import Blueprint
-import psutil
+from coco.hostapi.metrics import render
+from coco.hostapi.sampler import sample_resources
+from coco.hostapi.warmup import WarmUp
+from flask import Blueprint, make_response
 
 
 """
@@ -18,10 +20,16 @@ def get_health():
 
     Everything other than a 2xx response (could) indicate a problem
     and further actions should be performed to find the reason and/or fix it.
+
+    The container backend's status is checked by a background probe, whose latest result
+    is at most --health-max-staleness seconds old; the request itself does not touch the backend.
     """
     try:
-        status = get_status()
-        if status.get('backends').get('container').get('status') is ContainerBackend.BACKEND_STATUS_OK:
+        if config.health_probe is not None:
+            healthy = config.health_probe.is_healthy()
+        else:
+            healthy = config.container_backend.get_status() == ContainerBackend.BACKEND_STATUS_OK
+        if healthy:
             return success_no_content()
         else:
             return error_unexpected_error("Container backend not OK")
@@ -29,6 +37,44 @@ def get_health():
         return error_unexpected_error()
 
 
+@blueprint.route('/ready', methods=['GET'])
+def get_ready():
+    """
+    Endpoint to be queried (e.g. by load balancers) to check if the node is ready to take traffic.
+
+    Unlike /health, this only reports whether the worker process has finished warming up
+    (its first status sample has been taken and its caches have been filled). A 503 response
+    lists the warm-up tasks that have not succeeded yet.
+    """
+    try:
+        if config.warm_up is None or config.warm_up.is_ready():
+            return success_no_content()
+        status = config.warm_up.get_status()
+        pending = sorted(name for name, state in status['tasks'].items() if state != WarmUp.TASK_DONE)
+        return error_service_unavailable("Warming up: %s" % ', '.join(pending), retry_after=1)
+    except Exception:
+        return error_unexpected_error()
+
+
+@blueprint.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Return the request and container backend metrics in the Prometheus text format.
+
+    In production mode, the metrics of all worker processes are aggregated
+    (those of the other workers are at most --metrics-interval seconds old).
+    """
+    if config.metrics is None:
+        return error_not_implemented("Metrics are disabled")
+
+    try:
+        return make_response((render(config.metrics.collect()), 200, {
+            'Content-Type': 'text/plain; version=0.0.4'
+        }))
+    except Exception:
+        return error_unexpected_error()
+
+
 @blueprint.route('/status', methods=['GET'])
 def get_status():
     """
@@ -36,23 +82,22 @@ def get_status():
 
     The main application is querying this entry-point from time to time to determinate
     the nodes status.
+
+    The report is the latest snapshot taken by the background resource sampler;
+    its `sampled_at` field tells when it has been taken. If the latest sampling attempt
+    failed, the previous snapshot is reported with `stale` set and the attempt's `error`. The state of the admission
+    gates (running and queued expensive operations) and of the warm pools (available
+    containers, hits and misses) is always up to date.
     """
     try:
-        return success_ok({
-            'backends': {
-                'container': {
-                    'status': config.container_backend.get_status()
-                }
-            },
-            'resources': {
-                'cpu': {
-                    'count': psutil.cpu_count(),
-                    'usage': psutil.cpu_percent()
-                },
-                'disk': psutil.disk_usage('/').__dict__,
-                'memory': psutil.virtual_memory().__dict__,
-                'swap': psutil.swap_memory().__dict__
-            }
-        })
+        if config.resource_sampler is not None:
+            status = config.resource_sampler.get_snapshot()
+        else:
+            status = sample_resources(config.container_backend)
+        if config.admission is not None:
+            status = dict(status, admission=config.admission.get_status())
+        if config.warm_pool_manager is not None:
+            status = dict(status, pools=config.warm_pool_manager.get_status())
+        return success_ok(status)
     except Exception:
         return error_unexpected_error()
@@ -0,0 +1,57 @@
+from base64 import standard_b64decode
+from coco.hostapi import config
+from coco.hostapi.http.responses import *
+from coco.hostapi.http.streams import MIMETYPE_EVENT_STREAM, success_stream
+from flask import Blueprint, request
+
+
+"""
+Flask blueprint collecting the /events routes.
+"""
+blueprint = Blueprint('events', __name__, url_prefix='/events')
+
+
+@blueprint.route('', methods=['GET'])
+def get_events():
+    """
+    Stream the container lifecycle events as server-sent events.
+
+    Every event carries its ID, so clients reconnecting with the `Last-Event-ID` header (or the
+    `last_event_id` query parameter) receive the events they missed, as long as these are still
+    buffered. Otherwise a `reset` event is sent first, telling the client to re-read the full state.
+    The events can be filtered with the `type` (comma separated) and `container` query parameters.
+    """
+    if config.event_log is None:
+        return error_not_implemented("Events are disabled")
+
+    try:
+        last_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+        last_id = int(last_id) if last_id else None
+        types = request.args.get('type')
+        types = set(types.split(',')) if types else None
+        container = request.args.get('container')
+        container = standard_b64decode(container) if container else None
+    except:
+        return error_bad_request()
+
+    def stream(last_id):
+        if last_id is None:
+            last_id = config.event_log.get_last_id()
+        while True:
+            events, gap = config.event_log.get_events(last_id, config.events_heartbeat)
+            if gap:
+                yield (None, 'reset', {'last_event_id': last_id})
+            if not events:
+                yield None
+            for event in events:
+                last_id = event['id']
+                if types is not None and event['type'] not in types:
+                    continue
+                if container is not None and event['container'] != container:
+                    continue
+                yield (event['id'], event['type'], event)
+
+    try:
+        return success_stream(stream(last_id), MIMETYPE_EVENT_STREAM)
+    except:
+        return error_unexpected_error()
@@ -0,0 +1,40 @@
+from coco.hostapi import config
+from coco.hostapi.http.responses import *
+from flask import Blueprint
+
+
+"""
+Flask blueprint collecting the /jobs routes.
+"""
+blueprint = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+
+@blueprint.route('/<job>', methods=['GET'])
+def get_job(job):
+    """
+    Get the status, result and error of a job started by an asynchronous request.
+    """
+    if config.job_manager is None:
+        return error_not_implemented("Asynchronous jobs are disabled")
+
+    try:
+        job = config.job_manager.get_job(job)
+        if job is None:
+            return error_not_found("Job not found")
+        return success_ok(job)
+    except:
+        return error_unexpected_error()
+
+
+@blueprint.route('', methods=['GET'])
+def get_jobs():
+    """
+    Get a list of all jobs that are pending, running or have recently finished.
+    """
+    if config.job_manager is None:
+        return error_not_implemented("Asynchronous jobs are disabled")
+
+    try:
+        return success_ok(config.job_manager.get_jobs())
+    except:
+        return error_unexpected_error()
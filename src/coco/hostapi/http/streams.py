@@ -0,0 +1,86 @@
+from coco.hostapi.http.encoding import dumps
+from flask import Response, request, stream_with_context
+
+
+"""
+MIME type of newline-delimited JSON streams (one JSON document per line).
+"""
+MIMETYPE_NDJSON = 'application/x-ndjson'
+
+
+"""
+MIME type of server-sent event streams.
+"""
+MIMETYPE_EVENT_STREAM = 'text/event-stream'
+
+
+def get_stream_mimetype(default=None):
+    """
+    Return the streaming MIME type the client asked for in its `Accept` header.
+
+    :param default: The MIME type to return if the client did not ask for a stream.
+    """
+    mimetype = request.accept_mimetypes.best_match([MIMETYPE_NDJSON, MIMETYPE_EVENT_STREAM])
+    if mimetype and request.accept_mimetypes[mimetype] > request.accept_mimetypes['application/json']:
+        return mimetype
+    return default
+
+
+def ndjson_frames(items):
+    """
+    Serialize each item of the iterable `items` as a line of newline-delimited JSON.
+
+    `None` items are sent as empty (keep-alive) lines.
+    """
+    for item in items:
+        if item is None:
+            yield '\n'
+        else:
+            yield dumps(item) + '\n'
+
+
+def event_stream_frames(items, event=None):
+    """
+    Serialize each item of the iterable `items` as a server-sent event.
+
+    Items can be `(id, data)` tuples to set the event's ID (clients send the last ID they have
+    seen in the `Last-Event-ID` header when reconnecting) or `(id, event, data)` tuples to also
+    set the event's type. An ID of `None` is left out. `None` items are sent as keep-alive comments.
+
+    :param items: The items to serialize.
+    :param event: The event type to set on all events without a type of their own.
+    """
+    for item in items:
+        if item is None:
+            yield ':\n\n'
+            continue
+        frame = ''
+        item_event = event
+        if isinstance(item, tuple):
+            if len(item) == 3:
+                event_id, item_event, item = item
+            else:
+                event_id, item = item
+            if event_id is not None:
+                frame += 'id: %s\n' % event_id
+        if item_event is not None:
+            frame += 'event: %s\n' % item_event
+        yield frame + 'data: %s\n\n' % dumps(item)
+
+
+def success_stream(items, mimetype=MIMETYPE_NDJSON, event=None):
+    """
+    Return a 200 - OK response object streaming the items of the iterable `items`.
+
+    The body is sent using chunked transfer encoding while `items` is consumed,
+    so neither the items nor their serialization have to be held in memory at once.
+    """
+    if mimetype == MIMETYPE_EVENT_STREAM:
+        frames = event_stream_frames(items, event)
+    else:
+        frames = ndjson_frames(items)
+    response = Response(stream_with_context(frames), 200, mimetype=mimetype)
+    response.headers['Cache-Control'] = 'no-cache'
+    # prevent reverse proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
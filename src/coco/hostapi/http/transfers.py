@@ -0,0 +1,170 @@
+from coco.hostapi import config
+from coco.hostapi.http.responses import error_bad_request, error_range_not_satisfiable, success_accepted
+from flask import Response, request
+from werkzeug.wsgi import wrap_file
+import fcntl
+import os
+import re
+import time
+
+
+"""
+MIME type of the exported and imported archives.
+"""
+MIMETYPE_TAR = 'application/x-tar'
+
+
+"""
+Pattern of the client-chosen IDs of resumable uploads.
+"""
+UPLOAD_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+"""
+Pattern of the `Content-Range` header of an upload part (`bytes */<length>` asks for the upload's progress).
+"""
+CONTENT_RANGE_PATTERN = re.compile(r'^bytes (?:(\d+)-(\d+)|\*)/(\d+)$')
+
+
+def success_archive(archive, filename):
+    """
+    Return a response object streaming the tar archive exported by the container backend.
+
+    Archives given as path (or file) are served with `Range` support: a satisfiable range is answered
+    with 206 - Partial Content, an unsatisfiable one with 416. Ranges reaching the end of the file are
+    passed to the WSGI server's file wrapper, which sends them with `sendfile` (e.g. gunicorn).
+    Other archives (iterables of chunks or unseekable streams) are streamed as a whole.
+
+    :param archive: The archive as path, file-like object or iterable of chunks.
+    :param filename: The file name suggested to the client.
+    """
+    headers = {'Content-Disposition': 'attachment; filename="%s"' % filename}
+    if isinstance(archive, basestring):
+        archive = open(archive, 'rb')
+    try:
+        archive.seek(0, os.SEEK_END)
+        size = archive.tell()
+    except (AttributeError, IOError, OSError):
+        headers['Accept-Ranges'] = 'none'
+        chunks = read_chunks(archive, close=True) if hasattr(archive, 'read') else archive
+        return Response(chunks, 200, headers, mimetype=MIMETYPE_TAR)
+
+    headers['Accept-Ranges'] = 'bytes'
+    start, stop, code = 0, size, 200
+    # multiple ranges are not supported, the whole archive is sent instead
+    if request.range is not None and len(request.range.ranges) == 1:
+        byte_range = request.range.range_for_length(size)
+        if byte_range is None:
+            archive.close()
+            return error_range_not_satisfiable("Range not satisfiable", 'bytes */%d' % size)
+        start, stop = byte_range
+        code = 206
+        headers['Content-Range'] = 'bytes %d-%d/%d' % (start, stop - 1, size)
+    headers['Content-Length'] = str(stop - start)
+    archive.seek(start)
+    if stop == size and hasattr(archive, 'fileno'):
+        body = wrap_file(request.environ, archive, config.transfer_chunk_size)
+    else:
+        body = read_chunks(archive, stop - start, close=True)
+    return Response(body, code, headers, mimetype=MIMETYPE_TAR, direct_passthrough=True)
+
+
+def receive_archive(directory):
+    """
+    Receive the tar archive to import from the request body.
+
+    Without `Content-Range` header, the body is returned as stream (it is neither buffered in memory nor
+    spooled to disk). Otherwise the body is a part of the resumable upload identified by the `upload`
+    query parameter, which is appended to the upload's file in `directory`. Parts must start at (or before)
+    the number of bytes received so far; `Content-Range: bytes */<length>` only reports the progress.
+    Once all bytes have been received, the upload's file is returned.
+
+    Returns a tuple of the archive (a file-like object or `None` if the upload is incomplete) and the
+    response to return instead of importing the archive (`None` if it is complete).
+
+    :param directory: The directory to store resumable uploads in (shared with the other worker processes).
+    """
+    content_range = request.headers.get('Content-Range')
+    if content_range is None:
+        return request.stream, None
+
+    match = CONTENT_RANGE_PATTERN.match(content_range)
+    upload = request.args.get('upload', '')
+    if match is None or not UPLOAD_ID_PATTERN.match(upload):
+        return None, error_bad_request("Invalid Content-Range header or upload parameter")
+    start, stop, length = [int(value) if value is not None else None for value in match.groups()]
+    if start is not None and (start > stop or stop >= length):
+        return None, error_bad_request("Invalid Content-Range header")
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    path = os.path.join(directory, upload + '.part')
+    with open(path, 'ab') as upload_file:
+        # parts of the same upload might be sent to different workers
+        fcntl.flock(upload_file, fcntl.LOCK_EX)
+        received = os.fstat(upload_file.fileno()).st_size
+        if received == 0:
+            purge_uploads(directory)
+        if start is not None:
+            if start > received:
+                response = error_range_not_satisfiable("Upload part does not follow the received bytes")
+                return None, set_received_range(response, received)
+            # bytes sent again replace the received ones
+            upload_file.truncate(start)
+            upload_file.seek(start)
+            for chunk in read_chunks(request.stream, stop - start + 1):
+                upload_file.write(chunk)
+            upload_file.flush()
+            received = upload_file.tell()
+
+    if received < length:
+        response = success_accepted({'upload': upload, 'received': received, 'length': length})
+        return None, set_received_range(response, received)
+
+    archive = open(path, 'rb')
+    # the archive is read through the open file, which keeps the data until it is closed
+    os.remove(path)
+    return archive, None
+
+
+def purge_uploads(directory):
+    """
+    Remove the files of resumable uploads that have not been continued for --upload-retention seconds.
+    """
+    now = time.time()
+    for filename in os.listdir(directory):
+        path = os.path.join(directory, filename)
+        try:
+            if filename.endswith('.part') and now - os.path.getmtime(path) > config.upload_retention:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def read_chunks(stream, length=None, close=False):
+    """
+    Generator reading the stream in chunks of --transfer-chunk-size bytes, up to `length` bytes if given.
+
+    :param close: If the stream should be closed once it has been read (or the generator is closed).
+    """
+    try:
+        while length is None or length > 0:
+            chunk_size = config.transfer_chunk_size if length is None else min(config.transfer_chunk_size, length)
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            if length is not None:
+                length -= len(chunk)
+            yield chunk
+    finally:
+        if close:
+            stream.close()
+
+
+def set_received_range(response, received):
+    """
+    Tell the client which bytes of its upload have been received (in the `Range` header).
+    """
+    if received > 0:
+        response.headers['Range'] = 'bytes=0-%d' % (received - 1)
+    return response
@@ -0,0 +1,35 @@
+from gunicorn.app.base import BaseApplication
+
+
+class ProductionServer(BaseApplication):
+    """
+    Pre-forking WSGI server (gunicorn) to serve the host API in production.
+
+    Unlike the Flask development server, requests are handled by multiple worker processes
+    (each having a pool of threads), so a slow backend call does not block the whole node.
+    """
+
+    def __init__(self, app, options=None):
+        """
+        Initialize the server for the WSGI application `app`.
+
+        :param app: The WSGI application to serve.
+        :param options: Dictionary of gunicorn settings (e.g. `workers`, `threads`, `backlog`).
+        """
+        self.application = app
+        self.options = options or {}
+        super(ProductionServer, self).__init__()
+
+    def load(self):
+        """
+        Return the WSGI application to serve.
+        """
+        return self.application
+
+    def load_config(self):
+        """
+        Apply the options passed upon initialization to gunicorn's configuration.
+        """
+        for key, value in self.options.items():
+            if value is not None:
+                self.cfg.set(key, value)
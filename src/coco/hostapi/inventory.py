@@ -0,0 +1,263 @@
+from coco.contract.backends import ContainerBackend
+from coco.contract.errors import ContainerNotFoundError
+from coco.hostapi.events import EVENT_CREATED, EVENT_DELETED, EVENT_SNAPSHOT_RESTORED, StateDiffer
+from datetime import datetime
+from threading import Event, Lock, Thread
+import time
+
+
+"""
+(Dotted) names of the container attributes indexed by default: the status, the image and the owner label.
+"""
+INDEXES = (ContainerBackend.CONTAINER_KEY_STATUS, 'image', 'labels.owner')
+
+
+class Inventory(Thread):
+    """
+    Daemon thread keeping an in-memory index of the backend's containers.
+
+    The containers are indexed by their primary key and by the values of the `indexes` attributes, so
+    single-container reads and filtered listings do not need to ask the backend. Every process keeps
+    its own inventory: it is reconciled with the backend's `get_containers()` every `interval` seconds
+    and updated right away with the changes made through the API (see `update`). Containers created
+    or restored that way are re-read from the backend on this thread; until created ones have been
+    read, listings are not answered.
+    """
+
+    def __init__(self, backend, interval=30.0, max_staleness=60.0, indexes=INDEXES):
+        """
+        Initialize an empty inventory.
+
+        :param backend: The container backend to read the containers from.
+        :param interval: The number of seconds between two reconciliations.
+        :param max_staleness: The number of seconds after the last reconciliation the inventory is trusted.
+        :param indexes: The (dotted) names of the indexed attributes, like the filters of listings.
+        """
+        super(Inventory, self).__init__(name='inventory')
+        self.daemon = True
+        self.backend = backend
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self._changed = Event()
+        self._containers = {}
+        self._created = set()
+        self._dirty = set()
+        self._indexes = dict((name, {}) for name in indexes)
+        self._lock = Lock()
+        self._reconciled_at = None
+        self._started_at = datetime.utcnow().isoformat()[:19]
+        self._stopped = Event()
+        self._touched = {}
+
+    def apply(self, event):
+        """
+        Update the inventory with an event of the event log (e.g. published by another process).
+
+        Events published before the inventory was created are already part of the backend's state.
+        """
+        if event['timestamp'][:19] >= self._started_at:
+            self.update(event['type'], event['container'])
+
+    def get_age(self):
+        """
+        Return the number of seconds since the last reconciliation (or `None` if there has been none yet).
+        """
+        reconciled_at = self._reconciled_at
+        if reconciled_at is None:
+            return None
+        return max(0.0, time.time() - reconciled_at)
+
+    def get_container(self, container):
+        """
+        Return the indexed container or `None` if it is unknown or waits to be re-read from the backend.
+        """
+        with self._lock:
+            if container in self._dirty:
+                return None
+            return self._containers.get(container)
+
+    def get_containers(self, filters=None):
+        """
+        Return the indexed containers ordered by their primary key, narrowed down by the filters on
+        indexed attributes, or `None` if containers created through the API wait to be read.
+
+        Filters on other attributes are not applied, the listing query applies all of them.
+
+        :param filters: Dictionary mapping (dotted) attribute names to lists of accepted values.
+        """
+        with self._lock:
+            if self._created:
+                return None
+            candidates = None
+            for name, accepted in (filters or {}).items():
+                index = self._indexes.get(name)
+                if index is None:
+                    continue
+                matching = set()
+                for value in accepted:
+                    matching.update(index.get(value, ()))
+                candidates = matching if candidates is None else candidates & matching
+            if candidates is None:
+                containers = self._containers.values()
+            else:
+                containers = [self._containers[container] for container in candidates]
+        return sorted(containers, key=lambda container: container.get(ContainerBackend.KEY_PK))
+
+    def is_fresh(self):
+        """
+        Check if the inventory has been reconciled within the last `max_staleness` seconds.
+        """
+        age = self.get_age()
+        return age is not None and age <= self.max_staleness
+
+    def reconcile(self):
+        """
+        Replace the inventory with the backend's containers.
+
+        Containers changed through the API while the backend was queried keep their newer state.
+        """
+        started = time.time()
+        containers = self.backend.get_containers()
+        with self._lock:
+            vanished = set(self._containers)
+            for container in containers:
+                key = container.get(ContainerBackend.KEY_PK)
+                vanished.discard(key)
+                if self._touched.get(key, 0) < started:
+                    self._put(container)
+            for key in vanished:
+                if self._touched.get(key, 0) < started:
+                    self._remove(key)
+            # older changes are included in the backend's answer
+            self._touched = dict((key, touched) for key, touched in self._touched.items() if touched >= started)
+            self._dirty = set(key for key in self._dirty if key in self._touched)
+            self._created &= self._dirty
+            self._reconciled_at = started
+
+    def refresh(self):
+        """
+        Re-read the containers changed through the API from the backend.
+        """
+        with self._lock:
+            dirty = list(self._dirty)
+        for key in dirty:
+            started = time.time()
+            try:
+                container = self.backend.get_container(key)
+            except ContainerNotFoundError:
+                container = None
+            with self._lock:
+                # changed again while being read, the next refresh reads it once more
+                if self._touched.get(key, 0) >= started:
+                    continue
+                self._dirty.discard(key)
+                self._created.discard(key)
+                if container is None:
+                    self._remove(key)
+                else:
+                    self._put(container)
+
+    def run(self):
+        """
+        Reconcile the inventory every `interval` seconds and refresh changed containers in between.
+        """
+        reconcile_at = 0
+        while not self._stopped.is_set():
+            if time.time() >= reconcile_at:
+                reconcile_at = time.time() + self.interval
+                try:
+                    self.reconcile()
+                except Exception:
+                    pass
+            try:
+                self.refresh()
+            except Exception:
+                pass
+            self._changed.wait(max(0, reconcile_at - time.time()))
+            self._changed.clear()
+
+    def stop(self):
+        """
+        Signal the thread to stop after the current iteration.
+        """
+        self._stopped.set()
+        self._changed.set()
+
+    def update(self, event_type, container):
+        """
+        Apply a change made through the API right away.
+
+        Status changes are applied to the indexed container. Created and restored containers are
+        re-read from the backend on the inventory's thread, until then single-container reads (and
+        for created containers, listings) are not answered. Containers already known to have been
+        created (e.g. when the process's own event comes back from the event log) are not re-read.
+
+        :param event_type: One of the `EVENT_*` constants of `coco.hostapi.events`.
+        :param container: The (decoded) ID of the changed container.
+        """
+        status = StateDiffer.EVENT_STATUS.get(event_type)
+        if status is None and event_type not in (EVENT_CREATED, EVENT_DELETED, EVENT_SNAPSHOT_RESTORED):
+            return
+
+        with self._lock:
+            if event_type == EVENT_CREATED and (container in self._containers or container in self._dirty):
+                return
+            self._touched[container] = time.time()
+            if event_type == EVENT_DELETED:
+                self._dirty.discard(container)
+                self._created.discard(container)
+                self._remove(container)
+            elif status is not None:
+                if container in self._containers:
+                    updated = dict(self._containers[container])
+                    updated[ContainerBackend.CONTAINER_KEY_STATUS] = status
+                    self._put(updated)
+            else:
+                self._dirty.add(container)
+                if event_type == EVENT_CREATED:
+                    self._created.add(container)
+        self._changed.set()
+
+    def _put(self, container):
+        """
+        Add the container to the inventory, replacing and un-indexing its previous version.
+        """
+        key = container.get(ContainerBackend.KEY_PK)
+        self._remove(key)
+        self._containers[key] = container
+        for name, index in self._indexes.items():
+            for value in get_index_values(container, name):
+                index.setdefault(value, set()).add(key)
+
+    def _remove(self, key):
+        """
+        Remove the container with the given primary key from the inventory and its indexes.
+        """
+        container = self._containers.pop(key, None)
+        if container is None:
+            return
+        for name, index in self._indexes.items():
+            for value in get_index_values(container, name):
+                keys = index.get(value)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[value]
+
+
+def get_index_values(container, name):
+    """
+    Return the values of the container's (dotted) attribute as strings, like listing filters compare them.
+
+    Lists contribute every element, missing attributes no value at all.
+    """
+    value = container
+    for part in name.split('.'):
+        value = value.get(part) if isinstance(value, dict) else None
+    if value is None:
+        return []
+    if isinstance(value, bool):
+        return [str(value).lower()]
+    if isinstance(value, list):
+        return ['%s' % element for element in value]
+    return ['%s' % value]
@@ -0,0 +1,183 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Lock
+from uuid import uuid4
+import json
+import os
+import re
+import time
+
+
+class JobQueueFullError(Exception):
+    """
+    Error raised when a job is submitted while the maximum number of pending jobs is reached.
+    """
+    pass
+
+
+class JobManager(object):
+    """
+    Runs jobs on a bounded thread pool and persists their state as JSON files.
+
+    Job states are stored on disk (rather than in memory) so that every worker process
+    of the production server can report on jobs submitted to any other worker.
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+
+    JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+    PURGE_INTERVAL = 60
+
+    def __init__(self, directory, max_workers=4, max_pending=64, retention=3600):
+        """
+        Initialize a new job manager.
+
+        :param directory: The directory to store the job states in.
+        :param max_workers: The number of jobs run concurrently.
+        :param max_pending: The number of jobs that can be pending or running at once.
+        :param retention: The number of seconds finished jobs are kept.
+        """
+        self.directory = directory
+        self.max_pending = max_pending
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._last_purge = 0
+        self._lock = Lock()
+        self._pending = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def get_job(self, job_id):
+        """
+        Return the job with the given ID or `None` if there is no such job.
+        """
+        if not self.JOB_ID_PATTERN.match(job_id):
+            return None
+        try:
+            with open(self._get_path(job_id)) as job_file:
+                return json.load(job_file)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def get_jobs(self):
+        """
+        Return a list of all known jobs, oldest first.
+        """
+        jobs = []
+        for filename in os.listdir(self.directory):
+            job_id, extension = os.path.splitext(filename)
+            if extension == '.json':
+                job = self.get_job(job_id)
+                if job is not None:
+                    jobs.append(job)
+        return sorted(jobs, key=lambda job: job.get('created_at'))
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Schedule `func(*args, **kwargs)` for execution and return the newly created job.
+
+        `func` is expected to return a dictionary that is merged into the job's state.
+        The job is considered failed if it contains an `error` key or `func` raises.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFullError("Maximum number of pending jobs reached")
+            self._pending += 1
+
+        self._purge()
+        job = {
+            'id': uuid4().hex,
+            'status': JobManager.STATUS_PENDING,
+            'created_at': self._now(),
+            'started_at': None,
+            'finished_at': None
+        }
+        self._save(job)
+        try:
+            self._executor.submit(self._run, job, func, args, kwargs)
+        except Exception:
+            self._done()
+            raise
+        return dict(job)
+
+    def _done(self):
+        """
+        Decrement the number of pending jobs.
+        """
+        with self._lock:
+            self._pending -= 1
+
+    def _get_path(self, job_id):
+        """
+        Return the path of the file storing the state of the job with the given ID.
+        """
+        return os.path.join(self.directory, job_id + '.json')
+
+    def _now(self):
+        """
+        Return the current UTC time as ISO 8601 string.
+        """
+        return datetime.utcnow().isoformat() + 'Z'
+
+    def _purge(self):
+        """
+        Delete the states of finished jobs older than the retention period.
+
+        To keep submitting cheap, this runs at most once every `PURGE_INTERVAL` seconds.
+        """
+        now = time.time()
+        if now - self._last_purge < JobManager.PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        threshold = now - self.retention
+        for job in self.get_jobs():
+            if job.get('finished_at') is None:
+                continue
+            path = self._get_path(job['id'])
+            try:
+                if os.path.getmtime(path) < threshold:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def _run(self, job, func, args, kwargs):
+        """
+        Execute the job's function and record its outcome.
+        """
+        try:
+            job['status'] = JobManager.STATUS_RUNNING
+            job['started_at'] = self._now()
+            self._save(job)
+            try:
+                job.update(func(*args, **kwargs) or {})
+                if 'error' in job:
+                    job['status'] = JobManager.STATUS_FAILED
+                else:
+                    job['status'] = JobManager.STATUS_SUCCEEDED
+            except Exception as ex:
+                job['status'] = JobManager.STATUS_FAILED
+                job['error'] = str(ex)
+            job['finished_at'] = self._now()
+            self._save(job)
+        finally:
+            self._done()
+
+    def _save(self, job):
+        """
+        Atomically write the job's state to disk.
+        """
+        path = self._get_path(job['id'])
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as job_file:
+            json.dump(job, job_file)
+        os.rename(tmp_path, path)
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting new jobs and release the thread pool.
+        """
+        self._executor.shutdown(wait=wait)
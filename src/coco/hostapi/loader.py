@@ -0,0 +1,128 @@
+from coco.common.utils import ClassLoader
+from hashlib import sha1
+import json
+import os
+import time
+
+
+"""
+Value of backend arguments the backend negotiates on initialization (e.g. the Docker API version).
+"""
+AUTO = 'auto'
+
+
+def load_backend(name, args, cache_directory=None, ttl=86400.0):
+    """
+    Load and initialize the container backend, reusing the configuration negotiated on a previous start.
+
+    Arguments set to `auto` make the backend probe its endpoint (e.g. the Docker daemon) when it is
+    initialized. If the backend reports the values it negotiated (see `get_negotiated_args`), they are
+    cached in `cache_directory`, keyed by the backend class and its (other) arguments, so subsequent starts
+    initialize the backend with the cached values instead. If that fails, the cache entry is dropped and
+    the backend negotiates again.
+
+    :param name: The absolute name of the backend class.
+    :param args: The JSON encoded arguments of the backend.
+    :param cache_directory: The directory to cache the negotiated arguments in (`None` disables the cache).
+    :param ttl: The number of seconds after which cached arguments are negotiated again.
+    """
+    module, klass = ClassLoader.split(name)
+    parsed_args = json.loads(args) if args else {}
+    auto_args = [key for key, value in parsed_args.items() if value == AUTO] if isinstance(parsed_args, dict) else []
+    if not auto_args or not cache_directory:
+        return ClassLoader(module=module, klass=klass, args=args).get_instance()
+
+    path = os.path.join(cache_directory, sha1(json.dumps([name, parsed_args], sort_keys=True)).hexdigest() + '.json')
+    negotiated = read_negotiated_args(path, ttl)
+    if negotiated is not None:
+        try:
+            return ClassLoader(module=module, klass=klass, args=json.dumps(dict(parsed_args, **negotiated))).get_instance()
+        except Exception:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    backend = ClassLoader(module=module, klass=klass, args=args).get_instance()
+    negotiated = get_negotiated_args(backend, auto_args)
+    if negotiated is not None:
+        try:
+            write_negotiated_args(path, negotiated)
+        except (IOError, OSError):
+            pass
+    return backend
+
+
+def load_backends(names, args, cache_directory=None, ttl=86400.0):
+    """
+    Load and initialize the container backends given on the command line (see `load_backend`).
+
+    Returns a list of tuples of the backends' names and the backends. `names` is either the absolute
+    name of a single (unnamed) backend class or comma separated `NAME=CLASS` pairs of several backends.
+    Their arguments are a JSON object mapping their names to their arguments if all of its keys are
+    names of the backends, otherwise all backends get the same arguments.
+
+    :param names: The absolute name of the backend class or the `NAME=CLASS` pairs.
+    :param args: The JSON encoded arguments of the backend(s).
+    """
+    if '=' not in names:
+        return [(None, load_backend(names, args, cache_directory, ttl))]
+
+    backends = [[part.strip() for part in pair.split('=', 1)] for pair in names.split(',') if pair.strip()]
+    parsed_args = json.loads(args) if args else {}
+    shared = not isinstance(parsed_args, dict) or not parsed_args or \
+        not set(parsed_args).issubset(name for name, _ in backends)
+    return [
+        (name, load_backend(klass, args if shared else json.dumps(parsed_args.get(name, {})), cache_directory, ttl))
+        for name, klass in backends
+    ]
+
+
+def get_negotiated_args(backend, names):
+    """
+    Return the values the backend negotiated for its `auto` arguments `names` or `None` if it does not tell.
+
+    Backends report them by implementing `get_negotiated_args()`, returning a dictionary mapping
+    argument names to the negotiated values. Backends without it are not cached.
+    """
+    hook = getattr(backend, 'get_negotiated_args', None)
+    if not callable(hook):
+        return None
+    try:
+        reported = hook()
+    except Exception:
+        return None
+    if not isinstance(reported, dict):
+        return None
+    negotiated = dict((name, reported.get(name)) for name in names)
+    if any(value is None or value == AUTO for value in negotiated.values()):
+        return None
+    return negotiated
+
+
+def read_negotiated_args(path, ttl):
+    """
+    Return the cached arguments or `None` if there are none or they are older than `ttl` seconds.
+    """
+    try:
+        if time.time() - os.path.getmtime(path) > ttl:
+            return None
+        with open(path) as cache_file:
+            negotiated = json.load(cache_file)
+    except (IOError, OSError, ValueError):
+        return None
+    return negotiated if isinstance(negotiated, dict) else None
+
+
+def write_negotiated_args(path, negotiated):
+    """
+    Atomically write the negotiated arguments to the cache file.
+    """
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    # several workers might negotiate at the same time
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp_path, 'w') as cache_file:
+        json.dump(negotiated, cache_file)
+    os.rename(tmp_path, path)
@@ -0,0 +1,77 @@
+from datetime import datetime
+import time
+
+
+def filter_logs(logs, tail=None, since=None):
+    """
+    Return the log entries newer than `since`, limited to the last `tail` ones.
+
+    :param logs: The list of log entries as returned by the container backend.
+    :param tail: The maximum number of (most recent) entries to return.
+    :param since: An ISO 8601 timestamp; only entries logged after it are returned.
+    """
+    if since is not None:
+        logs = [entry for entry in logs if (get_timestamp(entry) or '') > since]
+    if tail is not None:
+        logs = logs[-tail:] if tail > 0 else []
+    return logs
+
+
+def follow_logs(backend, container, offset, interval=1.0):
+    """
+    Generator yielding log entries of the container as they are produced.
+
+    The container backend has no streaming interface, so its logs are polled every
+    `interval` seconds and only the entries beyond the already seen ones are yielded.
+    The generator ends once the container's logs cannot be retrieved anymore
+    (e.g. because it has been deleted).
+
+    `None` is yielded after polls without new entries, so the stream can send keep-alive
+    frames (and the server notices clients that have gone away).
+
+    :param backend: The container backend to poll.
+    :param container: The ID of the container to follow.
+    :param offset: The number of entries that have already been seen.
+    :param interval: The number of seconds between two polls.
+    """
+    while True:
+        time.sleep(interval)
+        try:
+            logs = backend.get_container_logs(container)
+        except Exception:
+            return
+        if len(logs) < offset:
+            # the logs have been truncated (e.g. rotated), so start over
+            offset = 0
+        if len(logs) == offset:
+            yield None
+        for entry in logs[offset:]:
+            yield entry
+        offset = len(logs)
+
+
+def get_timestamp(entry):
+    """
+    Return the ISO 8601 timestamp of the log entry or `None` if it has none.
+
+    Entries are either dictionaries with a `timestamp` key or strings prefixed with
+    the timestamp (as produced by e.g. `docker logs --timestamps`).
+    """
+    if isinstance(entry, dict):
+        return entry.get('timestamp')
+    if isinstance(entry, basestring):
+        return entry.split(' ', 1)[0]
+    return None
+
+
+def parse_timestamp(value):
+    """
+    Normalize a timestamp given as UNIX time or ISO 8601 string to an ISO 8601 string.
+
+    :raises ValueError: If the value is neither of both.
+    """
+    try:
+        return datetime.utcfromtimestamp(float(value)).isoformat()
+    except ValueError:
+        datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S')
+        return value
@@ -0,0 +1,315 @@
+from bisect import bisect_left
+from threading import Event, Lock, Thread
+from uuid import uuid4
+import fcntl
+import json
+import os
+
+
+"""
+Upper bounds (in seconds) of the latency histogram buckets.
+"""
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+"""
+Dictionary mapping the metric names to their type and help text.
+"""
+METRICS = {
+    'hostapi_http_requests_total': ('counter', 'Number of handled HTTP requests.'),
+    'hostapi_http_requests_in_flight': ('gauge', 'Number of HTTP requests currently being handled.'),
+    'hostapi_http_request_duration_seconds': ('histogram', 'Time until the HTTP response headers were ready.'),
+    'hostapi_backend_call_duration_seconds': ('histogram', 'Duration of container backend method calls.')
+}
+
+
+class MetricsRegistry(object):
+    """
+    Thread-safe store of the counters, gauges and histograms of the current process.
+
+    Metrics are identified by name and a tuple of `(label, value)` pairs. Recording is a
+    dictionary update under a lock, so it is cheap enough to always stay turned on.
+
+    With multiple worker processes, every registry periodically writes a snapshot of its
+    metrics into a shared directory, so any worker can report the metrics of all of them.
+    The snapshot files are named after the process ID and a random token (process IDs are reused),
+    and every registry holds an exclusive `flock` on a lock file of the same name as long as its
+    process lives. The counters and histograms of exited processes are added to a `retired.json`
+    total, so the merged ones never go backwards.
+    """
+
+    def __init__(self, directory=None):
+        """
+        Initialize a new, empty registry.
+
+        :param directory: The directory shared with the other worker processes (if any).
+        """
+        self.directory = directory
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = Lock()
+        self._name = 'process-%d-%s' % (os.getpid(), uuid4().hex[:8])
+        self._process_lock_file = None
+        if directory is not None:
+            self._process_lock_file = open(self._get_path(self._name + '.lock'), 'w')
+            fcntl.flock(self._process_lock_file, fcntl.LOCK_EX)
+
+    def add(self, name, labels, value):
+        """
+        Add `value` to the gauge (which can also be negative).
+        """
+        key = (name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + value
+
+    def inc(self, name, labels, value=1):
+        """
+        Increment the counter by `value`.
+        """
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        """
+        Record the observation `value` in the histogram.
+        """
+        key = (name, labels)
+        bucket = bisect_left(LATENCY_BUCKETS, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # one count per bucket, plus the +Inf bucket, the sum and the total count
+                histogram = self._histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0]
+            histogram[bucket] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def collect(self):
+        """
+        Return a snapshot of the metrics of this and all other worker processes.
+
+        Counters and histograms of all processes (including exited ones) are summed up,
+        gauges only of the processes that are still alive. The snapshots of exited processes
+        are moved into the retired total on the way.
+        """
+        snapshot = self.snapshot()
+        if self.directory is None:
+            return snapshot
+
+        # collectors retire exited processes one at a time, so none is counted twice or missed
+        with open(self._get_path('retired.lock'), 'a') as retired_lock_file:
+            fcntl.flock(retired_lock_file, fcntl.LOCK_EX)
+            retired = self._load('retired.json') or {'counters': [], 'histograms': []}
+            for filename in os.listdir(self.directory):
+                if not filename.startswith('process-') or not filename.endswith('.lock'):
+                    continue
+                name = filename[:-5]
+                if name == self._name:
+                    continue
+                alive = is_locked(self._get_path(filename))
+                other = self._load(name + '.json')
+                if not alive:
+                    if other is not None:
+                        for kind in ('counters', 'histograms'):
+                            retired[kind] = to_entries(merge_entries(from_entries(retired[kind]), other[kind]))
+                        self._write('retired.json', retired)
+                    remove(self._get_path(name + '.json'))
+                    remove(self._get_path(filename))
+                elif other is not None:
+                    for kind in ('counters', 'gauges', 'histograms'):
+                        merge_entries(snapshot[kind], other[kind])
+            for kind in ('counters', 'histograms'):
+                merge_entries(snapshot[kind], retired[kind])
+        return snapshot
+
+    def dump(self):
+        """
+        Write the snapshot of this process' metrics into the shared directory.
+        """
+        if self.directory is None:
+            return
+        snapshot = self.snapshot()
+        self._write(self._name + '.json', dict((kind, to_entries(values)) for kind, values in snapshot.items()))
+
+    def snapshot(self):
+        """
+        Return a copy of this process' metrics.
+        """
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'histograms': dict((key, list(value)) for key, value in self._histograms.items())
+            }
+
+    def _get_path(self, filename):
+        """
+        Return the path of a file in the shared directory.
+        """
+        return os.path.join(self.directory, filename)
+
+    def _load(self, filename):
+        """
+        Return the contents of the JSON file in the shared directory (or `None` if it cannot be read).
+        """
+        try:
+            with open(self._get_path(filename)) as metrics_file:
+                return json.load(metrics_file)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _write(self, filename, data):
+        """
+        Replace the JSON file in the shared directory atomically.
+        """
+        path = self._get_path(filename)
+        with open(path + '.tmp', 'w') as metrics_file:
+            json.dump(data, metrics_file)
+        os.rename(path + '.tmp', path)
+
+
+class MetricsWriter(Thread):
+    """
+    Daemon thread periodically writing the registry's snapshot into the shared directory.
+    """
+
+    def __init__(self, registry, interval=5.0):
+        """
+        Initialize the writer for the given registry.
+
+        :param registry: The registry to write the snapshots of.
+        :param interval: The number of seconds between two writes.
+        """
+        super(MetricsWriter, self).__init__(name='metrics-writer')
+        self.daemon = True
+        self.registry = registry
+        self.interval = interval
+        self._stopped = Event()
+
+    def run(self):
+        """
+        Write the registry's snapshot every `interval` seconds until `stop` is called.
+        """
+        while not self._stopped.wait(self.interval):
+            try:
+                self.registry.dump()
+            except Exception:
+                pass
+
+    def stop(self):
+        """
+        Signal the thread to stop after the current iteration.
+        """
+        self._stopped.set()
+
+
+def from_entries(entries):
+    """
+    Return the dictionary of metrics represented by the JSON-serializable list of `[name, labels, value]`.
+    """
+    return merge_entries({}, entries)
+
+
+def is_locked(path):
+    """
+    Check if another process holds a lock on the file (i.e. its owner is still running).
+    """
+    try:
+        with open(path) as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except IOError:
+                return True
+            return False
+    except (IOError, OSError):
+        return False
+
+
+def merge(values, key, value):
+    """
+    Add the counter/gauge value or the histogram `value` to the entry `key` of `values`.
+    """
+    current = values.get(key)
+    if current is None:
+        values[key] = list(value) if isinstance(value, list) else value
+    elif isinstance(value, list):
+        values[key] = [a + b for a, b in zip(current, value)]
+    else:
+        values[key] = current + value
+
+
+def merge_entries(values, entries):
+    """
+    Add the JSON-serializable list of `[name, labels, value]` metrics to `values` and return it.
+    """
+    for name, labels, value in entries:
+        merge(values, (name, tuple(tuple(label) for label in labels)), value)
+    return values
+
+
+def remove(path):
+    """
+    Remove the file if it (still) exists.
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def to_entries(values):
+    """
+    Return the dictionary of metrics as JSON-serializable list of `[name, labels, value]`.
+    """
+    return [[name, labels, value] for (name, labels), value in values.items()]
+
+
+def render(snapshot):
+    """
+    Render the snapshot in the Prometheus text exposition format (version 0.0.4).
+    """
+    lines = []
+    series = {}
+    for kind in ('counters', 'gauges', 'histograms'):
+        for (name, labels), value in snapshot[kind].items():
+            series.setdefault(name, []).append((labels, value))
+
+    for name in sorted(series):
+        kind, help_text = METRICS.get(name, ('untyped', ''))
+        lines.append('# HELP %s %s' % (name, help_text))
+        lines.append('# TYPE %s %s' % (name, kind))
+        for labels, value in sorted(series[name]):
+            if kind != 'histogram':
+                lines.append('%s%s %s' % (name, format_labels(labels), format_value(value)))
+                continue
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), value[:-2]):
+                cumulative += count
+                bucket_labels = labels + (('le', str(bound)),)
+                lines.append('%s_bucket%s %d' % (name, format_labels(bucket_labels), cumulative))
+            lines.append('%s_sum%s %s' % (name, format_labels(labels), format_value(value[-2])))
+            lines.append('%s_count%s %d' % (name, format_labels(labels), value[-1]))
+    return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    """
+    Format the `(label, value)` pairs as Prometheus label set.
+    """
+    if not labels:
+        return ''
+    return '{%s}' % ','.join(
+        '%s="%s"' % (label, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for label, value in labels
+    )
+
+
+def format_value(value):
+    """
+    Format a sample value.
+    """
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
@@ -0,0 +1,224 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from coco.contract.backends import ContainerBackend
+from multiprocessing import Value
+from threading import Event, Thread
+import fcntl
+import logging
+import os
+import time
+
+
+"""
+Logger the refiller reports failures to.
+"""
+logger = logging.getLogger('coco.hostapi.pool')
+
+
+class WarmPool(object):
+    """
+    Set of pre-created containers for one container specification.
+
+    The available containers are files in the pool's directory (named after their creation time and
+    encoded ID), so the pool is shared by all worker processes: removing a file claims its container.
+    The hit and miss counters are process-shared values, created before the worker processes are forked.
+    """
+
+    def __init__(self, name, directory, specification, size=1, start=False, ignore=None):
+        """
+        Initialize the pool.
+
+        :param name: The name of the pool (e.g. the image).
+        :param directory: The directory to store the available containers in.
+        :param specification: The arguments of `create_container` the pooled containers are created with.
+        :param size: The number of containers to keep available.
+        :param start: If the pooled containers should be started (rather than only created).
+        :param ignore: The names of specification arguments requests may set to other values
+                       (e.g. the container's name); claimed containers keep the pool's values.
+        """
+        self.name = name
+        self.directory = directory
+        self.specification = specification
+        self.size = size
+        self.start = start
+        self.ignore = ignore or []
+        self._hits = Value('i', 0)
+        self._misses = Value('i', 0)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def add(self, container):
+        """
+        Make the (created and, if configured, started) container available.
+        """
+        path = os.path.join(self.directory, '%.6f-%s' % (time.time(), urlsafe_b64encode(container)))
+        open(path, 'w').close()
+
+    def claim(self):
+        """
+        Take the oldest available container out of the pool and return its ID (or `None` if there is none).
+        """
+        for filename in self._get_filenames():
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except OSError:
+                # claimed by another worker in the meantime
+                continue
+            with self._hits.get_lock():
+                self._hits.value += 1
+            return self._get_container(filename)
+        with self._misses.get_lock():
+            self._misses.value += 1
+        return None
+
+    def discard(self, containers):
+        """
+        Remove the available containers that are not in the given collection of existing ones.
+        """
+        for filename in self._get_filenames():
+            if self._get_container(filename) not in containers:
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+
+    def get_available(self):
+        """
+        Return the number of available containers.
+        """
+        return len(self._get_filenames())
+
+    def get_status(self):
+        """
+        Return the pool's size, occupancy and hit/miss counters.
+        """
+        return {
+            'size': self.size,
+            'available': self.get_available(),
+            'hits': self._hits.value,
+            'misses': self._misses.value
+        }
+
+    def matches(self, specification):
+        """
+        Check if a container created with the `specification` could be taken from this pool.
+        """
+        def relevant(arguments):
+            return dict((key, value) for key, value in arguments.items() if key not in self.ignore)
+        return relevant(specification) == relevant(self.specification)
+
+    def _get_container(self, filename):
+        """
+        Return the ID of the container the file of the directory stands for.
+        """
+        return urlsafe_b64decode(filename.split('-', 1)[1])
+
+    def _get_filenames(self):
+        """
+        Return the files of the available containers, oldest first.
+        """
+        return sorted(filename for filename in os.listdir(self.directory) if not filename.startswith('.'))
+
+
+class WarmPoolManager(object):
+    """
+    Collection of the warm pools of the node.
+    """
+
+    def __init__(self, pools, directory):
+        """
+        Initialize a pool for every configured specification.
+
+        :param pools: Dictionary mapping pool names to dictionaries with the `specification`,
+                      `size`, `start` and `ignore` arguments of their pool.
+        :param directory: The directory to store the pools in (shared by the worker processes).
+        """
+        self.directory = directory
+        self.pools = dict(
+            (name, WarmPool(name, os.path.join(directory, urlsafe_b64encode(name)), **options))
+            for name, options in pools.items()
+        )
+
+    def claim(self, specification):
+        """
+        Return a pooled container matching the specification or `None` if there is none.
+        """
+        for pool in self.pools.values():
+            if pool.matches(specification):
+                return pool.claim()
+        return None
+
+    def get_status(self):
+        """
+        Return the status of all pools, by name.
+        """
+        return dict((name, pool.get_status()) for name, pool in self.pools.items())
+
+
+class WarmPoolRefiller(Thread):
+    """
+    Daemon thread creating containers for the warm pools until they are full again.
+
+    Only one process on the node refills at a time (the one holding the lock on the `refiller.lock`
+    file); the others stand by. Pooled containers that no longer exist in the backend are dropped.
+    """
+
+    def __init__(self, manager, backend, interval=5.0):
+        """
+        Initialize the refiller.
+
+        :param manager: The manager of the pools to refill.
+        :param backend: The container backend to create the containers with.
+        :param interval: The number of seconds between two checks of the pools.
+        """
+        super(WarmPoolRefiller, self).__init__(name='warm-pool-refiller')
+        self.daemon = True
+        self.manager = manager
+        self.backend = backend
+        self.interval = interval
+        self._stopped = Event()
+
+    def refill(self):
+        """
+        Drop vanished containers and create the missing ones of all pools.
+        """
+        containers = set(container.get(ContainerBackend.KEY_PK) for container in self.backend.get_containers())
+        for pool in self.manager.pools.values():
+            pool.discard(containers)
+            for _ in xrange(pool.size - pool.get_available()):
+                if self._stopped.is_set():
+                    return
+                container = self.backend.create_container(**pool.specification)
+                if pool.start:
+                    try:
+                        self.backend.start_container(container)
+                    except Exception:
+                        # do not leave a container behind for every failed attempt
+                        logger.exception("Starting container %s for warm pool %s failed", container, pool.name)
+                        self.backend.delete_container(container)
+                        raise
+                pool.add(container)
+
+    def run(self):
+        """
+        Wait to become the node's refiller and check the pools every `interval` seconds.
+        """
+        with open(os.path.join(self.manager.directory, 'refiller.lock'), 'a') as lock_file:
+            while not self._stopped.is_set():
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except IOError:
+                    self._stopped.wait(self.interval)
+            # the lock is held until the process exits, then another one takes over
+            while not self._stopped.is_set():
+                try:
+                    self.refill()
+                except Exception:
+                    logger.exception("Refilling the warm pools failed")
+                self._stopped.wait(self.interval)
+
+    def stop(self):
+        """
+        Signal the thread to stop after the current container.
+        """
+        self._stopped.set()
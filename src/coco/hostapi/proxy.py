@@ -0,0 +1,264 @@
+from coco.hostapi import config
+from coco.hostapi.execution import offload
+from coco.hostapi.http.instrumentation import get_request_id
+from concurrent.futures import Future
+from datetime import datetime
+from functools import wraps
+from threading import Lock
+import errno
+import fcntl
+import hashlib
+import os
+import time
+
+
+class BackendProxy(object):
+    """
+    Base class for transparent proxies around a container backend wrapping its public methods.
+
+    The proxy reports the wrapped backend's class as its own, so `isinstance` checks
+    (e.g. for `SnapshotableContainerBackend`) keep working. Proxies can be stacked.
+    """
+
+    def __init__(self, backend):
+        """
+        Initialize the proxy for the given backend.
+        """
+        self._backend = backend
+        self._methods = {}
+
+    @property
+    def __class__(self):
+        """
+        Return the class of the wrapped backend.
+        """
+        return self._backend.__class__
+
+    def __getattr__(self, name):
+        """
+        Return the wrapped backend's attribute, wrapped by `_wrap` if it is a public method.
+        """
+        method = self._methods.get(name)
+        if method is not None:
+            return method
+
+        attribute = getattr(self._backend, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+
+        method = self._methods[name] = self._wrap(name, attribute)
+        return method
+
+    def _wrap(self, name, method):
+        """
+        Return the wrapper to use instead of the backend method `name`.
+        """
+        raise NotImplementedError
+
+
+class CoalescingBackend(BackendProxy):
+    """
+    Proxy coalescing identical concurrent read calls and serializing mutating calls per container.
+
+    Concurrent calls of a read method (`get_*`) with equal arguments share a single backend
+    call and its result (or exception), so results must be treated as read-only. Mutating calls
+    on the same container are run one after the other: within the process by a lock per container
+    and, if a `directory` is given, across the worker processes by an exclusive `flock` on a lock
+    file per container in that directory. Without a directory, calls of different processes are
+    not serialized.
+    """
+
+    """
+    Names of the methods changing a container's state; their first argument is the container.
+    """
+    MUTATING_METHODS = (
+        'create_container_snapshot',
+        'delete_container',
+        'restart_container',
+        'restore_container_snapshot',
+        'resume_container',
+        'start_container',
+        'stop_container',
+        'suspend_container'
+    )
+
+    def __init__(self, backend, directory=None):
+        """
+        Initialize the proxy for the given backend.
+
+        :param backend: The container backend to wrap.
+        :param directory: The directory to keep the containers' lock files in (shared by the worker processes).
+        """
+        super(CoalescingBackend, self).__init__(backend)
+        self.directory = directory
+        if directory is not None and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._calls = {}
+        self._calls_lock = Lock()
+        self._container_locks = {}
+        self._container_locks_lock = Lock()
+
+    def _coalesce(self, name, method):
+        """
+        Wrap the read method so identical concurrent calls share one backend call.
+        """
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            try:
+                key = (name, args, frozenset(kwargs.items()))
+                hash(key)
+            except TypeError:
+                return method(*args, **kwargs)
+
+            with self._calls_lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = Future()
+            if not leader:
+                return call.result()
+
+            try:
+                result = method(*args, **kwargs)
+                call.set_result(result)
+                return result
+            except BaseException as ex:
+                call.set_exception(ex)
+                raise
+            finally:
+                with self._calls_lock:
+                    del self._calls[key]
+        return wrapper
+
+    def _get_lock_path(self, container):
+        """
+        Return the path of the container's lock file (IDs might contain path separators, so they are hashed).
+        """
+        return os.path.join(self.directory, hashlib.sha1('%s' % container).hexdigest() + '.lock')
+
+    def _lock_container(self, container):
+        """
+        Wait for and return the exclusive lock on the container's lock file (released by closing it).
+
+        The lock is polled with increasing delays: the gevent engine's (patched) `time.sleep`
+        yields to the other coroutines, unlike a blocking `flock`.
+        """
+        lock_file = open(self._get_lock_path(container), 'a')
+        delay = 0.001
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return lock_file
+            except IOError:
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+
+    def _remove_lock_file(self, container):
+        """
+        Remove the lock file of the deleted container, so the directory does not grow with every container.
+
+        Calls still waiting for the removed file's lock can only fail on the deleted container anyway.
+        """
+        try:
+            os.remove(self._get_lock_path(container))
+        except OSError as ex:
+            if ex.errno != errno.ENOENT:
+                raise
+
+    def _serialize(self, name, method):
+        """
+        Wrap the mutating method so calls on the same container do not run concurrently.
+        """
+        @wraps(method)
+        def wrapper(container, *args, **kwargs):
+            with self._container_locks_lock:
+                lock = self._container_locks.get(container)
+                if lock is None:
+                    lock = self._container_locks[container] = [Lock(), 0]
+                lock[1] += 1
+            try:
+                with lock[0]:
+                    if self.directory is None:
+                        return method(container, *args, **kwargs)
+                    lock_file = self._lock_container(container)
+                    try:
+                        result = method(container, *args, **kwargs)
+                        if name == 'delete_container':
+                            self._remove_lock_file(container)
+                        return result
+                    finally:
+                        lock_file.close()
+            finally:
+                with self._container_locks_lock:
+                    lock[1] -= 1
+                    if lock[1] == 0:
+                        del self._container_locks[container]
+        return wrapper
+
+    def _wrap(self, name, method):
+        """
+        Return the coalescing/serializing wrapper for the backend method.
+        """
+        if name.startswith('get_'):
+            return self._coalesce(name, method)
+        if name in CoalescingBackend.MUTATING_METHODS:
+            return self._serialize(name, method)
+        return method
+
+
+class InstrumentedBackend(BackendProxy):
+    """
+    Proxy recording the latency of every backend method call.
+
+    Calls taking longer than the slow-call threshold are written to the slow-call log
+    along with the ID of the request that caused them (see `get_request_id`).
+    """
+
+    def _wrap(self, name, method):
+        """
+        Wrap the backend method so its calls are timed.
+        """
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.time()
+            outcome = 'error'
+            try:
+                result = method(*args, **kwargs)
+                outcome = 'ok'
+                return result
+            finally:
+                duration = time.time() - start
+                if config.metrics is not None:
+                    config.metrics.observe(
+                        'hostapi_backend_call_duration_seconds',
+                        (('method', name), ('outcome', outcome)),
+                        duration
+                    )
+                if config.slow_call_log is not None and duration >= config.slow_call_log.threshold:
+                    # only the leading ID, other arguments might contain secrets (e.g. commands or passwords)
+                    config.slow_call_log.record(duration, {
+                        'timestamp': datetime.utcfromtimestamp(start).isoformat() + 'Z',
+                        'request_id': get_request_id(),
+                        'method': name,
+                        'id': args[0] if args and isinstance(args[0], basestring) else None,
+                        'outcome': outcome
+                    })
+        return wrapper
+
+
+class OffloadingBackend(BackendProxy):
+    """
+    Proxy running every backend method call on the gevent engine's pool of threads (see `offload`).
+
+    The backend's calls might block in ways coroutines cannot yield from (e.g. in C extensions),
+    so they are run on real threads. The size of the pool bounds the number of concurrent calls.
+    """
+
+    def _wrap(self, name, method):
+        """
+        Wrap the backend method so its calls are offloaded.
+        """
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            return offload(method, *args, **kwargs)
+        return wrapper
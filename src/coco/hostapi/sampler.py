@@ -0,0 +1,109 @@
+from datetime import datetime
+from threading import Event, Lock, Thread
+
+
+def sample_resources(backend, cpu_interval=None):
+    """
+    Take a snapshot of the container backend's status and the host's resource usage.
+
+    :param backend: The container backend to query for its status.
+    :param cpu_interval: Passed to `psutil.cpu_percent`; `None` measures since the previous call.
+    """
+    # imported on first use, it is not needed to start serving requests
+    import psutil
+    return {
+        'backends': {
+            'container': {
+                'status': backend.get_status()
+            }
+        },
+        'resources': {
+            'cpu': {
+                'count': psutil.cpu_count(),
+                'usage': psutil.cpu_percent(interval=cpu_interval)
+            },
+            'disk': psutil.disk_usage('/').__dict__,
+            'memory': psutil.virtual_memory().__dict__,
+            'swap': psutil.swap_memory().__dict__
+        },
+        'sampled_at': datetime.utcnow().isoformat() + 'Z'
+    }
+
+
+class ResourceSampler(Thread):
+    """
+    Daemon thread periodically sampling the node's status so requests can serve the latest snapshot.
+
+    Because `psutil.cpu_percent` is called once per interval without blocking,
+    the reported CPU usage is the average over the last sampling interval.
+    """
+
+    def __init__(self, backend, interval=5.0):
+        """
+        Initialize the sampler for the given container backend.
+
+        :param backend: The container backend to query for its status.
+        :param interval: The number of seconds between two samples.
+        """
+        super(ResourceSampler, self).__init__(name='resource-sampler')
+        self.daemon = True
+        self.backend = backend
+        self.interval = interval
+        self._error = None
+        self._lock = Lock()
+        self._snapshot = None
+        self._stopped = Event()
+
+    def get_snapshot(self):
+        """
+        Return the most recent snapshot.
+
+        If the most recent sampling attempt failed, the last good snapshot is returned with
+        `stale` set and the `error` of the failed attempt; its `sampled_at` tells how old it is.
+        The exception is only re-raised if no snapshot has been taken yet. If no sampling has
+        been attempted yet, a sample is taken synchronously.
+        """
+        with self._lock:
+            snapshot, error = self._snapshot, self._error
+        if error is not None:
+            if snapshot is None:
+                raise error
+            return dict(snapshot, stale=True, error=str(error) or error.__class__.__name__)
+        if snapshot is None:
+            snapshot = self.sample()
+        return snapshot
+
+    def run(self):
+        """
+        Sample the node's status every `interval` seconds until `stop` is called.
+        """
+        import psutil
+
+        # the first call only primes psutil's CPU counters
+        psutil.cpu_percent(interval=None)
+        while not self._stopped.is_set():
+            try:
+                self.sample()
+            except Exception:
+                pass
+            self._stopped.wait(self.interval)
+
+    def sample(self):
+        """
+        Take a new snapshot and store it as the most recent one.
+        """
+        try:
+            snapshot = sample_resources(self.backend)
+        except Exception as ex:
+            with self._lock:
+                self._error = ex
+            raise
+        with self._lock:
+            self._snapshot, self._error = snapshot, None
+        return snapshot
+
+    def stop(self):
+        """
+        Signal the thread to stop after the current iteration.
+        """
+        self._stopped.set()
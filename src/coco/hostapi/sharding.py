@@ -0,0 +1,235 @@
+from collections import OrderedDict
+from coco.contract.backends import ContainerBackend, SnapshotableContainerBackend, SuspendableContainerBackend
+from coco.contract.errors import ContainerImageNotFoundError, ContainerNotFoundError, ContainerSnapshotNotFoundError
+from coco.hostapi.execution import map_concurrently
+from functools import wraps
+from itertools import chain, cycle
+from threading import Lock
+
+
+"""
+Separator between the name of a backend and the ID of one of its items (e.g. `docker1/4fa6e0f0c678`).
+"""
+SEPARATOR = '/'
+
+
+class ShardedBackend(object):
+    """
+    Container backend spreading the containers, images and snapshots across several named backends.
+
+    The IDs of the items are prefixed with the name of their backend, so calls on existing items
+    are routed by their IDs. Listings query all backends concurrently and merge their results.
+    New items are created on the backend of the item they are based on (e.g. a container on the
+    backend of its image) or, if there is none, on the backends in turn.
+
+    The sharded backend is an instance of the contract's backend classes (e.g. `SnapshotableContainerBackend`)
+    all backends are instances of, and only has the optional methods all of them have.
+    """
+
+    """
+    Dictionary mapping the methods called on the backend of their leading ID arguments to the errors
+    raised if the corresponding argument is not an ID of a known backend.
+    """
+    ROUTED_METHODS = {
+        'create_container_snapshot': (ContainerNotFoundError,),
+        'delete_container': (ContainerNotFoundError,),
+        'delete_container_image': (ContainerImageNotFoundError,),
+        'delete_container_snapshot': (ContainerSnapshotNotFoundError,),
+        'exec_in_container': (ContainerNotFoundError,),
+        'export_container_image': (ContainerImageNotFoundError,),
+        'export_container_snapshot': (ContainerSnapshotNotFoundError,),
+        'get_container': (ContainerNotFoundError,),
+        'get_container_image': (ContainerImageNotFoundError,),
+        'get_container_logs': (ContainerNotFoundError,),
+        'get_container_snapshot': (ContainerSnapshotNotFoundError,),
+        'get_container_stats': (ContainerNotFoundError,),
+        'get_containers_snapshots': (ContainerNotFoundError,),
+        'restart_container': (ContainerNotFoundError,),
+        'restore_container_snapshot': (ContainerNotFoundError, ContainerSnapshotNotFoundError),
+        'resume_container': (ContainerNotFoundError,),
+        'start_container': (ContainerNotFoundError,),
+        'stop_container': (ContainerNotFoundError,),
+        'suspend_container': (ContainerNotFoundError,)
+    }
+
+    """
+    Names of the methods listing items, which are called on all backends.
+    """
+    LISTING_METHODS = ('get_container_images', 'get_container_snapshots', 'get_containers')
+
+    """
+    Names of the methods creating items from keyword arguments only (see `REFERENCE_KEYS`).
+    """
+    CREATING_METHODS = ('create_container', 'create_container_image', 'import_container_image', 'import_container_snapshot')
+
+    """
+    Names of the methods returning IDs or items, whose IDs are prefixed with the name of their backend.
+    """
+    ENCODED_METHODS = (
+        'create_container',
+        'create_container_image',
+        'create_container_snapshot',
+        'get_container',
+        'get_container_image',
+        'get_container_images',
+        'get_container_snapshot',
+        'get_container_snapshots',
+        'get_containers',
+        'get_containers_snapshots',
+        'import_container_image',
+        'import_container_snapshot',
+        'restore_container_snapshot'
+    )
+
+    """
+    Attributes of items and arguments of the `CREATING_METHODS` referencing other items by their ID.
+    """
+    REFERENCE_KEYS = ('container', 'image')
+
+    def __init__(self, backends):
+        """
+        Initialize the sharded backend.
+
+        :param backends: List of tuples of the names of the backends and the (initialized) backends.
+        """
+        self.backends = OrderedDict(backends)
+        self._methods = {}
+        self._turns = cycle(list(self.backends))
+        self._turns_lock = Lock()
+        bases = tuple(
+            base for base in (SnapshotableContainerBackend, SuspendableContainerBackend)
+            if all(isinstance(backend, base) for backend in self.backends.values())
+        )
+        self._class = type('ShardedContainerBackend', bases or (ContainerBackend,), {})
+
+    @property
+    def __class__(self):
+        """
+        Return a class deriving from the contract's backend classes all backends are instances of.
+        """
+        return self._class
+
+    def __getattr__(self, name):
+        """
+        Return the sharded version of the backend method `name`, if all backends have it.
+        """
+        method = self._methods.get(name)
+        if method is not None:
+            return method
+
+        if name.startswith('_') or not all(hasattr(backend, name) for backend in self.backends.values()):
+            raise AttributeError(name)
+        if name in ShardedBackend.ROUTED_METHODS:
+            method = self._route(name)
+        elif name in ShardedBackend.LISTING_METHODS:
+            method = self._merge(name)
+        elif name in ShardedBackend.CREATING_METHODS:
+            method = self._place(name)
+        else:
+            raise AttributeError(name)
+        self._methods[name] = method
+        return method
+
+    def get_status(self):
+        """
+        Return `BACKEND_STATUS_OK` if all backends are OK, otherwise the first other status.
+        """
+        statuses = map_concurrently(lambda backend: backend.get_status(), self.backends.values(), len(self.backends))
+        for status in statuses:
+            if status != ContainerBackend.BACKEND_STATUS_OK:
+                return status
+        return ContainerBackend.BACKEND_STATUS_OK
+
+    def _decode(self, identifier, error):
+        """
+        Return the name of the backend of the prefixed ID and the ID within that backend.
+
+        :raises error: If the ID is not prefixed with the name of a known backend.
+        """
+        name, rest = split_id(identifier)
+        if name not in self.backends:
+            raise error
+        return name, rest
+
+    def _encode(self, name, value):
+        """
+        Prefix the ID (or the IDs of the item or list of items) with the name of the backend.
+        """
+        if isinstance(value, basestring):
+            return name + SEPARATOR + value
+        if isinstance(value, (list, tuple)):
+            return [self._encode(name, item) for item in value]
+        if isinstance(value, dict):
+            value = dict(value)
+            for key in (ContainerBackend.KEY_PK,) + ShardedBackend.REFERENCE_KEYS:
+                if isinstance(value.get(key), basestring):
+                    value[key] = name + SEPARATOR + value[key]
+        return value
+
+    def _call(self, name, method, args, kwargs):
+        """
+        Call the method of the named backend with the arguments and prefix the IDs of its result (if any).
+        """
+        result = getattr(self.backends[name], method)(*args, **kwargs)
+        if method in ShardedBackend.ENCODED_METHODS:
+            return self._encode(name, result)
+        return result
+
+    def _merge(self, method):
+        """
+        Return the listing method calling all backends concurrently and concatenating their results.
+        """
+        @wraps(getattr(self.backends.values()[0], method))
+        def wrapper(*args, **kwargs):
+            names = list(self.backends)
+            results = map_concurrently(lambda name: self._call(name, method, args, kwargs), names, len(names))
+            return list(chain.from_iterable(results))
+        return wrapper
+
+    def _place(self, method):
+        """
+        Return the creating method calling the backend of the first prefixed reference among the
+        keyword arguments (without its prefix) or, if there is none, the next backend in turn.
+        """
+        @wraps(getattr(self.backends.values()[0], method))
+        def wrapper(*args, **kwargs):
+            for key in ShardedBackend.REFERENCE_KEYS:
+                if isinstance(kwargs.get(key), basestring):
+                    name, reference = split_id(kwargs[key])
+                    if name in self.backends:
+                        kwargs[key] = reference
+                        return self._call(name, method, args, kwargs)
+            with self._turns_lock:
+                name = next(self._turns)
+            return self._call(name, method, args, kwargs)
+        return wrapper
+
+    def _route(self, method):
+        """
+        Return the method calling the backend its leading ID arguments belong to (without their prefixes).
+        """
+        errors = ShardedBackend.ROUTED_METHODS[method]
+
+        @wraps(getattr(self.backends.values()[0], method))
+        def wrapper(*args, **kwargs):
+            decoded = [self._decode(identifier, error) for identifier, error in zip(args, errors)]
+            name = decoded[0][0]
+            for (other, _), error in zip(decoded[1:], errors[1:]):
+                # items of different backends cannot belong together
+                if other != name:
+                    raise error
+            args = [identifier for _, identifier in decoded] + list(args[len(decoded):])
+            return self._call(name, method, args, kwargs)
+        return wrapper
+
+
+def split_id(identifier):
+    """
+    Return the name of the backend of the prefixed ID and the ID within that backend.
+
+    IDs without prefix (e.g. of an unsharded backend) are returned as they are, with `None` as backend name.
+    """
+    name, separator, rest = ('%s' % identifier).partition(SEPARATOR)
+    if not separator:
+        return None, identifier
+    return name, rest
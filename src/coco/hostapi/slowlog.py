@@ -0,0 +1,75 @@
+from Queue import Empty, Full, Queue
+from threading import Event, Thread
+import json
+import logging
+
+
+"""
+Logger the slow-call records are written to (as JSON objects, one per line).
+"""
+logger = logging.getLogger('coco.hostapi.slowlog')
+
+
+class SlowCallLog(Thread):
+    """
+    Daemon thread writing slow-call records to the `coco.hostapi.slowlog` logger.
+
+    Records are handed over through a bounded queue without ever blocking, so logging does
+    not add latency to the request path. Records are dropped (and counted) if the queue is full.
+    """
+
+    def __init__(self, threshold=1.0, max_queued=1000):
+        """
+        Initialize the log.
+
+        :param threshold: The number of seconds above which a call is considered slow.
+        :param max_queued: The maximum number of records waiting to be written.
+        """
+        super(SlowCallLog, self).__init__(name='slow-call-log')
+        self.daemon = True
+        self.threshold = threshold
+        self.dropped = 0
+        self._queue = Queue(maxsize=max_queued)
+        self._stopped = Event()
+
+    def record(self, duration, entry):
+        """
+        Queue the record `entry` for writing if the call took at least `threshold` seconds.
+
+        :param duration: The call's duration in seconds.
+        :param entry: Dictionary describing the call.
+        """
+        if duration < self.threshold:
+            return
+        entry['duration'] = duration
+        try:
+            self._queue.put_nowait(entry)
+        except Full:
+            self.dropped += 1
+
+    def run(self):
+        """
+        Write the queued records until `stop` is called.
+        """
+        while not self._stopped.is_set():
+            try:
+                entry = self._queue.get(timeout=1.0)
+            except Empty:
+                continue
+            if entry is None:
+                continue
+            try:
+                logger.warning(json.dumps(entry, default=repr))
+            except Exception:
+                pass
+
+    def stop(self):
+        """
+        Signal the thread to stop after the current record.
+        """
+        self._stopped.set()
+        # wake up the thread waiting for records
+        try:
+            self._queue.put_nowait(None)
+        except Full:
+            pass
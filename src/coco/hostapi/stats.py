@@ -0,0 +1,346 @@
+from array import array
+from coco.contract.backends import ContainerBackend
+from coco.hostapi.execution import map_concurrently
+from coco.hostapi.sharding import split_id
+from datetime import datetime
+from threading import Event, Lock, Thread
+import fcntl
+import json
+import os
+import time
+
+
+"""
+Names of the per-container stats: CPU usage (in cores), memory usage (in bytes)
+and network/block I/O throughput (in bytes per second).
+"""
+STATS_KEYS = ('cpu', 'memory', 'network_rx', 'network_tx', 'block_read', 'block_write')
+
+
+"""
+Names of the cumulative counters the stats are computed from, with the stat they feed
+and the factor converting the counter's unit (CPU time is in nanoseconds).
+"""
+COUNTERS = {
+    'cpu_time': ('cpu', 1e-9),
+    'network_rx_bytes': ('network_rx', 1),
+    'network_tx_bytes': ('network_tx', 1),
+    'block_read_bytes': ('block_read', 1),
+    'block_write_bytes': ('block_write', 1)
+}
+
+
+"""
+History windows reported along the latest stats, as tuples of their name,
+length and the length of the intervals the samples are averaged over (both in seconds).
+"""
+WINDOWS = (
+    ('1m', 60, 5),
+    ('15m', 900, 60),
+    ('1h', 3600, 300)
+)
+
+
+class TimeSeries(object):
+    """
+    Fixed-size ring buffer of stats samples.
+
+    Timestamps and every stat are stored in arrays of doubles, so a container's history takes
+    `8 * (1 + len(STATS_KEYS)) * capacity` bytes regardless of its age. Missing values are NaN.
+    """
+
+    __slots__ = ('capacity', 'count', 'index', 'timestamps', 'values')
+
+    def __init__(self, capacity):
+        """
+        Initialize an empty series.
+
+        :param capacity: The number of samples kept.
+        """
+        self.capacity = capacity
+        self.count = 0
+        self.index = 0
+        self.timestamps = array('d', [0.0]) * capacity
+        self.values = [array('d', [0.0]) * capacity for _ in STATS_KEYS]
+
+    def append(self, timestamp, sample):
+        """
+        Add a sample, overwriting the oldest one once the buffer is full.
+
+        :param timestamp: The UNIX time the sample was taken at.
+        :param sample: Dictionary mapping (some of) the `STATS_KEYS` to their values.
+        """
+        self.timestamps[self.index] = timestamp
+        for key, values in zip(STATS_KEYS, self.values):
+            value = sample.get(key)
+            values[self.index] = float(value) if value is not None else float('nan')
+        self.index = (self.index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def downsample(self, since, step):
+        """
+        Return the averages of the samples taken after `since` over consecutive intervals of `step` seconds.
+
+        Intervals without samples are left out.
+        """
+        buckets = {}
+        for position in self._positions():
+            timestamp = self.timestamps[position]
+            if timestamp <= since:
+                continue
+            bucket = buckets.setdefault(int((timestamp - since) // step), [[0.0, 0] for _ in STATS_KEYS])
+            for total, values in zip(bucket, self.values):
+                value = values[position]
+                # NaN is the only value not equal to itself
+                if value == value:
+                    total[0] += value
+                    total[1] += 1
+        return [
+            dict(
+                [('timestamp', format_timestamp(since + number * step))] +
+                [(key, total[0] / total[1] if total[1] else None) for key, total in zip(STATS_KEYS, buckets[number])]
+            )
+            for number in sorted(buckets)
+        ]
+
+    def latest(self):
+        """
+        Return the most recent sample or `None` if the series is empty.
+        """
+        if self.count == 0:
+            return None
+        position = (self.index - 1) % self.capacity
+        return self._get_sample(position)
+
+    def _get_sample(self, position):
+        """
+        Return the sample stored at `position` as dictionary.
+        """
+        sample = {'timestamp': format_timestamp(self.timestamps[position])}
+        for key, values in zip(STATS_KEYS, self.values):
+            value = values[position]
+            sample[key] = value if value == value else None
+        return sample
+
+    def _positions(self):
+        """
+        Return the buffer positions of the samples, oldest first.
+        """
+        return [(self.index - self.count + number) % self.capacity for number in xrange(self.count)]
+
+
+class StatsCollector(Thread):
+    """
+    Daemon thread sampling the resource usage of every running container at a fixed interval.
+
+    Only one process on the node collects at a time (the one holding the lock on the `collector.lock`
+    file). After every round it writes the stats of all containers (latest sample and history windows)
+    to a file in the shared directory, from which the other processes serve them.
+
+    Counters are read from the backend's `get_container_stats(container)` method if it has one
+    (returning a dictionary with the `COUNTERS` and `memory`), otherwise from the container's cgroups.
+    """
+
+    def __init__(self, backend, directory, interval=5.0, max_workers=8, cgroup_root='/sys/fs/cgroup',
+                 cgroup_parent='docker'):
+        """
+        Initialize the collector.
+
+        :param backend: The container backend to read the (running) containers from.
+        :param directory: The directory shared with the other worker processes.
+        :param interval: The number of seconds between two samples.
+        :param max_workers: The maximum number of containers sampled concurrently.
+        :param cgroup_root: The mount point of the cgroup hierarchies.
+        :param cgroup_parent: The parent cgroup of the containers' cgroups.
+        """
+        super(StatsCollector, self).__init__(name='stats-collector')
+        self.daemon = True
+        self.backend = backend
+        self.directory = directory
+        self.interval = interval
+        self.max_workers = max_workers
+        self.cgroup_root = cgroup_root
+        self.cgroup_parent = cgroup_parent
+        self._counters = {}
+        self._loaded_at = None
+        self._lock = Lock()
+        self._series = {}
+        self._stats = {}
+        self._stopped = Event()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def collect(self):
+        """
+        Sample all running containers and publish their stats.
+        """
+        containers = [
+            container.get(ContainerBackend.KEY_PK)
+            for container in self.backend.get_containers()
+            if container.get(ContainerBackend.CONTAINER_KEY_STATUS) == ContainerBackend.CONTAINER_STATUS_RUNNING
+        ]
+        counters = map_concurrently(self._read_counters, containers, self.max_workers)
+        now = time.time()
+
+        for container, current in zip(containers, counters):
+            if current is None:
+                continue
+            previous, self._counters[container] = self._counters.get(container), (now, current)
+            sample = {'memory': current.get('memory')}
+            if previous is not None and now > previous[0]:
+                for counter, (key, factor) in COUNTERS.items():
+                    if current.get(counter) is not None and previous[1].get(counter) is not None:
+                        # counters are reset when the container restarts
+                        sample[key] = max(0, current[counter] - previous[1][counter]) * factor / (now - previous[0])
+            series = self._series.get(container)
+            if series is None:
+                series = self._series[container] = TimeSeries(int(WINDOWS[-1][1] / self.interval) + 1)
+            series.append(now, sample)
+
+        # forget containers that are not running anymore
+        for container in set(self._series) - set(containers):
+            del self._series[container]
+            self._counters.pop(container, None)
+
+        stats = dict((container, self._get_stats(container, series, now)) for container, series in self._series.items())
+        path = os.path.join(self.directory, 'stats.json')
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'w') as stats_file:
+            json.dump(stats, stats_file)
+        os.rename(tmp_path, path)
+        with self._lock:
+            self._stats = stats
+
+    def get_stats(self, container=None):
+        """
+        Return the stats of the container (`None` if there are none) or, without container, of all containers.
+
+        The stats published by the collecting process are re-read if they have changed since the last call.
+        """
+        path = os.path.join(self.directory, 'stats.json')
+        with self._lock:
+            try:
+                modified_at = os.path.getmtime(path)
+                if modified_at != self._loaded_at:
+                    with open(path) as stats_file:
+                        self._stats = json.load(stats_file)
+                    self._loaded_at = modified_at
+            except (IOError, OSError, ValueError):
+                pass
+            stats = self._stats
+        if container is None:
+            return stats.values()
+        return stats.get(container)
+
+    def run(self):
+        """
+        Wait to become the node's collector and sample the containers every `interval` seconds.
+        """
+        with open(os.path.join(self.directory, 'collector.lock'), 'a') as lock_file:
+            while not self._stopped.is_set():
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except IOError:
+                    self._stopped.wait(self.interval)
+            # the lock is held until the process exits, then another one takes over
+            while not self._stopped.is_set():
+                try:
+                    self.collect()
+                except Exception:
+                    pass
+                self._stopped.wait(self.interval)
+
+    def stop(self):
+        """
+        Signal the thread to stop after the current round.
+        """
+        self._stopped.set()
+
+    def _get_stats(self, container, series, now):
+        """
+        Return the latest sample and the history windows of the container's series.
+        """
+        return {
+            'container': container,
+            'latest': series.latest(),
+            'history': dict((name, series.downsample(now - length, step)) for name, length, step in WINDOWS)
+        }
+
+    def _read_counters(self, container):
+        """
+        Return the container's current counters or `None` if they cannot be read.
+        """
+        try:
+            if hasattr(self.backend, 'get_container_stats'):
+                return self.backend.get_container_stats(container)
+            # the cgroups are named after the container's ID within its backend (without the shard prefix)
+            return read_cgroup_counters(split_id(container)[1], self.cgroup_root, self.cgroup_parent)
+        except Exception:
+            return None
+
+
+def format_timestamp(timestamp):
+    """
+    Return the UNIX time as ISO 8601 timestamp.
+    """
+    return datetime.utcfromtimestamp(timestamp).isoformat() + 'Z'
+
+
+def get_empty_stats(container):
+    """
+    Return the stats of a container without samples (e.g. stopped or created since the last round).
+    """
+    return {
+        'container': container,
+        'latest': None,
+        'history': dict((name, []) for name, _, _ in WINDOWS)
+    }
+
+
+def read_cgroup_counters(container, root='/sys/fs/cgroup', parent='docker'):
+    """
+    Read the container's counters from its (v1) cgroups.
+
+    Network counters are read from the network namespace of the container's first process.
+    Counters whose files do not exist are left out.
+
+    :param container: The ID of the container (and name of its cgroups).
+    :param root: The mount point of the cgroup hierarchies.
+    :param parent: The parent cgroup of the containers' cgroups.
+    """
+    def get_path(subsystem, filename):
+        return os.path.join(root, subsystem, parent, container, filename)
+
+    counters = {}
+    with open(get_path('cpuacct', 'cpuacct.usage')) as usage_file:
+        counters['cpu_time'] = int(usage_file.read())
+    try:
+        with open(get_path('memory', 'memory.usage_in_bytes')) as usage_file:
+            counters['memory'] = int(usage_file.read())
+    except IOError:
+        pass
+    try:
+        with open(get_path('blkio', 'blkio.throttle.io_service_bytes')) as io_file:
+            for line in io_file:
+                fields = line.split()
+                if len(fields) == 3 and fields[1] in ('Read', 'Write'):
+                    key = 'block_read_bytes' if fields[1] == 'Read' else 'block_write_bytes'
+                    counters[key] = counters.get(key, 0) + int(fields[2])
+    except IOError:
+        pass
+    try:
+        with open(get_path('cpuacct', 'tasks')) as tasks_file:
+            pid = tasks_file.readline().strip()
+        if pid:
+            with open('/proc/%s/net/dev' % pid) as net_file:
+                # the first two lines are headers
+                for line in list(net_file)[2:]:
+                    interface, fields = line.split(':', 1)
+                    fields = fields.split()
+                    if interface.strip() != 'lo':
+                        counters['network_rx_bytes'] = counters.get('network_rx_bytes', 0) + int(fields[0])
+                        counters['network_tx_bytes'] = counters.get('network_tx_bytes', 0) + int(fields[8])
+    except IOError:
+        pass
+    return counters
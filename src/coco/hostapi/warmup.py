@@ -0,0 +1,80 @@
+from threading import Event, Lock, Thread
+
+
+class WarmUp(Thread):
+    """
+    Daemon thread running the tasks a worker process completes before it is ready to take traffic.
+
+    The tasks (e.g. taking the first status sample or filling caches) run one after the other;
+    failed ones are retried until they succeed. The process reports ready (see `/ready`)
+    once all of them have succeeded.
+    """
+
+    """
+    States of a warm-up task.
+    """
+    TASK_PENDING = 'pending'
+    TASK_DONE = 'done'
+    TASK_FAILED = 'failed'
+
+    def __init__(self, retry_interval=1.0):
+        """
+        Initialize the warm-up.
+
+        :param retry_interval: The number of seconds to wait before retrying a failed task.
+        """
+        super(WarmUp, self).__init__(name='warm-up')
+        self.daemon = True
+        self.retry_interval = retry_interval
+        self._lock = Lock()
+        self._stopped = Event()
+        self._tasks = []
+        self._states = {}
+
+    def add_task(self, name, func, *args, **kwargs):
+        """
+        Add a task calling `func(*args, **kwargs)`; must be called before the thread is started.
+        """
+        self._tasks.append((name, func, args, kwargs))
+        self._states[name] = WarmUp.TASK_PENDING
+
+    def get_status(self):
+        """
+        Return a dictionary telling if the process is ready and the states of all tasks.
+        """
+        with self._lock:
+            states = dict(self._states)
+        return {
+            'ready': self.is_ready(),
+            'tasks': states
+        }
+
+    def is_ready(self):
+        """
+        Check if all tasks have succeeded.
+        """
+        with self._lock:
+            return all(state == WarmUp.TASK_DONE for state in self._states.values())
+
+    def run(self):
+        """
+        Run the tasks in the order they were added, retrying failed ones.
+        """
+        for name, func, args, kwargs in self._tasks:
+            while not self._stopped.is_set():
+                try:
+                    func(*args, **kwargs)
+                    state = WarmUp.TASK_DONE
+                except Exception:
+                    state = WarmUp.TASK_FAILED
+                with self._lock:
+                    self._states[name] = state
+                if state == WarmUp.TASK_DONE:
+                    break
+                self._stopped.wait(self.retry_interval)
+
+    def stop(self):
+        """
+        Signal the thread to stop after the current task.
+        """
+        self._stopped.set()
@@ -0,0 +1,383 @@
+import argparse
+from base64 import standard_b64encode
+from coco.hostapi import config
+from coco.hostapi.admission import AdmissionController
+from coco.hostapi.events import EventLog
+from coco.hostapi.http.app import create_app
+from coco.hostapi.http.cache import ResponseCache
+from coco.hostapi.http.encoding import set_encoder
+from coco.hostapi.inventory import Inventory
+from coco.hostapi.jobs import JobManager
+from coco.hostapi.metrics import MetricsRegistry
+from coco.hostapi.proxy import CoalescingBackend, InstrumentedBackend
+from coco.hostapi.sampler import ResourceSampler
+from coco.hostapi.slowlog import SlowCallLog, logger as slow_call_logger
+from coco.hostapi.stats import StatsCollector
+from coco.hostapi.warmup import WarmUp
+from fakes import FakeContainerBackend
+from itertools import izip
+from threading import Thread
+import json
+import logging
+import math
+import resource
+import sys
+import tempfile
+import time
+
+
+def container(backend):
+    """
+    Return the encoded ID of a random container.
+    """
+    return standard_b64encode(backend.get_random_id('container'))
+
+
+"""
+List of the benchmarked routes as tuples of their name and a function returning the request's
+method, path, JSON body (or raw body as string) and, optionally, headers and the number of chunks
+to read of endless streams for the given fake backend. Items deleted or read by a request are
+created upfront, the deleted ones as disposable (see `FakeContainerBackend.add_disposable`), so
+the requests on random items do not pick them.
+"""
+SCENARIOS = [
+    # routes/containers.py
+    ('get_container_images', lambda b: ('GET', '/containers/images', None)),
+    ('get_container_image', lambda b: ('GET', '/containers/images/%s' % standard_b64encode(b.get_random_id('image')), None)),
+    ('create_container_image', lambda b: ('POST', '/containers/images', {'name': 'benchmark'})),
+    ('delete_container_image', lambda b: ('DELETE', '/containers/images/%s' % standard_b64encode(b.add_disposable('image')), None)),
+    ('export_container_image', lambda b: (
+        'GET', '/containers/images/%s/export' % standard_b64encode(b.get_random_id('image')), None
+    )),
+    ('import_container_image', lambda b: ('POST', '/containers/images/import?name=benchmark', b.archive)),
+    ('get_container_snapshots', lambda b: ('GET', '/containers/snapshots', None)),
+    ('get_container_snapshot', lambda b: ('GET', '/containers/snapshots/%s' % standard_b64encode(b.get_random_id('snapshot')), None)),
+    ('delete_container_snapshots', lambda b: (
+        'DELETE', '/containers/snapshots/%s' % standard_b64encode(b.add_disposable('snapshot', b.get_random_id('container'))), None
+    )),
+    ('export_container_snapshot', lambda b: (
+        'GET', '/containers/snapshots/%s/export' % standard_b64encode(b.get_random_id('snapshot')), None
+    )),
+    ('import_container_snapshot', lambda b: ('POST', '/containers/snapshots/import?name=benchmark', b.archive)),
+    ('exec_in_container', lambda b: ('POST', '/containers/%s/exec' % container(b), {'command': 'uptime'})),
+    ('get_container_logs', lambda b: ('GET', '/containers/%s/logs?tail=100' % container(b), None)),
+    # the 10 most recent messages and the result of the first poll
+    ('follow_container_logs', lambda b: (
+        'GET', '/containers/%s/logs?tail=10&follow=true' % container(b), None, None, 11
+    )),
+    ('get_public_key', lambda b: ('GET', '/containers/%s/public_key' % container(b), None)),
+    ('restart_container', lambda b: ('POST', '/containers/%s/restart' % container(b), None)),
+    ('restart_container_async', lambda b: (
+        'POST', '/containers/%s/restart' % container(b), None, {'Prefer': 'respond-async'}
+    )),
+    ('resume_container', lambda b: ('POST', '/containers/%s/resume' % container(b), None)),
+    ('restore_container_snapshots', lambda b: restore_scenario(b)),
+    ('get_containers_snapshots', lambda b: ('GET', '/containers/%s/snapshots' % container(b), None)),
+    ('create_container_snapshot', lambda b: ('POST', '/containers/%s/snapshots' % container(b), {'name': 'benchmark'})),
+    ('start_container', lambda b: ('POST', '/containers/%s/start' % container(b), None)),
+    ('stop_container', lambda b: ('POST', '/containers/%s/stop' % container(b), None)),
+    ('get_container_stats', lambda b: ('GET', '/containers/%s/stats' % container(b), None)),
+    ('suspend_container', lambda b: ('POST', '/containers/%s/suspend' % container(b), None)),
+    ('get_container', lambda b: ('GET', '/containers/%s' % container(b), None)),
+    ('delete_container', lambda b: ('DELETE', '/containers/%s' % standard_b64encode(b.add_disposable('container')), None)),
+    ('get_containers', lambda b: ('GET', '/containers', None)),
+    ('create_container', lambda b: ('POST', '/containers', {'name': 'benchmark'})),
+    ('run_batch', lambda b: ('POST', '/containers/batch', [
+        {'container': container(b), 'action': 'restart'} for _ in xrange(10)
+    ])),
+    ('get_public_keys', lambda b: ('GET', '/containers/public_keys', None)),
+    ('get_containers_stats', lambda b: ('GET', '/containers/stats', None)),
+    # routes/core.py
+    ('get_health', lambda b: ('GET', '/health', None)),
+    ('get_metrics', lambda b: ('GET', '/metrics', None)),
+    ('get_ready', lambda b: ('GET', '/ready', None)),
+    ('get_status', lambda b: ('GET', '/status', None)),
+    # routes/events.py, a client reconnecting after missing the 10 latest events
+    ('get_events', lambda b: (
+        'GET', '/events?last_event_id=%d' % max(0, config.event_log.get_last_id() - 10), None, None, 10
+    )),
+    # routes/jobs.py
+    ('get_job', lambda b: ('GET', '/jobs/%s' % config.job_manager.submit(lambda: {})['id'], None)),
+    ('get_jobs', lambda b: ('GET', '/jobs', None))
+]
+
+
+def restore_scenario(backend):
+    """
+    Return the request restoring a new snapshot of a random container.
+    """
+    container = backend.get_random_id('container')
+    snapshot = backend.add_snapshot(container)
+    return (
+        'POST',
+        '/containers/%s/snapshots/%s/restore' % (standard_b64encode(container), standard_b64encode(snapshot)),
+        None
+    )
+
+
+def main():
+    """
+    Benchmark command-line interface entry point.
+    """
+    # define available arguments
+    parser = argparse.ArgumentParser(description='coco host API benchmark against a fake container backend')
+    parser.add_argument('-c', '--concurrency', help='number of concurrent clients (default: 8)',
+                        action='store', type=int, default=8, dest='concurrency')
+    parser.add_argument('--duration', help='seconds to run the benchmark for (default: 10.0)',
+                        action='store', type=float, default=10.0, dest='duration')
+    parser.add_argument('--routes', help='comma separated names of the routes to benchmark (default: all)',
+                        action='store', type=str, default=None, dest='routes')
+    parser.add_argument('--containers', help='number of containers of the fake backend (default: 100)',
+                        action='store', type=int, default=100, dest='containers')
+    parser.add_argument('--images', help='number of images of the fake backend (default: 10)',
+                        action='store', type=int, default=10, dest='images')
+    parser.add_argument('--snapshots', help='number of snapshots per container of the fake backend (default: 2)',
+                        action='store', type=int, default=2, dest='snapshots')
+    parser.add_argument('--log-lines', help='number of log messages per container of the fake backend (default: 1000)',
+                        action='store', type=int, default=1000, dest='log_lines')
+    parser.add_argument('--archive-size', help='number of bytes of the exported and imported archives of the fake backend (default: 1048576)',
+                        action='store', type=int, default=1048576, dest='archive_size')
+    parser.add_argument('--latency', help='seconds every backend call takes, or JSON object mapping method names (and "default") to seconds (default: 0)',
+                        action='store', type=str, default='0', dest='latency')
+    parser.add_argument('--failure-rate', help='share of failing backend calls, or JSON object like --latency (default: 0)',
+                        action='store', type=str, default='0', dest='failure_rate')
+    parser.add_argument('--error-tolerance', help='share of errors tolerated per route on top of the highest failure rate (default: 0.01)',
+                        action='store', type=float, default=0.01, dest='error_tolerance')
+    parser.add_argument('--seed', help='seed of the fake backend\'s random number generator',
+                        action='store', type=int, default=None, dest='seed')
+    parser.add_argument('--cache-size', help='maximum number of cached responses, 0 disables the cache (default: %d)' % config.cache_size,
+                        action='store', type=int, default=config.cache_size, dest='cache_size')
+    parser.add_argument('--json-encoder', help='JSON encoder to use: auto, ujson, simplejson or json (default: json)',
+                        action='store', type=str, default=config.json_encoder, dest='json_encoder')
+    parser.add_argument('--json', help='print the report as JSON',
+                        action='store_true', default=False, dest='json')
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS
+    if args.routes:
+        names = args.routes.split(',')
+        scenarios = [scenario for scenario in SCENARIOS if scenario[0] in names]
+        if not scenarios:
+            parser.error("no known routes given")
+
+    backend = FakeContainerBackend(
+        containers=args.containers,
+        images=args.images,
+        snapshots=args.snapshots,
+        log_lines=args.log_lines,
+        archive_size=args.archive_size,
+        latency=json.loads(args.latency),
+        failure_rate=json.loads(args.failure_rate),
+        seed=args.seed
+    )
+    app = create_benchmark_app(backend, args)
+    results, elapsed = run_benchmark(app, backend, scenarios, args.concurrency, args.duration)
+    stop_benchmark_app()
+    report = get_report(results, elapsed)
+    if args.json:
+        print json.dumps(report, indent=2, sort_keys=True)
+    else:
+        print_report(report)
+
+    # backend failures are answered with errors, any other errors point at a problem of the host API
+    failure_rate = json.loads(args.failure_rate)
+    max_error_rate = max(failure_rate.values() or [0]) if isinstance(failure_rate, dict) else failure_rate
+    failing = get_failing_routes(report, max_error_rate + args.error_tolerance)
+    if failing:
+        print >> sys.stderr, 'error rate above %.1f%%: %s' % (
+            (max_error_rate + args.error_tolerance) * 100,
+            ', '.join('%s (%.1f%%)' % (name, rate * 100) for name, rate in failing)
+        )
+        return 1
+
+
+def create_benchmark_app(backend, args):
+    """
+    Configure the host API like a (single) worker process around the backend and return the application.
+
+    :param backend: The fake container backend.
+    :param args: The parsed command-line arguments.
+    """
+    config.cache_size = args.cache_size
+    config.json_encoder = args.json_encoder
+    set_encoder(config.json_encoder)
+    if config.cache_size > 0:
+        config.response_cache = ResponseCache(max_entries=config.cache_size)
+    config.admission = AdmissionController(config.admission_limits, tempfile.mkdtemp(prefix='coco-hostapi-benchmark-'))
+
+    config.metrics = MetricsRegistry()
+    slow_call_logger.addHandler(logging.NullHandler())
+    slow_call_logger.propagate = False
+    config.slow_call_log = SlowCallLog(config.slow_call_threshold)
+    config.slow_call_log.start()
+    config.container_backend = CoalescingBackend(
+        InstrumentedBackend(backend),
+        tempfile.mkdtemp(prefix='coco-hostapi-benchmark-')
+    )
+    config.resource_sampler = ResourceSampler(config.container_backend, config.sampling_interval)
+    config.resource_sampler.start()
+    if config.stats_interval > 0:
+        config.stats_collector = StatsCollector(
+            config.container_backend,
+            tempfile.mkdtemp(prefix='coco-hostapi-benchmark-'),
+            interval=config.stats_interval,
+            max_workers=config.batch_concurrency
+        )
+        config.stats_collector.start()
+    if config.job_workers > 0:
+        config.job_manager = JobManager(
+            tempfile.mkdtemp(prefix='coco-hostapi-benchmark-'),
+            max_workers=config.job_workers,
+            max_pending=config.job_queue_size
+        )
+    if config.events_buffer_size > 0:
+        config.event_log = EventLog(tempfile.mkdtemp(prefix='coco-hostapi-benchmark-'), capacity=config.events_buffer_size)
+        config.event_log.start()
+    if config.inventory_interval > 0:
+        config.inventory = Inventory(config.container_backend, config.inventory_interval, config.inventory_max_staleness)
+        if config.event_log is not None:
+            config.event_log.add_listener(config.inventory.apply)
+        config.inventory.start()
+    config.warm_up = WarmUp()
+    config.warm_up.add_task('status', config.resource_sampler.get_snapshot)
+    config.warm_up.start()
+    return create_app()
+
+
+def stop_benchmark_app():
+    """
+    Stop the background threads started by `create_benchmark_app` and wait for them to exit.
+    """
+    threads = [
+        config.warm_up,
+        config.inventory,
+        config.event_log,
+        config.stats_collector,
+        config.health_probe,
+        config.resource_sampler,
+        config.slow_call_log
+    ]
+    threads = [thread for thread in threads if thread is not None]
+    for thread in threads:
+        thread.stop()
+    for thread in threads:
+        if thread.is_alive():
+            thread.join()
+    if config.job_manager is not None:
+        config.job_manager.shutdown()
+    config.warm_up = config.inventory = config.event_log = config.stats_collector = None
+    config.health_probe = config.resource_sampler = config.slow_call_log = config.job_manager = None
+
+
+def run_benchmark(app, backend, scenarios, concurrency, duration):
+    """
+    Send requests from `concurrency` clients for `duration` seconds, each cycling through the scenarios.
+
+    Returns a tuple of a dictionary mapping the scenario names to lists of `(status code, latency)`
+    tuples and the number of seconds the benchmark took.
+    """
+    results = dict((name, []) for name, _ in scenarios)
+    deadline = time.time() + duration
+
+    def client(offset):
+        test_client = app.test_client()
+        index = offset
+        while time.time() < deadline:
+            name, scenario = scenarios[index % len(scenarios)]
+            index += 1
+            request = scenario(backend)
+            method, path, body = request[:3]
+            start = time.time()
+            response = test_client.open(
+                path,
+                method=method,
+                data=body if body is None or isinstance(body, str) else json.dumps(body),
+                content_type='application/x-tar' if isinstance(body, str) else 'application/json',
+                headers=request[3] if len(request) > 3 else None
+            )
+            # consume streamed bodies, they are produced while being read
+            if len(request) > 4:
+                for _ in izip(xrange(request[4]), response.response):
+                    pass
+                response.close()
+            else:
+                response.get_data()
+            results[name].append((response.status_code, time.time() - start))
+
+    start = time.time()
+    threads = [Thread(target=client, args=(offset,)) for offset in xrange(concurrency)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.time() - start
+
+
+def get_report(results, elapsed):
+    """
+    Summarize the benchmark results per route and in total.
+    """
+    def summarize(samples):
+        latencies = sorted(latency for _, latency in samples)
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for code, _ in samples if code >= 400),
+            'rps': len(samples) / elapsed,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99)
+        }
+
+    # ru_maxrss is reported in kilobytes on Linux
+    return {
+        'duration': elapsed,
+        'routes': dict((name, summarize(samples)) for name, samples in results.items()),
+        'total': summarize([sample for samples in results.values() for sample in samples]),
+        'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    }
+
+
+def get_failing_routes(report, max_error_rate):
+    """
+    Return the sorted list of tuples of the names and error rates of the routes with an error rate above the maximum.
+    """
+    failing = []
+    for name, summary in sorted(report['routes'].items()):
+        if summary['requests'] > 0:
+            rate = float(summary['errors']) / summary['requests']
+            if rate > max_error_rate:
+                failing.append((name, rate))
+    return failing
+
+
+def percentile(values, percent):
+    """
+    Return the nearest-rank percentile of the sorted list of values (or `None` if it is empty).
+    """
+    if not values:
+        return None
+    return values[max(0, int(math.ceil(percent / 100.0 * len(values))) - 1)]
+
+
+def print_report(report):
+    """
+    Print the report as table with latencies in milliseconds.
+    """
+    def row(name, summary):
+        latencies = [
+            '%9.2f' % (summary[key] * 1000) if summary[key] is not None else '%9s' % '-'
+            for key in ('p50', 'p95', 'p99')
+        ]
+        return '%-28s %9d %7d %9.1f %s' % (name, summary['requests'], summary['errors'], summary['rps'], ' '.join(latencies))
+
+    print '%-28s %9s %7s %9s %9s %9s %9s' % ('route', 'requests', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms')
+    for name in sorted(report['routes']):
+        print row(name, report['routes'][name])
+    print row('total', report['total'])
+    print
+    print 'duration: %.1f s, peak RSS: %.1f MiB' % (report['duration'], report['peak_rss'] / 1048576.0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+from coco.contract.backends import *
+from coco.contract.errors import *
+from datetime import datetime, timedelta
+from functools import wraps
+from io import BytesIO
+from threading import Lock
+import random
+import time
+
+
+def simulated(func):
+    """
+    Decorator making a backend method take the configured latency and fail at the configured rate.
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        self.simulate(func.__name__)
+        return func(self, *args, **kwargs)
+    return wrapper
+
+
+class FakeContainerBackend(SnapshotableContainerBackend, SuspendableContainerBackend):
+    """
+    In-memory container backend for benchmarks.
+
+    Containers, images, snapshots, logs and the exported archive are generated upfront. Every backend
+    method sleeps for its configured latency and raises a `ContainerBackendError` at the configured
+    failure rate, so the host API can be measured without Docker (or any other backend) being installed.
+    """
+
+    def __init__(self, containers=100, images=10, snapshots=2, log_lines=1000, archive_size=1048576, latency=0.0,
+                 failure_rate=0.0, seed=None):
+        """
+        Initialize the backend and generate its dataset.
+
+        :param containers: The number of containers.
+        :param images: The number of images.
+        :param snapshots: The number of snapshots per container.
+        :param log_lines: The number of log messages per container.
+        :param archive_size: The number of bytes of the exported image and snapshot archives.
+        :param latency: The number of seconds every method call takes, or a dictionary mapping
+                        method names to their latency (`default` applies to the others).
+        :param failure_rate: The share (0 to 1) of method calls failing, or a dictionary like `latency`.
+        :param seed: The seed of the random number generator, for reproducible runs.
+        """
+        self.archive = '\0' * archive_size
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._containers = {}
+        self._disposable = set()
+        self._images = {}
+        self._snapshots = {}
+        self._lock = Lock()
+        self._random = random.Random(seed)
+        self._sequence = 0
+        self._started_at = time.time()
+        start = datetime(2015, 1, 1)
+        self._logs = [
+            '%sZ message %d' % ((start + timedelta(seconds=line)).isoformat(), line) for line in xrange(log_lines)
+        ]
+        for _ in xrange(images):
+            self.add_image()
+        for _ in xrange(containers):
+            container = self.add_container()
+            for _ in xrange(snapshots):
+                self.add_snapshot(container)
+
+    def add_container(self, **specification):
+        """
+        Add a running container to the dataset (without latency or failures) and return its ID.
+        """
+        with self._lock:
+            container = self._next_id('container')
+            self._containers[container] = dict(specification, **{
+                ContainerBackend.KEY_PK: container,
+                ContainerBackend.CONTAINER_KEY_STATUS: ContainerBackend.CONTAINER_STATUS_RUNNING,
+                'name': specification.get('name', container),
+                'image': specification.get('image') or self._random.choice(self._images.keys() or [None]),
+                'labels': {'owner': self._random.choice(['alice', 'bob', 'carol'])}
+            })
+        return container
+
+    def add_image(self, **specification):
+        """
+        Add an image to the dataset (without latency or failures) and return its ID.
+        """
+        with self._lock:
+            image = self._next_id('image')
+            self._images[image] = dict(specification, **{
+                ContainerBackend.KEY_PK: image,
+                'name': specification.get('name', image)
+            })
+        return image
+
+    def add_snapshot(self, container, **specification):
+        """
+        Add a snapshot of the container to the dataset (without latency or failures) and return its ID.
+        """
+        with self._lock:
+            snapshot = self._next_id('snapshot')
+            self._snapshots[snapshot] = dict(specification, **{
+                ContainerBackend.KEY_PK: snapshot,
+                'name': specification.get('name', snapshot),
+                'container': container
+            })
+        return snapshot
+
+    def add_disposable(self, kind, *args):
+        """
+        Add a `container`, `image` or `snapshot` (of the container passed as argument) to be deleted and return its ID.
+
+        Disposable items are never picked by `get_random_id`, so requests on random items do not
+        race with the requests deleting them.
+        """
+        item = {'container': self.add_container, 'image': self.add_image, 'snapshot': self.add_snapshot}[kind](*args)
+        with self._lock:
+            self._disposable.add(item)
+        return item
+
+    def get_random_id(self, kind):
+        """
+        Return the ID of a random existing `container`, `image` or `snapshot` that is not disposable.
+        """
+        items = {'container': self._containers, 'image': self._images, 'snapshot': self._snapshots}[kind]
+        with self._lock:
+            return self._random.choice([item for item in items if item not in self._disposable])
+
+    def simulate(self, method):
+        """
+        Sleep for the method's latency, then raise a `ContainerBackendError` at its failure rate.
+        """
+        latency = self._get_option(self.latency, method)
+        if latency > 0:
+            time.sleep(latency)
+        if self._random.random() < self._get_option(self.failure_rate, method):
+            raise ContainerBackendError("Simulated failure")
+
+    @simulated
+    def create_container(self, **specification):
+        return self.add_container(**specification)
+
+    @simulated
+    def create_container_image(self, **specification):
+        return self.add_image(**specification)
+
+    @simulated
+    def create_container_snapshot(self, container, **specification):
+        self._get_container(container)
+        return self.add_snapshot(container, **specification)
+
+    @simulated
+    def delete_container(self, container):
+        with self._lock:
+            self._disposable.discard(container)
+            if self._containers.pop(container, None) is None:
+                raise ContainerNotFoundError
+
+    @simulated
+    def delete_container_image(self, image):
+        with self._lock:
+            self._disposable.discard(image)
+            if self._images.pop(image, None) is None:
+                raise ContainerImageNotFoundError
+
+    @simulated
+    def delete_container_snapshot(self, snapshot):
+        with self._lock:
+            self._disposable.discard(snapshot)
+            if self._snapshots.pop(snapshot, None) is None:
+                raise ContainerSnapshotNotFoundError
+
+    @simulated
+    def exec_in_container(self, container, command):
+        self._get_container(container)
+        return "ssh-rsa %s fake@%s" % ('A' * 372, container)
+
+    @simulated
+    def export_container_image(self, image):
+        if image not in self._images:
+            raise ContainerImageNotFoundError
+        return BytesIO(self.archive)
+
+    @simulated
+    def export_container_snapshot(self, snapshot):
+        if snapshot not in self._snapshots:
+            raise ContainerSnapshotNotFoundError
+        return BytesIO(self.archive)
+
+    @simulated
+    def get_container(self, container):
+        return self._get_container(container)
+
+    @simulated
+    def get_container_image(self, image):
+        try:
+            return self._images[image]
+        except KeyError:
+            raise ContainerImageNotFoundError
+
+    @simulated
+    def get_container_images(self):
+        return self._images.values()
+
+    @simulated
+    def get_container_logs(self, container):
+        self._get_container(container)
+        return self._logs
+
+    @simulated
+    def get_container_snapshot(self, snapshot):
+        try:
+            return self._snapshots[snapshot]
+        except KeyError:
+            raise ContainerSnapshotNotFoundError
+
+    @simulated
+    def get_container_snapshots(self):
+        return self._snapshots.values()
+
+    @simulated
+    def get_container_stats(self, container):
+        self._get_container(container)
+        uptime = time.time() - self._started_at
+        return {
+            'cpu_time': int(uptime * 0.25 * 1e9),
+            'memory': 64 * 1048576,
+            'network_rx_bytes': int(uptime * 4096),
+            'network_tx_bytes': int(uptime * 1024),
+            'block_read_bytes': int(uptime * 512),
+            'block_write_bytes': int(uptime * 2048)
+        }
+
+    @simulated
+    def get_containers(self):
+        return self._containers.values()
+
+    @simulated
+    def get_containers_snapshots(self, container):
+        self._get_container(container)
+        return [snapshot for snapshot in self._snapshots.values() if snapshot['container'] == container]
+
+    @simulated
+    def get_status(self):
+        return ContainerBackend.BACKEND_STATUS_OK
+
+    @simulated
+    def import_container_image(self, archive, **params):
+        self._read_archive(archive)
+        return self.add_image(**params)
+
+    @simulated
+    def import_container_snapshot(self, archive, container=None, **params):
+        self._read_archive(archive)
+        if container is not None:
+            self._get_container(container)
+        return self.add_snapshot(container or self.get_random_id('container'), **params)
+
+    @simulated
+    def restart_container(self, container):
+        self._set_status(container, ContainerBackend.CONTAINER_STATUS_RUNNING)
+
+    @simulated
+    def restore_container_snapshot(self, container, snapshot):
+        self._get_container(container)
+        try:
+            return self._snapshots[snapshot]
+        except KeyError:
+            raise ContainerSnapshotNotFoundError
+
+    @simulated
+    def resume_container(self, container):
+        self._set_status(container, ContainerBackend.CONTAINER_STATUS_RUNNING)
+
+    @simulated
+    def start_container(self, container):
+        self._set_status(container, ContainerBackend.CONTAINER_STATUS_RUNNING)
+
+    @simulated
+    def stop_container(self, container):
+        self._set_status(container, ContainerBackend.CONTAINER_STATUS_STOPPED)
+
+    @simulated
+    def suspend_container(self, container):
+        self._set_status(container, ContainerBackend.CONTAINER_STATUS_SUSPENDED)
+
+    def _get_container(self, container):
+        """
+        Return the container or raise a `ContainerNotFoundError`.
+        """
+        try:
+            return self._containers[container]
+        except KeyError:
+            raise ContainerNotFoundError
+
+    def _get_option(self, option, method):
+        """
+        Return the value of a per-method option (see `latency`).
+        """
+        if isinstance(option, dict):
+            return option.get(method, option.get('default', 0))
+        return option
+
+    def _next_id(self, kind):
+        """
+        Return a new unique ID for an item of the given kind.
+        """
+        self._sequence += 1
+        return '%s-%d' % (kind, self._sequence)
+
+    def _read_archive(self, archive):
+        """
+        Read the imported archive to its end, like a backend storing it would.
+        """
+        while archive.read(65536):
+            pass
+
+    def _set_status(self, container, status):
+        """
+        Set the container's status, treating containers as immutable (results might be shared).
+        """
+        with self._lock:
+            self._containers[container] = dict(
+                self._get_container(container),
+                **{ContainerBackend.CONTAINER_KEY_STATUS: status}
+            )
@@ -0,0 +1,113 @@
+from benchmark import stop_benchmark_app
+from coco.hostapi import config
+from coco.hostapi.admission import AdmissionRejectedError, Gate
+from fakes import FakeContainerBackend
+from test_routes import create_test_client
+import json
+import os
+import shutil
+import signal
+import tempfile
+import time
+import unittest
+
+
+class GateTest(unittest.TestCase):
+    """
+    Tests of the cross-process admission gates.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='coco-hostapi-test-')
+        self.gate = Gate(self.directory, limit=4, max_queued=0, timeout=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_status_counts_slots(self):
+        slots = [self.gate.enter() for _ in xrange(3)]
+        self.assertEqual(self.gate.get_status()['active'], 3)
+        for slot in slots:
+            self.gate.leave(slot)
+        self.assertEqual(self.gate.get_status()['active'], 0)
+
+    def test_limit(self):
+        slots = [self.gate.enter() for _ in xrange(4)]
+        self.assertRaises(AdmissionRejectedError, self.gate.enter)
+        for slot in slots:
+            self.gate.leave(slot)
+
+    def test_polling_does_not_reduce_concurrency(self):
+        pollers = []
+        for _ in xrange(2):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    while True:
+                        self.gate.get_status()
+                finally:
+                    os._exit(0)
+            pollers.append(pid)
+        try:
+            # without queueing or waiting, any slot briefly locked by the pollers would reject an enter
+            for _ in xrange(2000):
+                slots = [self.gate.enter() for _ in xrange(4)]
+                for slot in slots:
+                    self.gate.leave(slot)
+        finally:
+            for pid in pollers:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+
+    def test_dead_process_is_not_counted(self):
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                self.gate.enter()
+                os.write(ready_write, 'x')
+                time.sleep(30)
+            finally:
+                os._exit(0)
+        os.read(ready_read, 1)
+        self.assertEqual(self.gate.get_status()['active'], 1)
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        self.assertEqual(self.gate.get_status()['active'], 0)
+        self.assertEqual([name for name in os.listdir(self.directory) if name.endswith('.count')], [])
+        slots = [self.gate.enter() for _ in xrange(4)]
+        for slot in slots:
+            self.gate.leave(slot)
+
+
+class AdmittedRouteTest(unittest.TestCase):
+    """
+    Tests of the routes limited by admission gates.
+    """
+
+    def setUp(self):
+        self.backend = FakeContainerBackend(containers=5, seed=11)
+        self.client = create_test_client(self.backend)
+        self.gate = config.admission.get_gate('create_container')
+        self.max_queued = self.gate.max_queued
+        self.gate.max_queued = 0
+
+    def tearDown(self):
+        self.gate.max_queued = self.max_queued
+        stop_benchmark_app()
+
+    def create_container(self):
+        return self.client.post('/containers', data=json.dumps({'name': 'admitted'}), content_type='application/json')
+
+    def test_rejected(self):
+        slots = [self.gate.enter() for _ in xrange(self.gate.limit)]
+        try:
+            response = self.create_container()
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers['Retry-After'], str(config.admission_retry_after))
+            status = json.loads(self.client.get('/status').data)['admission']['create_container']
+            self.assertEqual(status['active'], self.gate.limit)
+        finally:
+            for slot in slots:
+                self.gate.leave(slot)
+        self.assertEqual(self.create_container().status_code, 201)
@@ -0,0 +1,70 @@
+from coco.hostapi.http.cache import ResponseCache
+import shutil
+import tempfile
+import time
+import unittest
+
+
+class ResponseCacheTest(unittest.TestCase):
+    """
+    Tests of the response cache's expiry, eviction and invalidation.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='coco-hostapi-test-')
+        self.loads = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def load(self):
+        self.loads.append(time.time())
+        return len(self.loads)
+
+    def test_entry_expires(self):
+        cache = ResponseCache()
+        self.assertEqual(cache.get_or_load(('images',), self.load, 0.1), 1)
+        self.assertEqual(cache.get_or_load(('images',), self.load, 0.1), 1)
+        time.sleep(0.15)
+        self.assertEqual(cache.get_or_load(('images',), self.load, 0.1), 2)
+
+    def test_zero_ttl_is_not_cached(self):
+        cache = ResponseCache()
+        self.assertEqual(cache.get_or_load(('images',), self.load, 0), 1)
+        self.assertEqual(cache.get_or_load(('images',), self.load, 0), 2)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResponseCache(max_entries=2)
+        cache.get_or_load(('images', 1), self.load, 60)
+        cache.get_or_load(('images', 2), self.load, 60)
+        cache.get_or_load(('images', 1), self.load, 60)
+        cache.get_or_load(('images', 3), self.load, 60)
+        self.assertEqual(cache.get_or_load(('images', 1), self.load, 60), 1)
+        self.assertEqual(cache.get_or_load(('images', 2), self.load, 60), 4)
+
+    def test_invalidate(self):
+        cache = ResponseCache()
+        cache.get_or_load(('images',), self.load, 60)
+        cache.get_or_load(('snapshots',), self.load, 60)
+        cache.invalidate('images')
+        self.assertEqual(cache.get_or_load(('images',), self.load, 60), 3)
+        self.assertEqual(cache.get_or_load(('snapshots',), self.load, 60), 2)
+
+    def test_value_loaded_before_invalidation_is_not_stored(self):
+        cache = ResponseCache()
+
+        def load():
+            # e.g. a concurrent request changing the images while they are being listed
+            cache.invalidate('images')
+            return self.load()
+
+        self.assertEqual(cache.get_or_load(('images',), load, 60), 1)
+        self.assertEqual(cache.get_or_load(('images',), self.load, 60), 2)
+
+    def test_invalidation_reaches_other_processes(self):
+        cache = ResponseCache(directory=self.directory)
+        other = ResponseCache(directory=self.directory)
+        cache.get_or_load(('images',), self.load, 60)
+        other.invalidate('images')
+        self.assertEqual(cache.get_or_load(('images',), self.load, 60), 2)
+        self.assertEqual(cache.get_or_load(('images',), self.load, 60), 2)
@@ -0,0 +1,58 @@
+from benchmark import stop_benchmark_app
+from coco.hostapi import config
+from fakes import FakeContainerBackend
+from test_routes import create_test_client
+import json
+import unittest
+import zlib
+
+
+class CompressionTest(unittest.TestCase):
+    """
+    Tests of the content coding of responses.
+    """
+
+    def setUp(self):
+        self.backend = FakeContainerBackend(containers=5, images=40, seed=9)
+        self.client = create_test_client(self.backend)
+        self.compression_level = config.compression_level
+        self.compression_min_size = config.compression_min_size
+
+    def tearDown(self):
+        config.compression_level = self.compression_level
+        config.compression_min_size = self.compression_min_size
+        stop_benchmark_app()
+
+    def get_images(self, encoding):
+        return self.client.get('/containers/images', headers={'Accept-Encoding': encoding})
+
+    def test_gzip(self):
+        plain = self.get_images('identity').data
+        self.assertGreaterEqual(len(plain), config.compression_min_size)
+        response = self.get_images('gzip, deflate')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(int(response.headers['Content-Length']), len(response.data))
+        self.assertEqual(zlib.decompress(response.data, 16 + zlib.MAX_WBITS), plain)
+
+    def test_deflate(self):
+        plain = self.get_images('identity').data
+        response = self.get_images('gzip;q=0, deflate')
+        self.assertEqual(response.headers['Content-Encoding'], 'deflate')
+        self.assertEqual(zlib.decompress(response.data), plain)
+
+    def test_no_accepted_coding(self):
+        response = self.get_images('identity')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(len(json.loads(response.data)), 40)
+
+    def test_small_body(self):
+        config.compression_min_size = len(self.get_images('identity').data) + 1
+        response = self.get_images('gzip')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(len(json.loads(response.data)), 40)
+
+    def test_disabled(self):
+        config.compression_level = 0
+        self.assertNotIn('Content-Encoding', self.get_images('gzip').headers)
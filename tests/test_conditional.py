@@ -0,0 +1,54 @@
+from benchmark import stop_benchmark_app
+from fakes import FakeContainerBackend
+from test_routes import create_test_client
+import json
+import unittest
+
+
+class ConditionalRequestTest(unittest.TestCase):
+    """
+    Tests of the ETags of JSON responses and the 304 - Not Modified answers to conditional requests.
+    """
+
+    def setUp(self):
+        self.backend = FakeContainerBackend(containers=5, images=40, seed=8)
+        self.client = create_test_client(self.backend)
+
+    def tearDown(self):
+        stop_benchmark_app()
+
+    def get_images(self, etag=None, encoding=None):
+        headers = {}
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        if encoding is not None:
+            headers['Accept-Encoding'] = encoding
+        return self.client.get('/containers/images', headers=headers)
+
+    def test_matching_etag(self):
+        etag = self.get_images().headers['ETag']
+        response = self.get_images(etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.data, '')
+
+    def test_etag_of_compressed_representation(self):
+        for coding in ('gzip', 'deflate'):
+            etag = self.get_images(encoding=coding).headers['ETag']
+            self.assertTrue(etag.endswith('-%s"' % coding))
+            self.assertEqual(self.get_images(etag, coding).status_code, 304)
+            # the client might have received the representation before it stopped accepting the coding
+            self.assertEqual(self.get_images(etag).status_code, 304)
+
+    def test_other_etag(self):
+        response = self.get_images('"0000000000000000000000000000000000000000"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.data)), 40)
+
+    def test_changed_listing(self):
+        etag = self.get_images().headers['ETag']
+        response = self.client.post('/containers/images', data=json.dumps({'name': 'added'}), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        response = self.get_images(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
@@ -0,0 +1,163 @@
+from base64 import standard_b64encode
+from benchmark import stop_benchmark_app
+from coco.contract.backends import ContainerBackend
+from coco.hostapi import config
+from coco.hostapi.events import EVENT_STARTED, EVENT_STOPPED, EventLog, StateDiffer
+from fakes import FakeContainerBackend
+from test_routes import create_test_client
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+
+class StateDifferTest(unittest.TestCase):
+    """
+    Tests of the detection of container state changes made outside the API.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='coco-hostapi-test-')
+        self.backend = FakeContainerBackend(containers=20, seed=7)
+        self.event_log = EventLog(self.directory, poll_interval=0.2)
+        self.event_log.start()
+        # let the event log's thread read the (empty) log once, it then sleeps for its poll interval
+        while not os.path.exists(os.path.join(self.directory, 'events.log')):
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.differ = StateDiffer(self.backend, self.event_log)
+        self.differ.diff()
+        self.running = [
+            container[ContainerBackend.KEY_PK] for container in self.backend.get_containers()
+            if container[ContainerBackend.CONTAINER_KEY_STATUS] == ContainerBackend.CONTAINER_STATUS_RUNNING
+        ]
+
+    def tearDown(self):
+        self.event_log.stop()
+        self.event_log.join()
+        shutil.rmtree(self.directory)
+
+    def get_published_events(self):
+        with open(os.path.join(self.directory, 'events.log')) as log_file:
+            return [json.loads(line) for line in log_file]
+
+    def test_api_changes_are_not_reported_again(self):
+        container = self.running[0]
+        self.backend.stop_container(container)
+        self.event_log.publish(EVENT_STOPPED, container)
+        # right away, before the event log's thread has read the event
+        self.differ.diff()
+        self.assertEqual([event['source'] for event in self.get_published_events()], ['api'])
+
+    def test_backend_changes_are_reported(self):
+        container = self.running[0]
+        self.backend.stop_container(container)
+        self.differ.diff()
+        events = self.get_published_events()
+        self.assertEqual([(event['type'], event['container'], event['source']) for event in events],
+                         [(EVENT_STOPPED, container, 'backend')])
+
+
+def wait_for_event(event_log, event_id):
+    """
+    Wait until the event log's thread has read the event into the buffer.
+    """
+    deadline = time.time() + 5
+    while event_log.get_last_id() < event_id and time.time() < deadline:
+        time.sleep(0.01)
+
+
+class EventLogTest(unittest.TestCase):
+    """
+    Tests of the node-wide event log and its ring buffer.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='coco-hostapi-test-')
+        self.event_log = EventLog(self.directory, capacity=3, poll_interval=0.01)
+        self.event_log.start()
+        for number in xrange(5):
+            self.event_log.publish(EVENT_STARTED, 'container-%d' % number)
+        wait_for_event(self.event_log, 5)
+
+    def tearDown(self):
+        self.event_log.stop()
+        self.event_log.join()
+        shutil.rmtree(self.directory)
+
+    def test_ids_are_consecutive(self):
+        other = EventLog(self.directory)
+        other.publish(EVENT_STOPPED, 'container-0')
+        self.assertEqual(self.event_log.get_published_id(), 6)
+        wait_for_event(self.event_log, 6)
+        events, gap = self.event_log.get_events(5)
+        self.assertEqual([(event['id'], event['type']) for event in events], [(6, EVENT_STOPPED)])
+        self.assertFalse(gap)
+
+    def test_replay(self):
+        events, gap = self.event_log.get_events(3)
+        self.assertEqual([event['id'] for event in events], [4, 5])
+        self.assertFalse(gap)
+
+    def test_dropped_events(self):
+        events, gap = self.event_log.get_events(1)
+        self.assertEqual([event['id'] for event in events], [3, 4, 5])
+        self.assertTrue(gap)
+
+    def test_no_new_events(self):
+        self.assertEqual(self.event_log.get_events(5, timeout=0.01), ([], False))
+        self.assertEqual(self.event_log.get_events(None, timeout=0.01), ([], False))
+
+
+class EventStreamTest(unittest.TestCase):
+    """
+    Tests of the server-sent event stream of the container lifecycle events.
+    """
+
+    def setUp(self):
+        self.events_buffer_size = config.events_buffer_size
+        self.events_heartbeat = config.events_heartbeat
+        config.events_buffer_size = 3
+        config.events_heartbeat = 0.1
+        self.backend = FakeContainerBackend(containers=5, seed=12)
+        self.client = create_test_client(self.backend)
+        for number in xrange(5):
+            config.event_log.publish(EVENT_STARTED, 'container-%d' % number)
+        wait_for_event(config.event_log, 5)
+
+    def tearDown(self):
+        config.events_buffer_size = self.events_buffer_size
+        config.events_heartbeat = self.events_heartbeat
+        stop_benchmark_app()
+
+    def get_frames(self, count, headers=None, query_string=None):
+        response = self.client.get('/events', headers=headers, query_string=query_string)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        frames = []
+        for frame in response.response:
+            frames.append(frame)
+            if len(frames) == count:
+                break
+        response.close()
+        return frames
+
+    def test_resume(self):
+        frames = self.get_frames(2, headers={'Last-Event-ID': '3'})
+        self.assertTrue(frames[0].startswith('id: 4\nevent: started\ndata: '))
+        self.assertTrue(frames[1].startswith('id: 5\nevent: started\n'))
+        self.assertEqual(json.loads(frames[1].split('data: ', 1)[1])['container'], 'container-4')
+
+    def test_reset(self):
+        frames = self.get_frames(2, query_string={'last_event_id': 1})
+        self.assertTrue(frames[0].startswith('event: reset\n'))
+        self.assertEqual(json.loads(frames[0].split('data: ', 1)[1]), {'last_event_id': 1})
+        self.assertTrue(frames[1].startswith('id: 3\n'))
+
+    def test_filter(self):
+        frames = self.get_frames(1, headers={'Last-Event-ID': '2'}, query_string={
+            'container': standard_b64encode('container-3')
+        })
+        self.assertTrue(frames[0].startswith('id: 4\n'))
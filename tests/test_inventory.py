@@ -0,0 +1,52 @@
+from coco.contract.backends import ContainerBackend
+from coco.hostapi.events import EVENT_CREATED, EVENT_DELETED
+from coco.hostapi.inventory import Inventory
+from fakes import FakeContainerBackend
+import unittest
+
+
+class InventoryTest(unittest.TestCase):
+    """
+    Tests of the in-memory index of the backend's containers.
+    """
+
+    def setUp(self):
+        self.backend = FakeContainerBackend(containers=5, seed=3)
+        self.inventory = Inventory(self.backend)
+        self.inventory.reconcile()
+
+    def test_created_container_is_listed(self):
+        container = self.backend.create_container(name='created')
+        self.inventory.update(EVENT_CREATED, container)
+        # not read on the caller's thread, listings are not answered until it has been
+        self.assertIsNone(self.inventory.get_containers())
+        self.assertIsNone(self.inventory.get_container(container))
+        self.inventory.refresh()
+        keys = [item[ContainerBackend.KEY_PK] for item in self.inventory.get_containers()]
+        self.assertIn(container, keys)
+        self.assertEqual(self.inventory.get_container(container)['name'], 'created')
+
+    def test_created_container_is_read_once(self):
+        container = self.backend.create_container(name='created')
+        reads = []
+        get_container = self.backend.get_container
+        self.backend.get_container = lambda key: reads.append(key) or get_container(key)
+        self.inventory.update(EVENT_CREATED, container)
+        self.inventory.refresh()
+        # e.g. the process's own event coming back from the event log
+        self.inventory.update(EVENT_CREATED, container)
+        self.inventory.refresh()
+        self.assertEqual(reads, [container])
+        self.assertIsNotNone(self.inventory.get_containers())
+
+    def test_containers_are_ordered(self):
+        keys = [item[ContainerBackend.KEY_PK] for item in self.inventory.get_containers()]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_deleted_container_is_not_listed(self):
+        container = self.backend.get_random_id('container')
+        self.backend.delete_container(container)
+        self.inventory.update(EVENT_DELETED, container)
+        keys = [item[ContainerBackend.KEY_PK] for item in self.inventory.get_containers()]
+        self.assertNotIn(container, keys)
+        self.assertIsNone(self.inventory.get_container(container))
@@ -0,0 +1,124 @@
+from base64 import standard_b64encode
+from benchmark import stop_benchmark_app
+from coco.hostapi import config
+from coco.hostapi.jobs import JobManager, JobQueueFullError
+from fakes import FakeContainerBackend
+from test_routes import create_test_client
+from threading import Event
+import json
+import shutil
+import tempfile
+import time
+import unittest
+
+
+class JobManagerTest(unittest.TestCase):
+    """
+    Tests of the thread pool running the asynchronous jobs.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='coco-hostapi-test-')
+        self.manager = JobManager(self.directory, max_workers=1, max_pending=1)
+
+    def tearDown(self):
+        self.manager.shutdown()
+        shutil.rmtree(self.directory)
+
+    def wait_for_job(self, job):
+        deadline = time.time() + 5
+        while self.manager.get_job(job['id'])['finished_at'] is None and time.time() < deadline:
+            time.sleep(0.01)
+        return self.manager.get_job(job['id'])
+
+    def test_outcome(self):
+        job = self.wait_for_job(self.manager.submit(lambda: {'result': 42}))
+        self.assertEqual(job['status'], JobManager.STATUS_SUCCEEDED)
+        self.assertEqual(job['result'], 42)
+        job = self.wait_for_job(self.manager.submit(lambda: {'error': "Container not found"}))
+        self.assertEqual(job['status'], JobManager.STATUS_FAILED)
+
+    def test_exception(self):
+        def fail():
+            raise ValueError("Broken")
+        job = self.wait_for_job(self.manager.submit(fail))
+        self.assertEqual(job['status'], JobManager.STATUS_FAILED)
+        self.assertEqual(job['error'], "Broken")
+
+    def test_queue_full(self):
+        release = Event()
+        job = self.manager.submit(release.wait)
+        self.assertRaises(JobQueueFullError, self.manager.submit, release.wait)
+        release.set()
+        self.wait_for_job(job)
+        self.wait_for_job(self.manager.submit(lambda: None))
+
+    def test_unknown_job(self):
+        self.assertIsNone(self.manager.get_job('0' * 32))
+        self.assertIsNone(self.manager.get_job('../jobs'))
+
+
+class AsynchronousRouteTest(unittest.TestCase):
+    """
+    Tests of the routes run as background jobs on request.
+    """
+
+    def setUp(self):
+        self.backend = FakeContainerBackend(containers=5, seed=13)
+        self.client = create_test_client(self.backend)
+
+    def tearDown(self):
+        stop_benchmark_app()
+
+    def post(self, path, body):
+        return self.client.post(path, data=json.dumps(body), content_type='application/json',
+                                headers={'Prefer': 'respond-async, wait=10'})
+
+    def wait_for_job(self, location):
+        deadline = time.time() + 5
+        while True:
+            response = self.client.get(location)
+            self.assertEqual(response.status_code, 200)
+            job = json.loads(response.data)
+            if job['finished_at'] is not None or time.time() > deadline:
+                return job
+            time.sleep(0.01)
+
+    def test_accepted(self):
+        response = self.post('/containers', {'name': 'async'})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.headers['Preference-Applied'], 'respond-async')
+        job = json.loads(response.data)
+        self.assertEqual(job['status'], JobManager.STATUS_PENDING)
+        location = response.headers['Location']
+        self.assertTrue(location.endswith('/jobs/%s' % job['id']))
+
+        job = self.wait_for_job(location)
+        self.assertEqual(job['status'], JobManager.STATUS_SUCCEEDED)
+        self.assertEqual(job['code'], 201)
+        self.assertEqual(self.backend.get_container(job['result'])['name'], 'async')
+        self.assertIn('location', job)
+
+    def test_failed(self):
+        response = self.post('/containers/%s/snapshots' % standard_b64encode('unknown'), {'name': 'async'})
+        self.assertEqual(response.status_code, 202)
+        job = self.wait_for_job(response.headers['Location'])
+        self.assertEqual(job['status'], JobManager.STATUS_FAILED)
+        self.assertEqual(job['code'], 404)
+        self.assertEqual(job['error'], "Container not found")
+
+    def test_synchronous_without_preference(self):
+        response = self.client.post('/containers', data=json.dumps({'name': 'sync'}), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Preference-Applied', response.headers)
+
+    def test_queue_full(self):
+        release = Event()
+        for _ in xrange(config.job_queue_size):
+            config.job_manager.submit(release.wait)
+        try:
+            response = self.post('/containers', {'name': 'async'})
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers['Retry-After'], '1')
+        finally:
+            release.set()
@@ -0,0 +1,76 @@
+from benchmark import stop_benchmark_app
+from coco.contract.backends import ContainerBackend
+from coco.hostapi import config
+from fakes import FakeContainerBackend
+from test_routes import create_test_client
+from urllib import quote
+import json
+import time
+import unittest
+
+
+class ListingTest(unittest.TestCase):
+    """
+    Tests of the pagination, filtering and projection of listings.
+    """
+
+    def setUp(self):
+        self.backend = FakeContainerBackend(containers=10, seed=10)
+        self.client = create_test_client(self.backend)
+        self.containers = sorted(self.backend.get_containers(), key=lambda container: container[ContainerBackend.KEY_PK])
+
+    def tearDown(self):
+        stop_benchmark_app()
+
+    def get_containers(self, query_string):
+        response = self.client.get('/containers', query_string=query_string)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_pages(self):
+        keys = []
+        query_string = {'limit': 4, 'fresh': 'true'}
+        pages = 0
+        while True:
+            response = self.get_containers(query_string)
+            pages += 1
+            self.assertEqual(response.headers['X-Total-Count'], '10')
+            keys.extend(container[ContainerBackend.KEY_PK] for container in json.loads(response.data))
+            cursor = response.headers.get('X-Next-Cursor')
+            if cursor is None:
+                self.assertNotIn('Link', response.headers)
+                break
+            self.assertIn('cursor=%s' % quote(cursor, ''), response.headers['Link'])
+            self.assertTrue(response.headers['Link'].endswith('>; rel="next"'))
+            query_string = dict(query_string, cursor=cursor)
+        self.assertEqual(pages, 3)
+        self.assertEqual(keys, [container[ContainerBackend.KEY_PK] for container in self.containers])
+
+    def test_filter(self):
+        running = [
+            container[ContainerBackend.KEY_PK] for container in self.containers
+            if container[ContainerBackend.CONTAINER_KEY_STATUS] == ContainerBackend.CONTAINER_STATUS_RUNNING
+        ]
+        response = self.get_containers({'status': ContainerBackend.CONTAINER_STATUS_RUNNING, 'fresh': 'true'})
+        self.assertEqual(response.headers['X-Total-Count'], str(len(running)))
+        self.assertEqual([container[ContainerBackend.KEY_PK] for container in json.loads(response.data)], running)
+
+    def test_fields(self):
+        response = self.get_containers({'fields': '%s,name' % ContainerBackend.KEY_PK, 'fresh': 'true'})
+        self.assertEqual(
+            json.loads(response.data),
+            [dict((key, container[key]) for key in (ContainerBackend.KEY_PK, 'name')) for container in self.containers]
+        )
+
+    def test_invalid_parameters(self):
+        for query_string in ({'limit': 0}, {'limit': 'many'}, {'cursor': 'not a cursor'}):
+            self.assertEqual(self.client.get('/containers', query_string=query_string).status_code, 400)
+
+    def test_inventory_listing_is_ordered(self):
+        deadline = time.time() + 5
+        while not config.inventory.is_fresh() and time.time() < deadline:
+            time.sleep(0.01)
+        response = self.get_containers({})
+        self.assertIn('Age', response.headers)
+        self.assertNotIn('X-Total-Count', response.headers)
+        self.assertEqual(json.loads(response.data), self.containers)
@@ -0,0 +1,87 @@
+from coco.hostapi.loader import load_backend
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class NegotiatingBackend(object):
+    """
+    Backend negotiating its `version` argument and reporting the negotiated value.
+    """
+
+    negotiations = 0
+
+    def __init__(self, version='auto', host='localhost'):
+        if version == 'stale':
+            raise ValueError("Unsupported version")
+        if version == 'auto':
+            NegotiatingBackend.negotiations += 1
+            version = '1.24'
+        self.version = version
+        self.host = host
+
+    def get_negotiated_args(self):
+        return {'version': self.version}
+
+
+class SilentBackend(NegotiatingBackend):
+    """
+    Backend negotiating its `version` argument without reporting it.
+    """
+
+    get_negotiated_args = None
+
+
+class LoaderTest(unittest.TestCase):
+    """
+    Tests of the caching of the backend arguments negotiated on start.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='coco-hostapi-test-')
+        NegotiatingBackend.negotiations = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def load(self, name='test_loader.NegotiatingBackend', args='{"version": "auto", "host": "docker1"}', ttl=86400.0):
+        return load_backend(name, args, self.directory, ttl)
+
+    def test_negotiated_once(self):
+        self.assertEqual(self.load().version, '1.24')
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+        backend = self.load()
+        self.assertEqual((backend.version, backend.host), ('1.24', 'docker1'))
+        self.assertEqual(NegotiatingBackend.negotiations, 1)
+
+    def test_keyed_by_other_args(self):
+        self.load()
+        self.load(args='{"version": "auto", "host": "docker2"}')
+        self.assertEqual(NegotiatingBackend.negotiations, 2)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_expired(self):
+        self.load()
+        self.load(ttl=-1)
+        self.assertEqual(NegotiatingBackend.negotiations, 2)
+
+    def test_rejected_cached_args(self):
+        self.load()
+        cache_file = os.path.join(self.directory, os.listdir(self.directory)[0])
+        with open(cache_file, 'w') as negotiated:
+            negotiated.write('{"version": "stale"}')
+        self.assertEqual(self.load().version, '1.24')
+        self.assertEqual(NegotiatingBackend.negotiations, 2)
+        with open(cache_file) as negotiated:
+            self.assertEqual(negotiated.read(), '{"version": "1.24"}')
+
+    def test_unreported_args_are_not_cached(self):
+        self.load('test_loader.SilentBackend')
+        self.load('test_loader.SilentBackend')
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertEqual(NegotiatingBackend.negotiations, 2)
+
+    def test_without_auto_args(self):
+        self.assertEqual(self.load(args='{"version": "1.30"}').version, '1.30')
+        self.assertEqual(os.listdir(self.directory), [])
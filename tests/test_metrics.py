@@ -0,0 +1,92 @@
+from coco.hostapi.metrics import LATENCY_BUCKETS, MetricsRegistry, merge, render
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class MetricsRegistryTest(unittest.TestCase):
+    """
+    Tests of the metrics shared by the worker processes.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='coco-hostapi-test-')
+        self.registry = MetricsRegistry(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_worker(self, requests, in_flight=0):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                registry = MetricsRegistry(self.directory)
+                registry.inc('hostapi_http_requests_total', (('code', 200),), requests)
+                registry.add('hostapi_http_requests_in_flight', (), in_flight)
+                registry.dump()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+
+    def get_requests(self):
+        return self.registry.collect()['counters'].get(('hostapi_http_requests_total', (('code', 200),)))
+
+    def test_exited_workers_are_retired(self):
+        self.registry.inc('hostapi_http_requests_total', (('code', 200),))
+        self.run_worker(2, in_flight=1)
+        self.run_worker(3, in_flight=1)
+        snapshot = self.registry.collect()
+        self.assertEqual(snapshot['counters'][('hostapi_http_requests_total', (('code', 200),))], 6)
+        self.assertNotIn(('hostapi_http_requests_in_flight', ()), snapshot['gauges'])
+        # their snapshots have been moved into the retired total
+        self.assertEqual(self.get_requests(), 6)
+        self.assertEqual(sorted(os.listdir(self.directory)), [self.registry._name + '.lock', 'retired.json', 'retired.lock'])
+
+    def test_reused_process_id(self):
+        self.run_worker(2)
+        self.assertEqual(self.get_requests(), 2)
+        # a later worker with the same process ID does not replace the retired one's metrics
+        other = MetricsRegistry(self.directory)
+        other.inc('hostapi_http_requests_total', (('code', 200),))
+        other.dump()
+        self.assertEqual(self.get_requests(), 3)
+
+
+class RenderingTest(unittest.TestCase):
+    """
+    Tests of the rendering of metrics in the Prometheus text format.
+    """
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter(self):
+        self.registry.inc('hostapi_http_requests_total', (('endpoint', 'get "x"\\'), ('code', 200)), 2)
+        lines = render(self.registry.collect()).splitlines()
+        self.assertEqual(lines, [
+            '# HELP hostapi_http_requests_total Number of handled HTTP requests.',
+            '# TYPE hostapi_http_requests_total counter',
+            'hostapi_http_requests_total{endpoint="get \\"x\\"\\\\",code="200"} 2'
+        ])
+
+    def test_histogram(self):
+        for value in (0.001, 0.02, 0.02, 100.0):
+            self.registry.observe('hostapi_backend_call_duration_seconds', (('method', 'get_containers'),), value)
+        lines = render(self.registry.collect()).splitlines()
+        buckets = [line for line in lines if line.startswith('hostapi_backend_call_duration_seconds_bucket')]
+        self.assertEqual(len(buckets), len(LATENCY_BUCKETS) + 1)
+        self.assertEqual(buckets[0], 'hostapi_backend_call_duration_seconds_bucket{method="get_containers",le="0.005"} 1')
+        self.assertTrue(buckets[2].endswith('le="0.025"} 3'))
+        self.assertTrue(buckets[-2].endswith('le="60.0"} 3'))
+        self.assertTrue(buckets[-1].endswith('le="+Inf"} 4'))
+        self.assertIn('hostapi_backend_call_duration_seconds_sum{method="get_containers"} 100.041', lines)
+        self.assertIn('hostapi_backend_call_duration_seconds_count{method="get_containers"} 4', lines)
+
+    def test_merge(self):
+        values = {}
+        merge(values, 'counter', 2)
+        merge(values, 'counter', 3)
+        merge(values, 'histogram', [1, 0, 0.5, 1])
+        merge(values, 'histogram', [0, 2, 1.5, 2])
+        self.assertEqual(values, {'counter': 5, 'histogram': [1, 2, 2.0, 3]})
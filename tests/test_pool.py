@@ -0,0 +1,33 @@
+from coco.contract.errors import ContainerBackendError
+from coco.hostapi.pool import WarmPoolManager, WarmPoolRefiller
+from fakes import FakeContainerBackend
+import shutil
+import tempfile
+import unittest
+
+
+class WarmPoolRefillerTest(unittest.TestCase):
+    """
+    Tests of the thread filling the warm pools.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='coco-hostapi-test-')
+        self.manager = WarmPoolManager({'ubuntu': {'specification': {'image': 'ubuntu'}, 'size': 2, 'start': True}}, self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_refill(self):
+        backend = FakeContainerBackend(containers=0)
+        WarmPoolRefiller(self.manager, backend).refill()
+        self.assertEqual(self.manager.get_status()['ubuntu']['available'], 2)
+        self.assertEqual(len(backend.get_containers()), 2)
+
+    def test_refill_deletes_containers_failing_to_start(self):
+        backend = FakeContainerBackend(containers=0, failure_rate={'start_container': 1.0})
+        refiller = WarmPoolRefiller(self.manager, backend)
+        for _ in xrange(3):
+            self.assertRaises(ContainerBackendError, refiller.refill)
+        self.assertEqual(self.manager.get_status()['ubuntu']['available'], 0)
+        self.assertEqual(backend.get_containers(), [])
@@ -0,0 +1,27 @@
+from coco.hostapi import config
+from coco.hostapi.proxy import InstrumentedBackend
+from coco.hostapi.slowlog import SlowCallLog
+from fakes import FakeContainerBackend
+import unittest
+
+
+class InstrumentedBackendTest(unittest.TestCase):
+    """
+    Tests of the proxy recording slow backend calls.
+    """
+
+    def setUp(self):
+        self.backend = FakeContainerBackend(containers=5, seed=5)
+        self.slow_call_log = config.slow_call_log
+        config.slow_call_log = SlowCallLog(threshold=0)
+
+    def tearDown(self):
+        config.slow_call_log = self.slow_call_log
+
+    def test_arguments_are_not_logged(self):
+        container = self.backend.get_random_id('container')
+        InstrumentedBackend(self.backend).exec_in_container(container, 'mysql --password=secret')
+        entry = config.slow_call_log._queue.get_nowait()
+        self.assertEqual(entry['method'], 'exec_in_container')
+        self.assertEqual(entry['id'], container)
+        self.assertNotIn('secret', repr(entry))
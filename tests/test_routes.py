@@ -0,0 +1,113 @@
+from argparse import Namespace
+from base64 import standard_b64encode
+from benchmark import create_benchmark_app, stop_benchmark_app
+from coco.contract.backends import ContainerBackend
+from coco.hostapi import config
+from fakes import FakeContainerBackend
+from werkzeug.datastructures import MultiDict
+import json
+import unittest
+import zlib
+
+
+def create_test_client(backend):
+    """
+    Return a test client of the host API configured like a (single) worker process around the backend.
+    """
+    return create_benchmark_app(backend, Namespace(cache_size=256, json_encoder='json')).test_client()
+
+
+class JsonResponseTest(unittest.TestCase):
+    """
+    Tests of the routes returning JSON bodies.
+    """
+
+    def setUp(self):
+        self.backend = FakeContainerBackend(containers=10, images=3, seed=1)
+        self.client = create_test_client(self.backend)
+
+    def tearDown(self):
+        stop_benchmark_app()
+
+    def test_get_containers(self):
+        response = self.client.get('/containers')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], 'application/json')
+        self.assertEqual(len(json.loads(response.data)), 10)
+
+    def test_get_container_images_cached(self):
+        # the second response is served from the response cache
+        for _ in xrange(2):
+            response = self.client.get('/containers/images')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(json.loads(response.data)), 3)
+            self.assertEqual(int(response.headers['Content-Length']), len(response.data))
+
+
+class StreamedJsonResponseTest(unittest.TestCase):
+    """
+    Tests of the routes returning lists too large to be serialized at once.
+    """
+
+    def setUp(self):
+        self.backend = FakeContainerBackend(containers=10, seed=1)
+        self.client = create_test_client(self.backend)
+        self.json_chunk_items = config.json_chunk_items
+        config.json_chunk_items = 3
+
+    def tearDown(self):
+        config.json_chunk_items = self.json_chunk_items
+        stop_benchmark_app()
+
+    def test_get_containers(self):
+        response = self.client.get('/containers?fresh=true')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertNotIn('Content-Length', response.headers)
+        self.assertEqual(json.loads(response.data), self.backend.get_containers())
+        etag = response.headers['ETag']
+        self.assertEqual(self.client.get('/containers?fresh=true', headers={'If-None-Match': etag}).status_code, 304)
+
+    def test_get_containers_compressed(self):
+        response = self.client.get('/containers?fresh=true', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+        self.assertTrue(response.headers['ETag'].endswith('-gzip"'))
+        data = zlib.decompress(response.data, 16 + zlib.MAX_WBITS)
+        self.assertEqual(json.loads(data), self.backend.get_containers())
+
+
+class BatchTest(unittest.TestCase):
+    """
+    Tests of the routes running the single-container routes for many containers concurrently.
+    """
+
+    def setUp(self):
+        self.backend = FakeContainerBackend(containers=20, seed=2)
+        self.client = create_test_client(self.backend)
+        self.containers = sorted(container[ContainerBackend.KEY_PK] for container in self.backend.get_containers())
+
+    def tearDown(self):
+        stop_benchmark_app()
+
+    def test_run_batch(self):
+        items = [{'container': standard_b64encode(container), 'action': 'stop'} for container in self.containers]
+        items.append({'container': standard_b64encode(self.containers[0]), 'action': 'explode'})
+        response = self.client.post('/containers/batch', data=json.dumps(items), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.data)
+        self.assertEqual([result['code'] for result in results], [204] * len(self.containers) + [422])
+        self.assertEqual([result['container'] for result in results], [item['container'] for item in items])
+
+    def test_get_public_keys(self):
+        containers = [standard_b64encode(container) for container in self.containers] + [standard_b64encode('missing')]
+        response = self.client.get(
+            '/containers/public_keys',
+            query_string=MultiDict([('container', container) for container in containers])
+        )
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.data)
+        self.assertEqual([result['container'] for result in results], containers)
+        self.assertTrue(all(result['public_key'].startswith('ssh-rsa ') for result in results[:-1]))
+        self.assertEqual(results[-1]['code'], 404)
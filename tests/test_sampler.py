@@ -0,0 +1,39 @@
+from coco.contract.errors import ContainerBackendError
+from coco.hostapi.sampler import ResourceSampler
+from fakes import FakeContainerBackend
+import unittest
+
+
+class ResourceSamplerTest(unittest.TestCase):
+    """
+    Tests of the background sampler of the node's status.
+    """
+
+    def setUp(self):
+        self.backend = FakeContainerBackend(containers=1, seed=6)
+        self.sampler = ResourceSampler(self.backend)
+
+    def fail_status(self):
+        raise ContainerBackendError("Backend unreachable")
+
+    def test_failed_sample_returns_last_snapshot(self):
+        snapshot = self.sampler.sample()
+        self.backend.get_status = self.fail_status
+        self.assertRaises(ContainerBackendError, self.sampler.sample)
+        stale = self.sampler.get_snapshot()
+        self.assertTrue(stale['stale'])
+        self.assertEqual(stale['error'], "Backend unreachable")
+        self.assertEqual(stale['sampled_at'], snapshot['sampled_at'])
+
+    def test_failed_first_sample_raises(self):
+        self.backend.get_status = self.fail_status
+        self.assertRaises(ContainerBackendError, self.sampler.sample)
+        self.assertRaises(ContainerBackendError, self.sampler.get_snapshot)
+
+    def test_successful_sample_is_not_stale(self):
+        self.sampler.sample()
+        self.backend.get_status = self.fail_status
+        self.assertRaises(ContainerBackendError, self.sampler.sample)
+        del self.backend.get_status
+        self.sampler.sample()
+        self.assertNotIn('stale', self.sampler.get_snapshot())
@@ -0,0 +1,64 @@
+from coco.contract.backends import ContainerBackend, SnapshotableContainerBackend
+from coco.contract.errors import ContainerNotFoundError, ContainerSnapshotNotFoundError
+from coco.hostapi.sharding import ShardedBackend
+from fakes import FakeContainerBackend
+import unittest
+
+
+class ShardedBackendTest(unittest.TestCase):
+    """
+    Tests of the backend spreading the items across several named backends.
+    """
+
+    def setUp(self):
+        self.first = FakeContainerBackend(containers=3, images=2, seed=16)
+        self.second = FakeContainerBackend(containers=4, images=2, seed=17)
+        self.backend = ShardedBackend([('first', self.first), ('second', self.second)])
+
+    def test_listing(self):
+        keys = [container[ContainerBackend.KEY_PK] for container in self.backend.get_containers()]
+        self.assertEqual(len(keys), 7)
+        self.assertEqual(sorted(keys), sorted(
+            ['first/' + container[ContainerBackend.KEY_PK] for container in self.first.get_containers()] +
+            ['second/' + container[ContainerBackend.KEY_PK] for container in self.second.get_containers()]
+        ))
+
+    def test_routing(self):
+        container = self.second.get_random_id('container')
+        self.assertEqual(
+            self.backend.get_container('second/' + container)[ContainerBackend.KEY_PK],
+            'second/' + container
+        )
+        self.backend.stop_container('second/' + container)
+        self.assertEqual(
+            self.second.get_container(container)[ContainerBackend.CONTAINER_KEY_STATUS],
+            ContainerBackend.CONTAINER_STATUS_STOPPED
+        )
+
+    def test_unknown_backend(self):
+        container = self.first.get_random_id('container')
+        for identifier in (container, 'third/' + container):
+            self.assertRaises(ContainerNotFoundError, self.backend.get_container, identifier)
+
+    def test_items_of_different_backends(self):
+        container = self.first.get_random_id('container')
+        snapshot = self.second.get_random_id('snapshot')
+        self.assertRaises(
+            ContainerSnapshotNotFoundError,
+            self.backend.restore_container_snapshot, 'first/' + container, 'second/' + snapshot
+        )
+
+    def test_created_on_backend_of_reference(self):
+        image = self.second.get_random_id('image')
+        container = self.backend.create_container(image='second/' + image)
+        self.assertTrue(container.startswith('second/'))
+        created = self.backend.get_container(container)
+        self.assertEqual(created['image'], 'second/' + image)
+        self.assertEqual(self.second.get_container(container.split('/', 1)[1])['image'], image)
+
+    def test_created_in_turn(self):
+        containers = [self.backend.create_container(name='created') for _ in xrange(4)]
+        self.assertEqual([container.split('/')[0] for container in containers], ['first', 'second'] * 2)
+
+    def test_class(self):
+        self.assertIsInstance(self.backend, SnapshotableContainerBackend)
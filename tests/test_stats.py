@@ -0,0 +1,49 @@
+from base64 import standard_b64encode
+from benchmark import stop_benchmark_app
+from coco.hostapi import config
+from fakes import FakeContainerBackend
+from test_routes import create_test_client
+import json
+import unittest
+
+
+class ContainerStatsTest(unittest.TestCase):
+    """
+    Tests of the per-container stats route.
+    """
+
+    def setUp(self):
+        self.backend = FakeContainerBackend(containers=5, seed=4)
+        self.client = create_test_client(self.backend)
+        config.stats_collector.collect()
+
+    def tearDown(self):
+        stop_benchmark_app()
+
+    def get_stats(self, container):
+        return self.client.get('/containers/%s/stats' % standard_b64encode(container))
+
+    def test_running_container(self):
+        response = self.get_stats(self.backend.get_random_id('container'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(json.loads(response.data)['latest'])
+
+    def test_stopped_container(self):
+        container = self.backend.get_random_id('container')
+        self.assertEqual(self.client.post('/containers/%s/stop' % standard_b64encode(container)).status_code, 204)
+        config.stats_collector.collect()
+        response = self.get_stats(container)
+        self.assertEqual(response.status_code, 200)
+        stats = json.loads(response.data)
+        self.assertIsNone(stats['latest'])
+        self.assertEqual(stats['history'], {'1m': [], '15m': [], '1h': []})
+
+    def test_created_container(self):
+        response = self.client.post('/containers', data=json.dumps({'name': 'created'}), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        response = self.get_stats(json.loads(response.data))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(json.loads(response.data)['latest'])
+
+    def test_unknown_container(self):
+        self.assertEqual(self.get_stats('unknown').status_code, 404)
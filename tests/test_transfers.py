@@ -0,0 +1,112 @@
+from base64 import standard_b64encode
+from benchmark import stop_benchmark_app
+from coco.hostapi import config
+from fakes import FakeContainerBackend
+from test_routes import create_test_client
+import json
+import shutil
+import tempfile
+import unittest
+
+
+class ArchiveExportTest(unittest.TestCase):
+    """
+    Tests of the `Range` support of archive downloads.
+    """
+
+    def setUp(self):
+        self.backend = FakeContainerBackend(containers=1, images=1, seed=14)
+        self.backend.archive = ''.join(chr(number % 256) for number in xrange(1000))
+        self.client = create_test_client(self.backend)
+        self.path = '/containers/images/%s/export' % standard_b64encode(self.backend.get_random_id('image'))
+
+    def tearDown(self):
+        stop_benchmark_app()
+
+    def test_whole_archive(self):
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Accept-Ranges'], 'bytes')
+        self.assertEqual(response.headers['Content-Length'], '1000')
+        self.assertEqual(response.data, self.backend.archive)
+
+    def test_range(self):
+        response = self.client.get(self.path, headers={'Range': 'bytes=10-19'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers['Content-Range'], 'bytes 10-19/1000')
+        self.assertEqual(response.data, self.backend.archive[10:20])
+
+    def test_suffix_range(self):
+        response = self.client.get(self.path, headers={'Range': 'bytes=-10'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers['Content-Range'], 'bytes 990-999/1000')
+        self.assertEqual(response.data, self.backend.archive[-10:])
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.path, headers={'Range': 'bytes=2000-'})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers['Content-Range'], 'bytes */1000')
+
+
+class ResumableUploadTest(unittest.TestCase):
+    """
+    Tests of archive imports sent in parts.
+    """
+
+    def setUp(self):
+        self.uploads_directory = config.uploads_directory
+        config.uploads_directory = tempfile.mkdtemp(prefix='coco-hostapi-test-')
+        self.backend = FakeContainerBackend(containers=1, images=1, seed=15)
+        self.archive = ''.join(chr(number % 256) for number in xrange(1000))
+        self.imported = []
+        import_container_image = self.backend.import_container_image
+
+        def record(archive, **params):
+            self.imported.append(archive.read())
+            return import_container_image(archive, **params)
+        self.backend.import_container_image = record
+        self.client = create_test_client(self.backend)
+
+    def tearDown(self):
+        stop_benchmark_app()
+        shutil.rmtree(config.uploads_directory)
+        config.uploads_directory = self.uploads_directory
+
+    def send(self, content_range, data='', upload='upload-1'):
+        return self.client.post(
+            '/containers/images/import',
+            query_string={'upload': upload, 'name': 'uploaded'},
+            data=data,
+            content_type='application/x-tar',
+            headers={'Content-Range': content_range}
+        )
+
+    def test_upload_in_parts(self):
+        response = self.send('bytes 0-399/1000', self.archive[:400])
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.headers['Range'], 'bytes=0-399')
+        self.assertEqual(json.loads(response.data), {'upload': 'upload-1', 'received': 400, 'length': 1000})
+
+        # e.g. after the connection broke, the client asks how much has been received
+        response = self.send('bytes */1000')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.headers['Range'], 'bytes=0-399')
+        self.assertEqual(self.imported, [])
+
+        # bytes sent again replace the received ones
+        response = self.send('bytes 300-999/1000', self.archive[300:])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.imported, [self.archive])
+        self.assertEqual(self.backend.get_container_image(json.loads(response.data))['name'], 'uploaded')
+
+    def test_part_after_gap(self):
+        self.send('bytes 0-399/1000', self.archive[:400])
+        response = self.send('bytes 600-999/1000', self.archive[600:])
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers['Range'], 'bytes=0-399')
+
+    def test_invalid_part(self):
+        self.assertEqual(self.send('bytes 0-399/1000', self.archive[:400], upload='../upload').status_code, 400)
+        self.assertEqual(self.send('bytes 400-399/1000').status_code, 400)
+        self.assertEqual(self.send('bytes 0-1000/1000', self.archive).status_code, 400)
+        self.assertEqual(self.imported, [])